@@ -1,20 +1,27 @@
 from __future__ import annotations
 import os
 import requests
-from flask import Flask, render_template, request, jsonify, url_for, redirect, flash, session, send_from_directory, send_file, abort, Response, current_app
+from flask import Flask, render_template, request, jsonify, url_for, redirect, flash, session, send_file, abort, Response, current_app, stream_with_context
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
+from werkzeug.http import is_resource_modified
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
 from dotenv import load_dotenv
 from flask_migrate import Migrate
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import hmac
+import json
 import mimetypes
-try:
-    from apscheduler.schedulers.background import BackgroundScheduler
-except Exception:  # pragma: no cover
-    BackgroundScheduler = None
-import smtplib
-import ssl
+from urllib.parse import quote
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 try:
     import stripe  # type: ignore
 except Exception:  # pragma: no cover
@@ -23,20 +30,50 @@ except Exception:  # pragma: no cover
 # Support both package and script imports
 try:
     # Package-relative imports (when FLASK_APP=law_firm_intake.app)
-    from .models import db, User, Client, Case, Action, Document, CaseNote, CaseAction, AIInsight, Transcript, Deadline, EmailDraft, EmailQueue, ClientUser, ClientDocumentAccess, ClientMessage, TimeEntry, Expense, Invoice, Payment, TrustAccount, CalendarEvent, NotificationPreference, Intent, IntentRule, ActionTemplate, EmailTemplate, AnalyzerLog, CaseStatusAudit
-    from .utils import get_pagination, apply_case_filters, get_sort_params, analyze_case, analyze_intake_text_scenarios
-    from .services.analyzer_assemblyai import analyze_with_aai
+    from .models import db, User, Client, Case, Action, Document, CaseNote, CaseAction, AIInsight, Transcript, Deadline, EmailDraft, EmailQueue, ClientUser, ClientDocumentAccess, ClientMessage, TimeEntry, Expense, Invoice, Payment, TrustAccount, CalendarEvent, NotificationPreference, Intent, IntentRule, ActionTemplate, EmailTemplate, AnalyzerLog, CaseStatusAudit, AnalysisCacheEntry, IntakeJob, JobStat, SchedulerLease, DocumentExtraction, RetentionRun
+    from .utils import get_pagination, apply_case_filters, get_sort_params, analyze_case, analyze_many, analyze_intake_text_scenarios
+    from .services.analyzer_assemblyai import analyze_with_aai, MODEL as AAI_MODEL, PROMPT_VERSION as AAI_PROMPT_VERSION
+    from .services.analysis_cache import AnalysisCache, cache_key
     from .filters import time_ago, format_date, format_currency, pluralize
     from .services.stt import STTService
     from .services.letter_templates import LetterTemplateService
+    from .services.intent_rules import IntentRuleEngine
+    from .services.materialize import MaterializePlan, materialize
+    from .services import dashboard_stats, reminders
+    from .services.response_cache import ResponseCache, make_backend
+    from .services.timeline import timeline_page, timeline_count, decode_cursor
+    from .services.pagination import Paginator, BadPageRequest, estimate_count, requested as page_requested
+    from .services.search import search_index, KINDS as SEARCH_KINDS
+    from .services.mailer import MailerPool, OutgoingEmail
+    from .services.email_queue import claim_batch, complete_batch
+    from .services.jobs import JobRegistry, LeaderLease, Worker
+    from .services import transcripts as transcript_store
+    from .services.stt import STT_WEBHOOK_ENABLED, STT_WEBHOOK_SECRET, WEBHOOK_AUTH_HEADER
+    from .services import provider_http, audio_upload, case_export, document_extract, retention
+    from .document_service import DocumentService
 except ImportError:  # pragma: no cover
     # Fallback for running as a script (python app.py)
-    from models import db, User, Client, Case, Action, Document, CaseNote, CaseAction, AIInsight, Transcript, Deadline, EmailDraft, EmailQueue, ClientUser, ClientDocumentAccess, ClientMessage, TimeEntry, Expense, Invoice, Payment, TrustAccount, CalendarEvent, NotificationPreference, Intent, IntentRule, ActionTemplate, EmailTemplate, AnalyzerLog, CaseStatusAudit
-    from utils import get_pagination, apply_case_filters, get_sort_params, analyze_case, analyze_intake_text_scenarios
-    from services.analyzer_assemblyai import analyze_with_aai
+    from models import db, User, Client, Case, Action, Document, CaseNote, CaseAction, AIInsight, Transcript, Deadline, EmailDraft, EmailQueue, ClientUser, ClientDocumentAccess, ClientMessage, TimeEntry, Expense, Invoice, Payment, TrustAccount, CalendarEvent, NotificationPreference, Intent, IntentRule, ActionTemplate, EmailTemplate, AnalyzerLog, CaseStatusAudit, AnalysisCacheEntry, IntakeJob, JobStat, SchedulerLease, DocumentExtraction, RetentionRun
+    from utils import get_pagination, apply_case_filters, get_sort_params, analyze_case, analyze_many, analyze_intake_text_scenarios
+    from services.analyzer_assemblyai import analyze_with_aai, MODEL as AAI_MODEL, PROMPT_VERSION as AAI_PROMPT_VERSION
+    from services.analysis_cache import AnalysisCache, cache_key
     from filters import time_ago, format_date, format_currency, pluralize
     from services.stt import STTService
     from services.letter_templates import LetterTemplateService
+    from services.intent_rules import IntentRuleEngine
+    from services.materialize import MaterializePlan, materialize
+    from services import dashboard_stats, reminders
+    from services.response_cache import ResponseCache, make_backend
+    from services.timeline import timeline_page, timeline_count, decode_cursor
+    from services.pagination import Paginator, BadPageRequest, estimate_count, requested as page_requested
+    from services.search import search_index, KINDS as SEARCH_KINDS
+    from services.mailer import MailerPool, OutgoingEmail
+    from services.email_queue import claim_batch, complete_batch
+    from services.jobs import JobRegistry, LeaderLease, Worker
+    from services import transcripts as transcript_store
+    from services.stt import STT_WEBHOOK_ENABLED, STT_WEBHOOK_SECRET, WEBHOOK_AUTH_HEADER
+    from services import provider_http, audio_upload, case_export, document_extract, retention
+    from document_service import DocumentService
 
 # Load environment variables
 load_dotenv()
@@ -45,6 +82,24 @@ load_dotenv()
 ASSEMBLYAI_API_KEY = os.getenv('ASSEMBLYAI_API_KEY')
 USE_AAI_ANALYZER = (os.getenv('USE_AAI_ANALYZER', 'false').strip().lower() == 'true')
 LOG_ANALYZER_METRICS = (os.getenv('LOG_ANALYZER_METRICS', 'false').strip().lower() == 'true')
+INTENT_RULES_CHECK_SECONDS = float(os.getenv('INTENT_RULES_CHECK_SECONDS', '5'))
+DASHBOARD_RECONCILE_MINUTES = int(os.getenv('DASHBOARD_RECONCILE_MINUTES', '15'))
+# Background jobs run in the worker process (python -m worker); set
+# RUN_JOBS_IN_WEB=true to run them in the web process instead
+RUN_JOBS_IN_WEB = (os.getenv('RUN_JOBS_IN_WEB', 'false').strip().lower() == 'true')
+SCHEDULER_LEASE_SECONDS = float(os.getenv('SCHEDULER_LEASE_SECONDS', '30'))
+# Transcript completion: poller cadence and per-transcript backoff; the first
+# poll waits TRANSCRIPT_WEBHOOK_GRACE_SECONDS when the provider webhook is set up
+TRANSCRIPT_POLL_SECONDS = float(os.getenv('TRANSCRIPT_POLL_SECONDS', '10'))
+TRANSCRIPT_POLL_BASE_SECONDS = float(os.getenv('TRANSCRIPT_POLL_BASE_SECONDS', '5'))
+TRANSCRIPT_POLL_MAX_SECONDS = float(os.getenv('TRANSCRIPT_POLL_MAX_SECONDS', '300'))
+TRANSCRIPT_WEBHOOK_GRACE_SECONDS = float(os.getenv('TRANSCRIPT_WEBHOOK_GRACE_SECONDS', '120'))
+# Audio for transcription is piped from the request into the provider upload;
+# AUDIO_STREAM_UPLOADS=false spools it first (in memory up to AUDIO_SPOOL_MAX_BYTES)
+AUDIO_STREAM_UPLOADS = (os.getenv('AUDIO_STREAM_UPLOADS', 'true').strip().lower() == 'true')
+AUDIO_SPOOL_MAX_BYTES = int(os.getenv('AUDIO_SPOOL_MAX_BYTES', str(8 * 1024 * 1024)))
+# Bump when analyze_intake_text_scenarios changes so cached rule results are dropped
+RULES_ANALYZER_VERSION = 'scenarios-1'
 ASSEMBLYAI_UPLOAD_URL = "https://api.assemblyai.com/v2/upload"
 ASSEMBLYAI_TRANSCRIPTION_URL = "https://api.assemblyai.com/v2/transcript"
 ASSEMBLYAI_HEADERS = {
@@ -157,6 +212,11 @@ ALLOWED_AUDIO_EXTENSIONS = {'webm', 'wav', 'mp3', 'm4a', 'mp4', 'ogg'}
 # Initialize extensions
 db.init_app(app)
 migrate = Migrate(app, db)
+dashboard_stats.install(Session)
+response_cache = ResponseCache(make_backend())
+response_cache.install(Session)
+search_index.install(Session)
+reminders.install(Session)
 
 # Stripe configuration
 STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY')
@@ -170,117 +230,115 @@ SMTP_USER = os.getenv('SMTP_USER')
 SMTP_PASS = os.getenv('SMTP_PASS')
 SMTP_FROM = os.getenv('SMTP_FROM') or os.getenv('SMTP_USER')
 
+# Queue runs send up to EMAIL_BATCH_SIZE messages over SMTP_CONCURRENCY pooled sessions
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', '25'))
+SMTP_CONCURRENCY = int(os.getenv('SMTP_CONCURRENCY', '1'))
+SMTP_IDLE_SECONDS = float(os.getenv('SMTP_IDLE_SECONDS', '240'))
+# Queue worker: lease length per claimed batch, retry schedule and how long
+# one run keeps draining batches when there is a backlog
+EMAIL_LEASE_SECONDS = float(os.getenv('EMAIL_LEASE_SECONDS', '300'))
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '6'))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv('EMAIL_RETRY_BASE_SECONDS', '60'))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv('EMAIL_RETRY_MAX_SECONDS', '3600'))
+EMAIL_DRAIN_SECONDS = float(os.getenv('EMAIL_DRAIN_SECONDS', '45'))
+mailer = MailerPool(SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, SMTP_FROM,
+                    concurrency=SMTP_CONCURRENCY, idle_seconds=SMTP_IDLE_SECONDS) if SMTP_HOST and SMTP_FROM else None
+
 def _send_email(to_email: str, subject: str, body: str):
-    if SMTP_HOST and SMTP_FROM:
+    if mailer is not None:
         try:
-            msg = f"From: {SMTP_FROM}\r\nTo: {to_email}\r\nSubject: {subject}\r\n\r\n{body}"
-            context = ssl.create_default_context()
-            with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10) as server:
-                server.ehlo()
-                try:
-                    server.starttls(context=context)
-                    server.ehlo()
-                except Exception:
-                    pass
-                if SMTP_USER and SMTP_PASS:
-                    server.login(SMTP_USER, SMTP_PASS)
-                server.sendmail(SMTP_FROM, [to_email] if to_email else [SMTP_FROM], msg)
+            mailer.send(OutgoingEmail(to_email, subject, body))
             current_app.logger.info(f"[SMTP EMAIL] To={to_email or 'n/a'} | Subject={subject}")
             return
         except Exception as e:
             current_app.logger.error(f"SMTP send failed: {str(e)}; falling back to mock.")
     current_app.logger.info(f"[MOCK EMAIL] To={to_email or 'n/a'} | Subject={subject} | Body={body}")
 
+def _send_email_batch(emails):
+    """Send many messages over the pooled sessions; returns an error (or None) per message."""
+    if mailer is None:
+        for e in emails:
+            current_app.logger.info(f"[MOCK EMAIL] To={e.to or 'n/a'} | Subject={e.subject} | Body={e.body}")
+        return [None] * len(emails)
+    errors = mailer.send_batch(emails)
+    sent = sum(1 for err in errors if err is None)
+    current_app.logger.info(f"[SMTP EMAIL] batch sent={sent} failed={len(errors) - sent} connects={mailer.connects}")
+    return errors
+
 def _check_calendar_reminders():
+    """Queue reminder emails for events whose remind_at falls in the current minute."""
     with app.app_context():
-        now = datetime.utcnow()
-        window = now + timedelta(minutes=1)
-        # Upcoming events; we'll compute per-event reminder window and skip already-notified
-        events = db.session.query(CalendarEvent).filter(
-            CalendarEvent.reminder_minutes_before > 0,
-            CalendarEvent.start_at != None
-        ).all()
-        for ev in events:
-            try:
-                if not ev.start_at:
-                    continue
-                # Preferences override minutes_before if present (by client)
-                pref = None
-                if ev.client_id:
-                    pref = NotificationPreference.query.filter_by(client_id=ev.client_id).first()
-                minutes_before = pref.minutes_before if pref and pref.minutes_before is not None else ev.reminder_minutes_before
-                email_enabled = pref.email_enabled if pref is not None else True
-                if not email_enabled:
-                    continue
-                remind_at = ev.start_at - timedelta(minutes=minutes_before)
-                if remind_at <= window and remind_at >= now:
-                    # Skip if already notified recently for this window
-                    if ev.last_notified_at and ev.last_notified_at >= remind_at:
-                        continue
-                    # Derive recipient: client's email if available
-                    to_email = ev.client.email if getattr(ev, 'client', None) and ev.client and ev.client.email else None
-                    subject = f"Reminder: {ev.title} at {ev.start_at.strftime('%Y-%m-%d %H:%M')}"
-                    body = f"Event: {ev.title}\nCase: {ev.case.title if ev.case else '-'}\nLocation: {ev.location or '-'}"
-                    _send_email(to_email, subject, body)
-                    ev.last_notified_at = now
-                    db.session.add(ev)
-                    db.session.commit()
-            except Exception as e:
-                current_app.logger.error(f"Reminder job error for event {getattr(ev, 'id', '?')}: {str(e)}")
+        try:
+            queued = reminders.enqueue_due(db.session)
+            if queued:
+                current_app.logger.info(f"Queued {queued} calendar reminder(s)")
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Reminder job error: {str(e)}")
+            raise
 
-_scheduler = None
 def _process_email_queue():
-    """Background job to process pending EmailQueue items."""
+    """Background job to send due EmailQueue items.
+
+    Safe to run from several processes at once: each batch is claimed with a
+    lease before sending. Keeps claiming batches for up to EMAIL_DRAIN_SECONDS
+    while a full batch comes back, so a backlog drains faster than one batch per run.
+    """
     with app.app_context():
-        now = datetime.utcnow()
+        started = time.monotonic()
+        totals = {'sent': 0, 'retry': 0, 'failed': 0}
         try:
-            items = (
-                db.session.query(EmailQueue)
-                .filter(EmailQueue.status == 'pending')
-                .filter(EmailQueue.send_after <= now)
-                .order_by(EmailQueue.created_at.asc())
-                .limit(25)
-                .all()
-            )
-            for item in items:
-                try:
-                    _send_email(item.to, item.subject, item.body)
-                    item.status = 'sent'
-                    item.attempts = (item.attempts or 0) + 1
-                    item.last_error = None
-                    item.updated_at = now
-                    db.session.add(item)
-                    db.session.commit()
-                except Exception as e:
-                    item.status = 'failed'
-                    item.attempts = (item.attempts or 0) + 1
-                    item.last_error = str(e)
-                    item.updated_at = now
-                    db.session.add(item)
-                    db.session.commit()
+            while True:
+                items = claim_batch(db.session, EMAIL_BATCH_SIZE, EMAIL_LEASE_SECONDS)
+                if not items:
+                    break
+                errors = _send_email_batch([OutgoingEmail(i.to, i.subject, i.body) for i in items])
+                outcome = complete_batch(db.session, items, errors, EMAIL_MAX_ATTEMPTS,
+                                         EMAIL_RETRY_BASE_SECONDS, EMAIL_RETRY_MAX_SECONDS)
+                for k, v in outcome.items():
+                    totals[k] += v
+                if len(items) < EMAIL_BATCH_SIZE or time.monotonic() - started > EMAIL_DRAIN_SECONDS:
+                    break
         except Exception as e:
+            db.session.rollback()
             current_app.logger.error(f"Email queue processor error: {str(e)}")
+            raise
+        if any(totals.values()):
+            current_app.logger.info(f"Email queue run: {totals}")
 
-def _start_scheduler_once():
-    global _scheduler
-    if _scheduler is not None:
-        return
-    if BackgroundScheduler is None:
-        app.logger.warning('APScheduler not installed; reminder job disabled.')
-        return
-    _scheduler = BackgroundScheduler()
-    _scheduler.add_job(_check_calendar_reminders, 'interval', minutes=1, id='calendar_reminders')
-    _scheduler.add_job(_process_email_queue, 'interval', minutes=1, id='email_queue_processor')
-    _scheduler.start()
+def _reconcile_dashboard_stats():
+    """Correct drift in the maintained dashboard counters (raw SQL writes, crashes)."""
+    with app.app_context():
+        try:
+            drift = dashboard_stats.reconcile()
+            if drift:
+                app.logger.warning(f"Dashboard stats drift corrected: {drift}")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Dashboard stats reconcile error: {str(e)}")
+            raise
 
-# Start scheduler only on the reloader main process
-if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
-    try:
-        _start_scheduler_once()
-        if BackgroundScheduler:
-            app.logger.info('APScheduler started for calendar reminders.')
-    except Exception as e:
-        app.logger.error(f'Failed to start scheduler: {str(e)}')
+def _fetch_transcript_status(external_id):
+    return STTService().get_transcription_status(external_id)
+
+def _first_transcript_poll_at():
+    """When the poller first checks a new transcript; later with a webhook configured."""
+    grace = TRANSCRIPT_WEBHOOK_GRACE_SECONDS if STT_WEBHOOK_ENABLED else TRANSCRIPT_POLL_BASE_SECONDS
+    return datetime.utcnow() + timedelta(seconds=grace)
+
+def _poll_transcripts():
+    """Fallback for missed webhooks: check outstanding transcripts that are due, with backoff."""
+    with app.app_context():
+        try:
+            counts = transcript_store.poll_due(db.session, _fetch_transcript_status,
+                                               base_seconds=TRANSCRIPT_POLL_BASE_SECONDS,
+                                               max_seconds=TRANSCRIPT_POLL_MAX_SECONDS)
+            if counts['checked']:
+                app.logger.info(f"Transcript poll: {counts}")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Transcript poller error: {str(e)}")
+            raise
 
 # Register template filters
 app.jinja_env.filters['time_ago'] = time_ago
@@ -344,6 +402,28 @@ def login_required(f):
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+# Document bodies are stored by SHA-256 under UPLOAD_FOLDER/blobs
+document_store = DocumentService(app.config['UPLOAD_FOLDER'])
+# Document delivery: 'x-accel' hands the transfer to nginx via X-Accel-Redirect
+# (DOCUMENT_ACCEL_PREFIX must be an internal location aliased to UPLOAD_FOLDER),
+# 'x-sendfile' to Apache/lighttpd; unset streams from the app with Range support
+DOCUMENT_SENDFILE = os.getenv('DOCUMENT_SENDFILE', '').strip().lower()
+DOCUMENT_ACCEL_PREFIX = os.getenv('DOCUMENT_ACCEL_PREFIX', '/protected-uploads/')
+# Background text extraction / thumbnails (services/document_extract.py): job
+# cadence, documents per run, and when a 'processing' row is considered abandoned
+THUMBNAIL_FOLDER = os.path.join(app.config['UPLOAD_FOLDER'], 'thumbnails')
+DOCUMENT_EXTRACTION_SECONDS = float(os.getenv('DOCUMENT_EXTRACTION_SECONDS', '15'))
+DOCUMENT_EXTRACTION_BATCH = int(os.getenv('DOCUMENT_EXTRACTION_BATCH', '16'))
+DOCUMENT_EXTRACTION_STALE_SECONDS = int(os.getenv('DOCUMENT_EXTRACTION_STALE_SECONDS', '900'))
+DOCUMENT_EXTRACTION_MAX_ATTEMPTS = int(os.getenv('DOCUMENT_EXTRACTION_MAX_ATTEMPTS', '3'))
+# Retention / GC sweep of UPLOAD_FOLDER (services/retention.py). Orphaned files
+# older than RETENTION_MIN_AGE_SECONDS are deleted unless RETENTION_DRY_RUN;
+# documents of cases closed more than EVIDENCE_RETENTION_DAYS ago are only
+# reported unless RETENTION_ENFORCE is set
+RETENTION_SWEEP_SECONDS = float(os.getenv('RETENTION_SWEEP_SECONDS', str(6 * 3600)))
+RETENTION_DRY_RUN = (os.getenv('RETENTION_DRY_RUN', 'false').strip().lower() == 'true')
+RETENTION_ENFORCE = (os.getenv('RETENTION_ENFORCE', 'false').strip().lower() == 'true')
+RETENTION_MIN_AGE_SECONDS = float(os.getenv('RETENTION_MIN_AGE_SECONDS', '3600'))
 
 # -------- Client Portal auth helpers (must be defined before portal routes) -------- #
 def portal_login_required(f):
@@ -376,6 +456,9 @@ with app.app_context():
         admin.set_password('admin123')
         db.session.add(admin)
         db.session.commit()
+    # Full-text index (FTS5 / tsvector); backfilled the first time it is created
+    if not search_index.ensure(db.session):
+        app.logger.warning('Full-text search index unavailable; search falls back to LIKE')
 
 # Case categories and their details
 CASE_CATEGORIES = {
@@ -427,23 +510,31 @@ CASE_CATEGORIES = {
 
 # Helper functions
 def save_uploaded_file(file):
-    """Save an uploaded file and return its path."""
+    """Store an uploaded file in the document store and return its path."""
     if not file:
         return None
-    
-    filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    
-    # Ensure unique filename
-    counter = 1
-    name, ext = os.path.splitext(filename)
-    while os.path.exists(filepath):
-        filename = f"{name}_{counter}{ext}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        counter += 1
-    
-    file.save(filepath)
-    return filepath
+    return document_store.store_stream(file.stream).path
+
+def _release_document_file(document):
+    """Remove a deleted document's file unless another document shares the blob."""
+    if not document.sha256:
+        # Stored before the content-addressed store
+        if os.path.exists(document.file_path):
+            os.remove(document.file_path)
+        return
+    shared = db.session.query(Document.id).filter(Document.sha256 == document.sha256, Document.id != document.id).first()
+    if shared is None:
+        document_store.delete_blob(document.sha256)
+
+def _release_document_thumbnail(document_id):
+    path = document_extract.thumbnail_path(THUMBNAIL_FOLDER, document_id)
+    if os.path.exists(path):
+        os.remove(path)
+
+def _queue_extraction(document):
+    """Attach a pending extraction row; the document_extraction job picks it up."""
+    kind = document_extract.kind_of(document.name)
+    document.extraction = DocumentExtraction(kind=kind, status='pending' if kind else 'skipped')
 
 def _is_allowed_audio(filename: str, content_type: str) -> bool:
     if not filename:
@@ -455,6 +546,36 @@ def _is_allowed_audio(filename: str, content_type: str) -> bool:
         return True
     return False
 
+def _open_audio_upload():
+    """The request's audio_file part as (upload, None), or (None, error response)."""
+    if (request.content_length or 0) > app.config.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024):
+        return None, (jsonify({'error': 'File too large'}), 413)
+    try:
+        upload = audio_upload.open_part(request, 'audio_file', stream=AUDIO_STREAM_UPLOADS,
+                                        spool_max_bytes=AUDIO_SPOOL_MAX_BYTES)
+    except audio_upload.BadUpload:
+        upload = None
+    if upload is None:
+        return None, (jsonify({'error': 'No file part'}), 400)
+    if not upload.filename:
+        upload.close()
+        return None, (jsonify({'error': 'No selected file'}), 400)
+    if not _is_allowed_audio(upload.filename, upload.content_type):
+        upload.close()
+        return None, (jsonify({'error': 'Unsupported audio type'}), 415)
+    return upload, None
+
+def _start_transcription(upload):
+    """Send an audio upload to the STT provider; returns (transcript id, Transcript size columns)."""
+    service = STTService()
+    try:
+        transcript_id = service.start_transcription_stream(upload.chunks(), upload.filename)
+    finally:
+        upload.close()
+    if service.preprocess_error:
+        app.logger.warning(f"Audio preprocessing skipped for {transcript_id}: {service.preprocess_error}")
+    return transcript_id, {'original_bytes': service.original_bytes, 'uploaded_bytes': service.uploaded_bytes}
+
 # Routes
 @app.route('/')
 @requires_auth
@@ -490,13 +611,8 @@ def dashboard():
     user = db.session.get(User, session['user_id'])
     
     # Get stats
-    stats = {
-        'active_cases': Case.query.filter_by(status='open').count(),
-        'active_clients': Client.query.count(),
-        'pending_actions': Action.query.filter_by(status='pending').count(),
-        'documents_count': Document.query.count(),
-        'last_updated': datetime.now().strftime('%b %d, %Y')
-    }
+    stats = dashboard_stats.read()
+    stats['last_updated'] = datetime.now().strftime('%b %d, %Y')
     
     # Get recent cases
     recent_cases = Case.query.order_by(Case.created_at.desc()).limit(5).all()
@@ -1002,106 +1118,26 @@ def api_portal_timeline():
         client_id = _get_portal_client_id()
         if not client_id:
             abort(403)
-        # Optional query: case_id, pagination
+        # Optional query: case_id; pagination by cursor (preferred) or page
         case_id = request.args.get('case_id', type=int)
-        page = request.args.get('page', default=1, type=int)
         per_page = request.args.get('per_page', default=25, type=int)
         per_page = max(1, min(per_page, 200))
-        items = []
-        # Status changes
-        q_status = (CaseStatusAudit.query
-                    .join(Case, CaseStatusAudit.case_id == Case.id)
-                    .filter(Case.client_id == client_id)
-                    .order_by(CaseStatusAudit.created_at.desc()))
-        if case_id:
-            q_status = q_status.filter(CaseStatusAudit.case_id == case_id)
-        for a in q_status.all():
-            items.append({
-                'type': 'status_change',
-                'case_id': a.case_id,
-                'at': a.created_at.isoformat() if a.created_at else None,
-                'data': {
-                    'from': a.from_status,
-                    'to': a.to_status,
-                }
-            })
-        # Messages
-        q_msgs = ClientMessage.query.filter(ClientMessage.client_id == client_id).order_by(ClientMessage.created_at.desc())
-        if case_id:
-            q_msgs = q_msgs.filter(ClientMessage.case_id == case_id)
-        for m in q_msgs.all():
-            items.append({
-                'type': 'message',
-                'case_id': m.case_id,
-                'at': m.created_at.isoformat() if m.created_at else None,
-                'data': {
-                    'from_client': m.from_client,
-                    'subject': m.subject,
-                    'message': m.message,
-                }
-            })
-        # Document access grants
-        q_docs = (ClientDocumentAccess.query
-                  .join(Document, ClientDocumentAccess.document_id == Document.id)
-                  .filter(ClientDocumentAccess.client_id == client_id)
-                  .order_by(ClientDocumentAccess.granted_at.desc()))
-        if case_id:
-            q_docs = q_docs.join(Case, Document.case_id == Case.id).filter(Case.id == case_id)
-        for acc in q_docs.all():
-            items.append({
-                'type': 'document',
-                'case_id': acc.document.case_id if getattr(acc, 'document', None) else None,
-                'at': acc.granted_at.isoformat() if acc.granted_at else None,
-                'data': {
-                    'name': getattr(acc.document, 'name', None) if getattr(acc, 'document', None) else None,
-                }
-            })
-        # Invoices and payments
-        q_invoices = Invoice.query.filter(Invoice.client_id == client_id).order_by(Invoice.created_at.desc())
-        if case_id:
-            q_invoices = q_invoices.filter(Invoice.case_id == case_id)
-        for inv in q_invoices.all():
-            items.append({
-                'type': 'invoice',
-                'case_id': inv.case_id,
-                'at': inv.created_at.isoformat() if getattr(inv, 'created_at', None) else None,
-                'data': {
-                    'invoice_number': getattr(inv, 'invoice_number', None),
-                    'status': getattr(inv, 'status', None),
-                    'total_amount': float(getattr(inv, 'total_amount', 0) or 0),
-                }
-            })
-        q_pay = (Payment.query
-                 .join(Invoice, Payment.invoice_id == Invoice.id)
-                 .filter(Invoice.client_id == client_id)
-                 .order_by(Payment.payment_date.desc()))
-        if case_id:
-            q_pay = q_pay.filter(Invoice.case_id == case_id)
-        for p in q_pay.all():
-            items.append({
-                'type': 'payment',
-                'case_id': getattr(p.invoice, 'case_id', None) if getattr(p, 'invoice', None) else None,
-                'at': p.payment_date.isoformat() if getattr(p, 'payment_date', None) else None,
-                'data': {
-                    'amount': float(getattr(p, 'amount', 0) or 0),
-                    'status': getattr(p, 'status', None),
-                }
-            })
-        # Sort merged items by datetime desc
-        def sort_key(it):
-            return it.get('at') or ''
-        items.sort(key=sort_key, reverse=True)
-        total = len(items)
-        start = max(0, (page - 1) * per_page)
-        end = min(total, start + per_page)
-        slice_items = items[start:end]
-        return jsonify({
-            'items': slice_items,
-            'page': page,
-            'per_page': per_page,
-            'total': total,
-            'has_more': end < total
-        })
+        cursor = request.args.get('cursor')
+        if cursor:
+            decoded = decode_cursor(cursor)
+            if decoded is None:
+                return jsonify({'error': 'invalid cursor'}), 400
+            result = timeline_page(client_id, case_id, limit=per_page, cursor=decoded)
+            return jsonify(dict(result, per_page=per_page))
+        page = request.args.get('page', type=int)
+        if page and page > 1:
+            result = timeline_page(client_id, case_id, limit=per_page, offset=(page - 1) * per_page)
+        else:
+            result = timeline_page(client_id, case_id, limit=per_page)
+        result.update(per_page=per_page, page=page or 1)
+        if request.args.get('total') in ('1', 'true'):
+            result['total'] = timeline_count(client_id, case_id)
+        return jsonify(result)
     except Exception as e:
         app.logger.error(f"Error in api_portal_timeline: {str(e)}")
         return jsonify({'error': 'failed'}), 500
@@ -1282,50 +1318,31 @@ def api_automations_slip_fall_apply():
             return abort(404)
         # Use client-provided preview if present; otherwise compute
         preview = data.get('preview') or _slip_fall_build_preview(case, data.get('analysis'))
-        created = {'tasks': 0, 'emails': 0, 'deadlines': 0}
         now = datetime.utcnow()
+        user_id = _current_user_id()
+        plan = MaterializePlan(case.id)
         # Create tasks (Actions) and associate to case via CaseAction
         for t in preview.get('tasks', []):
-            try:
-                a = Action(
-                    title=t.get('title') or 'Task',
-                    description=t.get('description'),
-                    action_type='task',
-                    status='pending',
-                    priority=t.get('priority') or 'medium',
-                    created_by_id=_current_user_id()
-                )
-                db.session.add(a)
-                db.session.flush()
-                ca = CaseAction(case_id=case.id, action_id=a.id, status='pending')
-                db.session.add(ca)
-                created['tasks'] += 1
-            except Exception:
-                db.session.rollback()
+            plan.add_action(
+                title=t.get('title') or 'Task',
+                description=t.get('description'),
+                action_type='task',
+                status='pending',
+                priority=t.get('priority') or 'medium',
+                created_by_id=user_id
+            )
         # Create email drafts
         for em in preview.get('emails', []):
-            try:
-                draft = EmailDraft(
-                    case_id=case.id,
-                    to=None,
-                    subject=em.get('subject') or 'Notice',
-                    body=em.get('body') or '',
-                    status='draft'
-                )
-                db.session.add(draft)
-                created['emails'] += 1
-            except Exception:
-                db.session.rollback()
+            plan.add_draft(to=None, subject=em.get('subject') or 'Notice', body=em.get('body') or '', status='draft')
         # Create deadlines
         for dl in preview.get('deadlines', []):
             try:
                 due_in = int(dl.get('due_in_days') or 7)
-                due_date = now + timedelta(days=due_in)
-                d = Deadline(case_id=case.id, name=dl.get('name') or 'Deadline', due_date=due_date, source='slip_fall_automation')
-                db.session.add(d)
-                created['deadlines'] += 1
-            except Exception:
-                db.session.rollback()
+            except (TypeError, ValueError):
+                due_in = 7
+            plan.add_deadline(name=dl.get('name') or 'Deadline', due_date=now + timedelta(days=due_in), source='slip_fall_automation')
+        materialize(plan)
+        created = {'tasks': len(plan.actions), 'emails': len(plan.drafts), 'deadlines': len(plan.deadlines)}
         db.session.commit()
         return jsonify({'ok': True, 'created': created})
     except Exception as e:
@@ -1418,23 +1435,23 @@ def api_intake_analyze():
         text = str(data.get('text', '')).strip()
         if not text:
             return jsonify({'error': 'Missing text'}), 400
-        result = None
-        # Prefer AssemblyAI analyzer if enabled
-        if USE_AAI_ANALYZER and ASSEMBLYAI_API_KEY:
-            try:
-                result = analyze_with_aai(text)
-            except Exception as e:
-                app.logger.error(f"analyze_with_aai failed: {str(e)}; falling back")
-        if result is None:
-            try:
-                result = analyze_intake_text_scenarios(text)
-            except Exception as e:
-                app.logger.error(f"analyze_intake_text_scenarios failed: {str(e)}")
-                return jsonify({'error': 'Analyzer unavailable'}), 501
+        try:
+            result = _analyze_raw(text)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"analyze_intake_text_scenarios failed: {str(e)}")
+            return jsonify({'error': 'Analyzer unavailable'}), 501
+        try:
+            # Persist the cache entry and analyzer metrics
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"analysis cache commit failed: {str(e)}")
         # Normalize response structure
         payload = {
             'category': result.get('category'),
             'case_type_key': result.get('case_type_key'),
+            'intent_key': result.get('intent_key'),
             'urgency': result.get('urgency'),
             'key_facts': result.get('key_facts', {}),
             'dates': result.get('dates', {}),
@@ -1451,17 +1468,13 @@ def api_intake_analyze():
 
 @app.route('/api/dashboard', methods=['GET'])
 @requires_auth
+@response_cache.cached('case', 'client', 'action', 'document', 'deadline', 'user', 'dashboard_stat')
 def api_dashboard():
     try:
         uid = _current_user_id()
         user = db.session.get(User, uid) if uid else None
-        stats = {
-            'active_cases': Case.query.filter_by(status='open').count(),
-            'active_clients': Client.query.count(),
-            'pending_actions': Action.query.filter_by(status='pending').count(),
-            'documents_count': Document.query.count(),
-            'last_updated': datetime.now().isoformat()
-        }
+        stats = dashboard_stats.read()
+        stats['last_updated'] = datetime.now().isoformat()
         recent_cases = [
             {
                 'id': c.id,
@@ -1643,6 +1656,10 @@ def api_admin_seed_intents():
                 'key': 'personal_injury_premises',
                 'name': 'Personal Injury - Premises Liability',
                 'department': 'Personal Injury',
+                'rules': [
+                    {'pattern': '{"all": [["slip", "slipped", "tripped", "fell"], ["floor", "spill", "store", "aisle", "stairs"]]}', 'weight': 2.0},
+                    {'pattern': '{"any": ["wet floor", "no warning sign", "premises liability"]}', 'weight': 1.0},
+                ],
                 'actions': [
                     {'title': 'Send preservation letter to store', 'description': 'Preserve CCTV and incident logs', 'default_status': 'pending', 'default_priority': 'high', 'due_in_days': 1},
                     {'title': 'Request staff list and cleaning logs', 'description': 'Day of incident', 'default_status': 'pending', 'default_priority': 'medium', 'due_in_days': 2},
@@ -1655,6 +1672,10 @@ def api_admin_seed_intents():
                 'key': 'auto_accident',
                 'name': 'Auto Accident',
                 'department': 'Auto',
+                'rules': [
+                    {'pattern': '{"all": [["accident", "collision", "crash", "rear-ended"], ["car", "vehicle", "truck", "highway", "intersection", "driver"]]}', 'weight': 2.0},
+                    {'pattern': '{"any": ["ran a red light", "ran the red light", "totaled", "police report"]}', 'weight': 1.0},
+                ],
                 'actions': [
                     {'title': 'Request police report', 'description': 'Obtain incident report number and documents', 'default_status': 'pending', 'default_priority': 'high', 'due_in_days': 2},
                     {'title': 'Contact insurance companies', 'description': 'Notify carrier and obtain claim number', 'default_status': 'pending', 'default_priority': 'medium', 'due_in_days': 3},
@@ -1667,6 +1688,10 @@ def api_admin_seed_intents():
                 'key': 'employment_dispute',
                 'name': 'Employment Law - Wrongful Termination',
                 'department': 'Employment',
+                'rules': [
+                    {'pattern': '{"any": ["wrongful termination", "fired", "terminated", "laid off"], "none": ["contract terminated"]}', 'weight': 2.0},
+                    {'pattern': '{"any": ["discrimination", "retaliation", "harassment", "eeoc"]}', 'weight': 1.0},
+                ],
                 'actions': [
                     {'title': 'Collect employment records', 'description': 'Offer letters, paystubs, reviews', 'default_status': 'pending', 'default_priority': 'medium', 'due_in_days': 5},
                     {'title': 'Evaluate EEOC filing', 'description': 'Assess deadlines and grounds', 'default_status': 'pending', 'default_priority': 'high', 'due_in_days': 7},
@@ -1680,10 +1705,16 @@ def api_admin_seed_intents():
         for s in seeds:
             existing = Intent.query.filter_by(key=s['key']).first()
             if existing:
+                # Backfill matching rules for intents seeded before rules existed
+                if not existing.rules:
+                    for r in s.get('rules', []):
+                        db.session.add(IntentRule(intent_id=existing.id, pattern=r['pattern'], weight=r.get('weight', 1.0)))
                 continue
             i = Intent(key=s['key'], name=s['name'], department=s.get('department'), active=True)
             db.session.add(i)
             db.session.flush()
+            for r in s.get('rules', []):
+                db.session.add(IntentRule(intent_id=i.id, pattern=r['pattern'], weight=r.get('weight', 1.0)))
             for a in s.get('actions', []):
                 at = ActionTemplate(
                     intent_id=i.id,
@@ -1710,6 +1741,117 @@ def api_admin_seed_intents():
         app.logger.error(f"Error in api_admin_seed_intents: {str(e)}")
         return jsonify({'error': 'failed'}), 500
 
+@app.route('/api/admin/analysis_cache', methods=['GET'])
+@requires_auth
+def api_admin_analysis_cache():
+    try:
+        stats = analysis_cache.snapshot()
+        stats['db_entries'] = AnalysisCacheEntry.query.count()
+        return jsonify(stats)
+    except Exception as e:
+        app.logger.error(f"Error in api_admin_analysis_cache: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
+@app.route('/api/admin/analysis_cache/invalidate', methods=['POST'])
+@requires_auth
+def api_admin_analysis_cache_invalidate():
+    """Invalidate cached analyses.
+
+    Body (one of): {"text": "..."} for one narrative, {"provider": "aai"|"rules"},
+    {"expired": true} to purge expired rows, or {"all": true}.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        removed = 0
+        if data.get('text'):
+            text = str(data['text'])
+            for key in (cache_key(text, 'aai', AAI_MODEL, AAI_PROMPT_VERSION),
+                        cache_key(text, 'rules', None, _rules_analyzer_version())):
+                removed += analysis_cache.invalidate(key=key)
+        elif data.get('provider'):
+            removed = analysis_cache.invalidate(provider=str(data['provider']))
+        elif data.get('expired'):
+            removed = analysis_cache.purge_expired()
+        elif data.get('all'):
+            removed = analysis_cache.invalidate()
+        else:
+            return jsonify({'error': 'text, provider, expired or all required'}), 400
+        db.session.commit()
+        return jsonify({'ok': True, 'removed': removed})
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error in api_admin_analysis_cache_invalidate: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
+@app.route('/api/admin/response_cache', methods=['GET'])
+@requires_auth
+def api_admin_response_cache():
+    try:
+        return jsonify(response_cache.snapshot())
+    except Exception as e:
+        app.logger.error(f"Error in api_admin_response_cache: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
+@app.route('/api/admin/response_cache/invalidate', methods=['POST'])
+@requires_auth
+def api_admin_response_cache_invalidate():
+    """Body: {"tables": ["client", ...]} to expire views reading those tables, or {} for everything."""
+    try:
+        data = request.get_json(silent=True) or {}
+        tables = data.get('tables')
+        response_cache.invalidate([str(t) for t in tables] if tables else None)
+        return jsonify({'ok': True})
+    except Exception as e:
+        app.logger.error(f"Error in api_admin_response_cache_invalidate: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
+@app.route('/api/admin/dashboard_stats/reconcile', methods=['POST'])
+@requires_auth
+def api_admin_dashboard_stats_reconcile():
+    try:
+        drift = dashboard_stats.reconcile()
+        return jsonify({'ok': True, 'drift': drift, 'stats': dashboard_stats.read()})
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error in api_admin_dashboard_stats_reconcile: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
+@app.route('/api/search', methods=['GET'])
+@requires_auth
+def api_search():
+    """Ranked full-text search. Query args: q, types (comma list of case,client,note,transcript,message,document), limit, offset."""
+    try:
+        if not search_index.available:
+            return jsonify({'error': 'search index unavailable'}), 503
+        q = (request.args.get('q') or '').strip()
+        if not q:
+            return jsonify({'error': 'q is required'}), 400
+        types = [t.strip() for t in (request.args.get('types') or '').split(',') if t.strip()]
+        unknown = [t for t in types if t not in SEARCH_KINDS]
+        if unknown:
+            return jsonify({'error': f"unknown types: {', '.join(unknown)}"}), 400
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        offset = max(0, request.args.get('offset', 0, type=int))
+        items = search_index.search(q, kinds=types or None, limit=limit, offset=offset)
+        return jsonify({'query': q, 'items': items, 'limit': limit, 'offset': offset})
+    except Exception as e:
+        app.logger.error(f"Error in api_search: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
+@app.route('/api/admin/search/rebuild', methods=['POST'])
+@requires_auth
+def api_admin_search_rebuild():
+    try:
+        if not search_index.available:
+            return jsonify({'error': 'search index unavailable'}), 503
+        indexed = search_index.rebuild()
+        db.session.commit()
+        return jsonify({'ok': True, 'indexed': indexed})
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error in api_admin_search_rebuild: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
 @app.route('/api/cases/<int:case_id>/notes', methods=['POST'])
 @requires_auth
 def api_case_add_note(case_id):
@@ -1876,25 +2018,19 @@ def api_portal_case_checklist_complete(case_id: int, action_id: int):
 @app.route('/api/portal/transcribe', methods=['POST'])
 @portal_login_required
 def api_portal_transcribe_start():
-    if 'audio_file' not in request.files:
-        return jsonify({'error': 'No file part'}), 400
-    file = request.files['audio_file']
-    if not file or file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
-    if not _is_allowed_audio(file.filename, getattr(file, 'mimetype', '')):
-        return jsonify({'error': 'Unsupported audio type'}), 415
-    filename = secure_filename(file.filename or f"recording_{datetime.utcnow().timestamp()}.webm")
-    temp_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(temp_path)
+    upload, error = _open_audio_upload()
+    if error:
+        return error
     try:
-        service = STTService()
-        transcript_id = service.start_transcription(temp_path)
+        transcript_id, sizes = _start_transcription(upload)
         # Persist Transcript row (link to client)
         t = Transcript(
             provider='assemblyai',
             external_id=transcript_id,
             status='processing',
-            client_id=_get_portal_client_id()
+            client_id=_get_portal_client_id(),
+            next_poll_at=_first_transcript_poll_at(),
+            **sizes
         )
         db.session.add(t)
         db.session.commit()
@@ -1902,41 +2038,13 @@ def api_portal_transcribe_start():
     except Exception as e:
         app.logger.error(f"api_portal_transcribe_start error: {str(e)}")
         return jsonify({'error': 'Failed to start transcription'}), 500
-    finally:
-        try:
-            os.remove(temp_path)
-        except Exception:
-            pass
 
 @app.route('/api/portal/transcripts/<string:external_id>', methods=['GET'])
 @portal_login_required
 def api_portal_transcript_status(external_id: str):
-    t = Transcript.query.filter_by(external_id=external_id).first()
-    if not t:
-        t = Transcript(provider='assemblyai', external_id=external_id, status='processing', client_id=_get_portal_client_id())
-        db.session.add(t)
-        db.session.commit()
-    if t.status != 'completed':
-        try:
-            service = STTService()
-            data = service.get_transcription_status(external_id)
-            new_status = data.get('status') or t.status
-            t.status = new_status
-            if new_status == 'completed' and data.get('text'):
-                t.text = data.get('text')
-            if new_status == 'error':
-                t.text = None
-            db.session.commit()
-        except Exception as e:
-            app.logger.error(f"portal get transcription status error: {str(e)}")
-            return jsonify({'error': str(e)}), 500
-    payload = {
-        'transcript_id': external_id,
-        'status': t.status,
-        'text': getattr(t, 'text', None),
-        'error': getattr(t, 'error', None),
-    }
-    return jsonify(payload)
+    # Served from the DB; the webhook/poller bring rows up to date
+    t = transcript_store.track(db.session, external_id, client_id=_get_portal_client_id())
+    return jsonify(transcript_store.status_payload(t))
 
 @app.route('/api/intake/auto', methods=['POST'])
 @requires_auth
@@ -1949,86 +2057,20 @@ def api_staff_auto_intake():
             "title": "...",  # optional
             "client": {"first_name", "last_name", "email", "phone", "address"}
         }
+
+    Accepts ?async=1 / Prefer: respond-async and an Idempotency-Key header.
     """
-    data = request.get_json() or {}
+    data = request.get_json(silent=True) or {}
     text = (data.get('text') or '').strip()
     if not text:
         return jsonify({'error': 'No text provided'}), 400
 
     client_payload = data.get('client') or {}
-    first_name = (client_payload.get('first_name') or '').strip()
-    last_name = (client_payload.get('last_name') or '').strip()
-    email = (client_payload.get('email') or '').strip().lower() or None
-    phone = (client_payload.get('phone') or None)
-    address = (client_payload.get('address') or None)
-    if not first_name or not last_name:
+    if not (client_payload.get('first_name') or '').strip() or not (client_payload.get('last_name') or '').strip():
         return jsonify({'error': 'client.first_name and client.last_name required'}), 400
 
     try:
-        # Ensure client exists (match by email when available)
-        c = None
-        if email:
-            c = Client.query.filter(db.func.lower(Client.email) == email).first()
-        if not c:
-            c = Client(first_name=first_name, last_name=last_name, email=email, phone=phone, address=address)
-            db.session.add(c)
-            db.session.flush()
-
-        # Run analyzer (AssemblyAI or scenario-based fallback via _analyze_text)
-        analysis = _analyze_text(text)
-
-        # Create case
-        new_case = Case(
-            title=(data.get('title') or 'Client Intake'),
-            description=text,
-            case_type=analysis.get('category'),
-            status='open',
-            priority=(analysis.get('priority') or analysis.get('urgency') or 'Medium').lower(),
-            category=analysis.get('category'),
-            client_id=c.id,
-            created_by_id=_current_user_id(),
-        )
-        db.session.add(new_case)
-        db.session.flush()
-
-        # Apply taxonomy-aware classification if case_type_key is present
-        try:
-            classification = {
-                "primary_category": analysis.get("category"),
-                "case_type_key": analysis.get("case_type_key"),
-                "urgency": analysis.get("urgency"),
-                "confidence": analysis.get("confidence"),
-            }
-            apply_ai_classification_to_case(new_case, {"classification": classification})
-        except Exception:
-            pass
-
-        # Persist AI insight
-        insight = AIInsight(
-            case_id=new_case.id,
-            insight_text=f"{analysis.get('category')} | Urgency: {analysis.get('urgency')} | Dept: {analysis.get('department')}",
-            category='scenario_analysis',
-            confidence=analysis.get('confidence'),
-        )
-        db.session.add(insight)
-
-        # Create suggested actions & link to case
-        for text_action in (analysis.get('suggested_actions') or [])[:10]:
-            action = Action(
-                title=text_action,
-                description='Auto-generated from scenario analysis',
-                action_type='automation',
-                status='pending',
-                priority=(analysis.get('priority') or 'Medium').lower(),
-                due_date=datetime.utcnow() + timedelta(days=1),
-                created_by_id=_current_user_id(),
-            )
-            db.session.add(action)
-            db.session.flush()
-            db.session.add(CaseAction(case_id=new_case.id, action_id=action.id, status='pending'))
-
-        db.session.commit()
-        return jsonify({'status': 'success', 'case_id': new_case.id, 'analysis': analysis}), 201
+        return _intake_dispatch(dict(data, text=text), 'light')
     except Exception as e:
         db.session.rollback()
         app.logger.error(f"Error in api_staff_auto_intake: {str(e)}")
@@ -2048,51 +2090,8 @@ def api_portal_auto_intake():
         abort(403)
     try:
         analysis = _analyze_text(text)
-        new_case = Case(
-            title=(data.get('title') or 'Client Intake'),
-            description=text,
-            case_type=analysis.get('category'),
-            status='open',
-            priority=(analysis.get('priority') or 'Medium').lower(),
-            category=analysis.get('category'),
-            client_id=c.id,
-            created_by_id=_current_user_id(),
-        )
-        db.session.add(new_case)
-        db.session.flush()
-
-        # Apply taxonomy-aware classification if case_type_key is present
-        try:
-            classification = {
-                "primary_category": analysis.get("category"),
-                "case_type_key": analysis.get("case_type_key"),
-                "urgency": analysis.get("urgency"),
-                "confidence": analysis.get("confidence"),
-            }
-            apply_ai_classification_to_case(new_case, {"classification": classification})
-        except Exception:
-            pass
-
-        insight = AIInsight(
-            case_id=new_case.id,
-            insight_text=f"{analysis.get('category')} | Urgency: {analysis.get('urgency')} | Dept: {analysis.get('department')}",
-            category='scenario_analysis',
-            confidence=None,
-        )
-        db.session.add(insight)
-        for text_action in (analysis.get('suggested_actions') or [])[:10]:
-            action = Action(
-                title=text_action,
-                description='Auto-generated from scenario analysis',
-                action_type='automation',
-                status='pending',
-                priority=(analysis.get('priority') or 'Medium').lower(),
-                due_date=datetime.utcnow() + timedelta(days=1),
-                created_by_id=_current_user_id()
-            )
-            db.session.add(action)
-            db.session.flush()
-            db.session.add(CaseAction(case_id=new_case.id, action_id=action.id, status='pending'))
+        new_case, plan = _intake_create_case(text, data.get('title') or 'Client Intake', c, analysis, _current_user_id())
+        materialize(plan)
         db.session.commit()
         return jsonify({'status': 'success', 'case_id': new_case.id, 'analysis': analysis}), 201
     except Exception as e:
@@ -2165,74 +2164,161 @@ def api_case_status_audit(case_id):
         app.logger.error(f"Error in api_case_status_audit: {str(e)}")
         return jsonify({'error': 'failed'}), 500
 
+@app.route('/api/cases/<int:case_id>/export', methods=['GET'])
+@requires_auth
+def api_case_export(case_id):
+    """ZIP of the case's documents and records, streamed as it is built."""
+    c = db.session.get(Case, case_id)
+    if c is None:
+        abort(404)
+
+    def generate():
+        started = time.perf_counter()
+        sent = 0
+        try:
+            for chunk in case_export.iter_zip(case_export.case_entries(db.session, c)):
+                sent += len(chunk)
+                yield chunk
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated archive
+            app.logger.error(f"Error in api_case_export: {str(e)}")
+            raise
+        app.logger.info(f"Case {case_id} export: {sent} bytes in {time.perf_counter() - started:.2f}s")
+
+    return Response(stream_with_context(generate()), mimetype='application/zip', headers={
+        'Content-Disposition': f'attachment; filename="case-{case_id}-export.zip"',
+        'Cache-Control': 'no-store',
+        'X-Accel-Buffering': 'no',
+    })
+
+# List API fields -> columns each one reads, for ?fields= projection
+CASE_LIST_FIELDS = {
+    'id': (Case.id,), 'title': (Case.title,), 'status': (Case.status,), 'priority': (Case.priority,),
+    'created_at': (Case.created_at,), 'client': (),
+}
+CLIENT_LIST_FIELDS = {
+    'id': (Client.id,), 'first_name': (Client.first_name,), 'last_name': (Client.last_name,),
+    'email': (Client.email,), 'phone': (Client.phone,), 'created_at': (Client.created_at,),
+}
+ACTION_LIST_FIELDS = {
+    'id': (Action.id,), 'title': (Action.title,), 'status': (Action.status,), 'priority': (Action.priority,),
+    'due_date': (Action.due_date,), 'assigned_to_id': (Action.assigned_to_id,), 'created_at': (Action.created_at,),
+    'case_id': (), 'case_title': (),
+}
+EMAIL_QUEUE_LIST_FIELDS = {
+    'id': (EmailQueue.id,), 'case_id': (EmailQueue.case_id,), 'draft_id': (EmailQueue.draft_id,),
+    'to': (EmailQueue.to,), 'subject': (EmailQueue.subject,), 'send_after': (EmailQueue.send_after,),
+    'status': (EmailQueue.status,), 'attempts': (EmailQueue.attempts,), 'last_error': (EmailQueue.last_error,),
+    'created_at': (EmailQueue.created_at,), 'updated_at': (EmailQueue.updated_at,), 'case_title': (),
+}
+DOCUMENT_LIST_FIELDS = {
+    'id': (Document.id,), 'name': (Document.name,), 'file_type': (Document.file_type,),
+    'file_size': (Document.file_size,), 'created_at': (Document.created_at,), 'case': (),
+}
+CALENDAR_LIST_FIELDS = {
+    'id': (CalendarEvent.id,), 'title': (CalendarEvent.title,), 'description': (CalendarEvent.description,),
+    'start_at': (CalendarEvent.start_at,), 'end_at': (CalendarEvent.end_at,), 'all_day': (CalendarEvent.all_day,),
+    'location': (CalendarEvent.location,), 'case': (), 'client': (),
+}
+
+def _case_list_item(c, pager):
+    return {
+        'id': c.id,
+        'title': c.title if pager.wants('title') else None,
+        'status': c.status if pager.wants('status') else None,
+        'priority': c.priority if pager.wants('priority') else None,
+        'created_at': c.created_at.isoformat() if pager.wants('created_at') and getattr(c, 'created_at', None) else None,
+        'client': {
+            'id': c.client.id if getattr(c, 'client', None) else None,
+            'first_name': getattr(c.client, 'first_name', None) if getattr(c, 'client', None) else None,
+            'last_name': getattr(c.client, 'last_name', None) if getattr(c, 'client', None) else None,
+        } if pager.wants('client') else None,
+    }
+
 @app.route('/api/cases', methods=['GET'])
 @requires_auth
 def api_cases_list():
     try:
-        pagination = get_pagination(request.args.get('page'), request.args.get('per_page', 10))
-        query = Case.query.options(db.joinedload(Case.client))
+        query = Case.query
         query = apply_case_filters(query, request.args)
-        sort_column, sort_order = get_sort_params(request.args)
-        if sort_column is not None:
-            query = query.order_by(db.desc(sort_column) if sort_order == 'desc' else sort_column)
-        else:
-            query = query.order_by(Case.created_at.desc())
-        paginated = query.paginate(page=pagination['page'], per_page=pagination['per_page'], error_out=False)
-        items = [
-            {
-                'id': c.id,
-                'title': c.title,
-                'status': c.status,
-                'priority': c.priority,
-                'created_at': c.created_at.isoformat() if getattr(c, 'created_at', None) else None,
-                'client': {
-                    'id': c.client.id if getattr(c, 'client', None) else None,
-                    'first_name': getattr(c.client, 'first_name', None) if getattr(c, 'client', None) else None,
-                    'last_name': getattr(c.client, 'last_name', None) if getattr(c, 'client', None) else None,
-                }
+        sort_field, sort_order = get_sort_params(request.args)
+        if not page_requested(request.args, ('limit', 'cursor')) or request.args.get('page') \
+                or sort_field != 'created_at' or sort_order != 'desc':
+            # Offset mode (the original response): page=/per_page=/sort=, counted unless total=estimate
+            pager = Paginator(request.args, allowed_fields=CASE_LIST_FIELDS)
+            sort_column = {'title': Case.title, 'status': Case.status, 'priority': Case.priority,
+                           'updated_at': Case.updated_at, 'client_name': Client.last_name}.get(sort_field, Case.created_at)
+            if sort_column is Client.last_name:
+                query = query.outerjoin(Client, Case.client_id == Client.id)
+            query = pager.project(query, CASE_LIST_FIELDS, always=(Case.id, Case.client_id))
+            if pager.wants('client'):
+                query = query.options(db.joinedload(Case.client))
+            query = query.order_by(db.desc(sort_column) if sort_order == 'desc' else sort_column, Case.id)
+            pagination = get_pagination(request.args.get('page'), request.args.get('per_page', 10))
+            counted = pager.total != 'estimate'
+            paginated = query.paginate(page=pagination['page'], per_page=pagination['per_page'], error_out=False,
+                                       count=counted)
+            out = {
+                'items': [pager.select(_case_list_item(c, pager)) for c in paginated.items],
+                'page': paginated.page,
+                'per_page': paginated.per_page,
+                'has_more': paginated.has_next if counted else len(paginated.items) == paginated.per_page,
             }
-            for c in paginated.items
-        ]
-        return jsonify({
-            'items': items,
-            'page': paginated.page,
-            'per_page': paginated.per_page,
-            'total': paginated.total,
-            'pages': paginated.pages
-        })
+            if counted:
+                out.update(total=paginated.total, pages=paginated.pages)
+            else:
+                out.update(estimate_count(db.session, query))
+            return jsonify(out)
+        pager = Paginator(request.args, allowed_fields=CASE_LIST_FIELDS)
+        query = pager.project(query, CASE_LIST_FIELDS, always=(Case.id, Case.created_at, Case.client_id))
+        if pager.wants('client'):
+            query = query.options(db.joinedload(Case.client))
+        return jsonify(pager.page(db.session, query, Case.created_at, Case.id, lambda c: _case_list_item(c, pager)))
+    except BadPageRequest as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error in api_cases_list: {str(e)}")
         return jsonify({'error': 'failed'}), 500
 
 @app.route('/api/clients', methods=['GET'])
 @requires_auth
+@response_cache.cached('client')
 def api_clients_list():
     try:
+        pager = Paginator(request.args, allowed_fields=CLIENT_LIST_FIELDS)
         query = Client.query
         # Optional search by name/email/phone
         search = (request.args.get('search') or '').strip()
         if search:
-            like = f"%{search}%"
-            query = query.filter(
-                db.or_(
-                    Client.first_name.ilike(like),
-                    Client.last_name.ilike(like),
-                    Client.email.ilike(like),
-                    Client.phone.ilike(like),
+            matches = search_index.ids('client', search)
+            if matches is not None:
+                query = query.filter(Client.id.in_(matches))
+            else:
+                like = f"%{search}%"
+                query = query.filter(
+                    db.or_(
+                        Client.first_name.ilike(like),
+                        Client.last_name.ilike(like),
+                        Client.email.ilike(like),
+                        Client.phone.ilike(like),
+                    )
                 )
-            )
-        clients = query.order_by(Client.last_name, Client.first_name).all()
-        items = [
-            {
+        query = pager.project(query, CLIENT_LIST_FIELDS, always=(Client.id, Client.created_at))
+        def serialize(cl):
+            return {
                 'id': cl.id,
-                'first_name': getattr(cl, 'first_name', None),
-                'last_name': getattr(cl, 'last_name', None),
-                'email': getattr(cl, 'email', None),
-                'phone': getattr(cl, 'phone', None),
+                'first_name': getattr(cl, 'first_name', None) if pager.wants('first_name') else None,
+                'last_name': getattr(cl, 'last_name', None) if pager.wants('last_name') else None,
+                'email': getattr(cl, 'email', None) if pager.wants('email') else None,
+                'phone': getattr(cl, 'phone', None) if pager.wants('phone') else None,
+                'created_at': cl.created_at.isoformat() if getattr(cl, 'created_at', None) else None,
             }
-            for cl in clients
-        ]
-        return jsonify(items)
+        if not page_requested(request.args):
+            # Unpaged callers get the original array, by name
+            return jsonify([serialize(cl) for cl in query.order_by(Client.last_name, Client.first_name).all()])
+        return jsonify(pager.page(db.session, query, Client.created_at, Client.id, serialize))
+    except BadPageRequest as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error in api_clients_list: {str(e)}")
         return jsonify({'error': 'failed'}), 500
@@ -2311,40 +2397,41 @@ def api_client_update(client_id):
 @requires_auth
 def api_actions_list():
     try:
+        pager = Paginator(request.args, allowed_fields=ACTION_LIST_FIELDS)
         client_id = request.args.get('client_id', type=int)
-        q = db.session.query(Action).options(
-            db.joinedload(Action.case_actions).joinedload(CaseAction.case),
-            db.joinedload(Action.assigned_to)
-        ).order_by(Action.created_at.desc())
+        q = db.session.query(Action)
         if client_id:
-            q = q.join(CaseAction, CaseAction.action_id == Action.id).join(Case, Case.id == CaseAction.case_id).filter(Case.client_id == client_id)
-        actions = q.all()
-        def case_title_for(a: Action):
-            if getattr(a, 'case_actions', None):
-                for link in a.case_actions:
-                    if getattr(link, 'case', None):
-                        return getattr(link.case, 'title', None)
-            return None
-        def case_id_for(a: Action):
-            if getattr(a, 'case_actions', None):
-                for link in a.case_actions:
-                    if getattr(link, 'case', None):
-                        return getattr(link.case, 'id', None)
+            q = q.filter(Action.id.in_(
+                db.session.query(CaseAction.action_id)
+                .join(Case, Case.id == CaseAction.case_id)
+                .filter(Case.client_id == client_id)
+            ))
+        q = pager.project(q, ACTION_LIST_FIELDS, always=(Action.id, Action.created_at))
+        if pager.wants('case_id', 'case_title'):
+            q = q.options(db.selectinload(Action.case_actions).joinedload(CaseAction.case))
+        def first_case(a: Action):
+            for link in getattr(a, 'case_actions', None) or []:
+                if getattr(link, 'case', None):
+                    return link.case
             return None
-        items = [
-            {
+        def serialize(a: Action):
+            case = first_case(a) if pager.wants('case_id', 'case_title') else None
+            return {
                 'id': a.id,
-                'title': a.title,
-                'status': a.status,
-                'priority': getattr(a, 'priority', None),
-                'due_date': a.due_date.isoformat() if getattr(a, 'due_date', None) else None,
-                'assigned_to_id': getattr(a, 'assigned_to_id', None),
-                'case_id': case_id_for(a),
-                'case_title': case_title_for(a),
+                'title': a.title if pager.wants('title') else None,
+                'status': a.status if pager.wants('status') else None,
+                'priority': getattr(a, 'priority', None) if pager.wants('priority') else None,
+                'due_date': a.due_date.isoformat() if pager.wants('due_date') and getattr(a, 'due_date', None) else None,
+                'assigned_to_id': getattr(a, 'assigned_to_id', None) if pager.wants('assigned_to_id') else None,
+                'created_at': a.created_at.isoformat() if getattr(a, 'created_at', None) else None,
+                'case_id': case.id if case else None,
+                'case_title': getattr(case, 'title', None) if case else None,
             }
-            for a in actions
-        ]
-        return jsonify(items)
+        if not page_requested(request.args):
+            return jsonify([serialize(a) for a in q.order_by(Action.created_at.desc()).all()])
+        return jsonify(pager.page(db.session, q, Action.created_at, Action.id, serialize))
+    except BadPageRequest as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error in api_actions_list: {str(e)}")
         return jsonify({'error': 'failed'}), 500
@@ -2449,16 +2536,29 @@ def api_email_draft_delete(draft_id):
 @requires_auth
 def api_email_queue_list():
     try:
+        pager = Paginator(request.args, allowed_fields=EMAIL_QUEUE_LIST_FIELDS)
         status = (request.args.get('status') or '').strip()
-        q = db.session.query(EmailQueue).options(db.joinedload(EmailQueue.case)).order_by(EmailQueue.created_at.desc())
+        q = db.session.query(EmailQueue)
         if status in ('pending', 'sent', 'failed'):
             q = q.filter(EmailQueue.status == status)
-        items = []
-        for e in q.all():
-            d = e.to_dict()
-            d['case_title'] = getattr(e.case, 'title', None)
-            items.append(d)
-        return jsonify(items)
+        q = pager.project(q, EMAIL_QUEUE_LIST_FIELDS, always=(EmailQueue.id, EmailQueue.created_at, EmailQueue.case_id))
+        if pager.wants('case_title'):
+            q = q.options(db.joinedload(EmailQueue.case))
+        def serialize(e):
+            d = e.to_dict() if pager.fields is None else {f: None for f in pager.fields}
+            if pager.fields is not None:
+                for f in pager.fields:
+                    if f in EMAIL_QUEUE_LIST_FIELDS and f != 'case_title':
+                        v = getattr(e, f)
+                        d[f] = v.isoformat() if isinstance(v, datetime) else v
+            if pager.wants('case_title'):
+                d['case_title'] = getattr(e.case, 'title', None)
+            return d
+        if not page_requested(request.args):
+            return jsonify([serialize(e) for e in q.order_by(EmailQueue.created_at.desc()).all()])
+        return jsonify(pager.page(db.session, q, EmailQueue.created_at, EmailQueue.id, serialize))
+    except BadPageRequest as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error in api_email_queue_list: {str(e)}")
         return jsonify({'error': 'failed'}), 500
@@ -2474,6 +2574,8 @@ def api_email_queue_retry(item_id):
         item.attempts = 0
         item.last_error = None
         item.send_after = datetime.utcnow()
+        item.locked_by = None
+        item.locked_until = None
         item.updated_at = datetime.utcnow()
         db.session.commit()
         return jsonify({'ok': True})
@@ -2637,27 +2739,34 @@ def api_billing_generate_invoices():
 # Documents list (JSON)
 @app.route('/api/documents', methods=['GET'])
 @requires_auth
+@response_cache.cached('document', 'case')
 def api_documents_list():
     try:
-        documents = db.session.query(Document).options(
-            db.joinedload(Document.case),
-            db.joinedload(Document.uploaded_by)
-        ).order_by(Document.created_at.desc()).all()
-        items = [
-            {
+        pager = Paginator(request.args, allowed_fields=DOCUMENT_LIST_FIELDS)
+        q = db.session.query(Document)
+        case_id = request.args.get('case_id', type=int)
+        if case_id:
+            q = q.filter(Document.case_id == case_id)
+        q = pager.project(q, DOCUMENT_LIST_FIELDS, always=(Document.id, Document.created_at, Document.case_id))
+        if pager.wants('case'):
+            q = q.options(db.joinedload(Document.case))
+        def serialize(d):
+            return {
                 'id': d.id,
-                'name': d.name,
-                'file_type': getattr(d, 'file_type', None),
-                'file_size': getattr(d, 'file_size', None),
+                'name': d.name if pager.wants('name') else None,
+                'file_type': getattr(d, 'file_type', None) if pager.wants('file_type') else None,
+                'file_size': getattr(d, 'file_size', None) if pager.wants('file_size') else None,
                 'created_at': d.created_at.isoformat() if getattr(d, 'created_at', None) else None,
                 'case': {
                     'id': d.case.id if getattr(d, 'case', None) else None,
                     'title': getattr(d.case, 'title', None) if getattr(d, 'case', None) else None,
-                }
+                } if pager.wants('case') else None,
             }
-            for d in documents
-        ]
-        return jsonify(items)
+        if not page_requested(request.args):
+            return jsonify([serialize(d) for d in q.order_by(Document.created_at.desc()).all()])
+        return jsonify(pager.page(db.session, q, Document.created_at, Document.id, serialize))
+    except BadPageRequest as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error in api_documents_list: {str(e)}")
         return jsonify({'error': 'failed'}), 500
@@ -2677,21 +2786,21 @@ def api_documents_upload():
         custom_name = request.form.get('name')
 
         # Save file
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
         filename = secure_filename(custom_name or (file.filename or f"upload_{datetime.utcnow().timestamp()}"))
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        blob = document_store.store_stream(file.stream)
 
         # Persist document
         doc = Document(
             name=filename,
-            file_path=file_path,
+            file_path=blob.path,
             file_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
-            file_size=os.path.getsize(file_path),
+            file_size=blob.size,
+            sha256=blob.sha256,
             uploaded_by_id=_current_user_id(),
             case_id=case_id,
             created_at=datetime.utcnow()
         )
+        _queue_extraction(doc)
         db.session.add(doc)
         db.session.commit()
         return jsonify({'id': doc.id, 'name': doc.name}), 201
@@ -2703,6 +2812,7 @@ def api_documents_upload():
 # Intents and templates (list/apply)
 @app.route('/api/intents', methods=['GET'])
 @requires_auth
+@response_cache.cached('intent')
 def api_intents_list():
     try:
         intents = Intent.query.filter_by(active=True).order_by(Intent.name.asc()).all()
@@ -2733,12 +2843,11 @@ def api_case_apply_intent(case_id):
         intent = db.session.get(Intent, int(intent_id))
         if not intent or not intent.active:
             return jsonify({'error': 'intent not found'}), 404
-        created_actions = []
-        created_emails = []
         now = datetime.utcnow()
+        plan = MaterializePlan(c.id)
         # Create actions from templates
         for t in intent.action_templates:
-            a = Action(
+            plan.add_action(
                 title=t.title,
                 description=t.description,
                 status=t.default_status or 'pending',
@@ -2747,15 +2856,9 @@ def api_case_apply_intent(case_id):
                 assigned_to_id=None,
                 created_by_id=_current_user_id(),
             )
-            db.session.add(a)
-            db.session.flush()
-            link = CaseAction(case_id=c.id, action_id=a.id, assigned_to_id=None, status=a.status)
-            db.session.add(link)
-            created_actions.append(a.id)
         # Create email drafts from templates
         for et in intent.email_templates:
-            d = EmailDraft(
-                case_id=c.id,
+            plan.add_draft(
                 to=None,
                 subject=et.subject,
                 body=et.body,
@@ -2764,9 +2867,8 @@ def api_case_apply_intent(case_id):
                 created_at=now,
                 updated_at=now,
             )
-            db.session.add(d)
-            db.session.flush()
-            created_emails.append(d.id)
+        created = materialize(plan)
+        created_actions, created_emails = created['actions'], created['drafts']
         db.session.commit()
         return jsonify({'ok': True, 'actions': created_actions, 'emails': created_emails})
     except Exception as e:
@@ -2777,33 +2879,46 @@ def api_case_apply_intent(case_id):
 # Calendar list (JSON)
 @app.route('/api/calendar', methods=['GET'])
 @requires_auth
+@response_cache.cached('calendar_event', 'case', 'client')
 def api_calendar_list():
     try:
-        events = CalendarEvent.query.options(
-            db.joinedload(CalendarEvent.case),
-            db.joinedload(CalendarEvent.client)
-        ).order_by(CalendarEvent.start_at.asc()).all()
-        items = [
-            {
+        pager = Paginator(request.args, allowed_fields=CALENDAR_LIST_FIELDS)
+        q = CalendarEvent.query
+        start = request.args.get('from')
+        if start:
+            try:
+                q = q.filter(CalendarEvent.start_at >= datetime.fromisoformat(start))
+            except ValueError:
+                return jsonify({'error': 'from must be an ISO datetime'}), 400
+        q = pager.project(q, CALENDAR_LIST_FIELDS,
+                          always=(CalendarEvent.id, CalendarEvent.start_at, CalendarEvent.case_id, CalendarEvent.client_id))
+        if pager.wants('case'):
+            q = q.options(db.joinedload(CalendarEvent.case))
+        if pager.wants('client'):
+            q = q.options(db.joinedload(CalendarEvent.client))
+        def serialize(ev):
+            return {
                 'id': ev.id,
-                'title': ev.title,
-                'description': getattr(ev, 'description', None),
+                'title': ev.title if pager.wants('title') else None,
+                'description': getattr(ev, 'description', None) if pager.wants('description') else None,
                 'start_at': ev.start_at.isoformat() if getattr(ev, 'start_at', None) else None,
-                'end_at': ev.end_at.isoformat() if getattr(ev, 'end_at', None) else None,
-                'all_day': getattr(ev, 'all_day', False),
-                'location': getattr(ev, 'location', None),
+                'end_at': ev.end_at.isoformat() if pager.wants('end_at') and getattr(ev, 'end_at', None) else None,
+                'all_day': getattr(ev, 'all_day', False) if pager.wants('all_day') else None,
+                'location': getattr(ev, 'location', None) if pager.wants('location') else None,
                 'case': {
                     'id': ev.case.id if getattr(ev, 'case', None) else None,
                     'title': getattr(ev.case, 'title', None) if getattr(ev, 'case', None) else None,
-                },
+                } if pager.wants('case') else None,
                 'client': {
                     'id': ev.client.id if getattr(ev, 'client', None) else None,
                     'name': (f"{getattr(ev.client, 'first_name', '')} {getattr(ev.client, 'last_name', '')}").strip() if getattr(ev, 'client', None) else None,
-                }
+                } if pager.wants('client') else None,
             }
-            for ev in events
-        ]
-        return jsonify(items)
+        if not page_requested(request.args):
+            return jsonify([serialize(ev) for ev in q.order_by(CalendarEvent.start_at.asc()).all()])
+        return jsonify(pager.page(db.session, q, CalendarEvent.start_at, CalendarEvent.id, serialize, descending=False))
+    except BadPageRequest as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error in api_calendar_list: {str(e)}")
         return jsonify({'error': 'failed'}), 500
@@ -3324,80 +3439,45 @@ def allowed_file(filename):
 @login_required
 def transcribe():
     if request.method == 'POST':
-        if 'audio_file' not in request.files:
-            return jsonify({'error': 'No file part'}), 400
-        file = request.files['audio_file']
-        if file.filename == '':
-            return jsonify({'error': 'No selected file'}), 400
-        if file:
-            # Basic server-side validation: type and size
-            if not _is_allowed_audio(file.filename, getattr(file, 'mimetype', '')):
-                return jsonify({'error': 'Unsupported audio type'}), 415
-            try:
-                clen = request.content_length or 0
-                if clen and clen > app.config.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024):
-                    return jsonify({'error': 'File too large'}), 413
-            except Exception:
-                pass
-            filename = secure_filename(file.filename or f"recording_{datetime.utcnow().timestamp()}.webm")
-            temp_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(temp_path)
-            try:
-                service = STTService()
-                transcript_id = service.start_transcription(temp_path)
-                # persist transcript record (processing)
-                t = Transcript(
-                    provider='assemblyai',
-                    external_id=transcript_id,
-                    status='processing',
-                    user_id=session.get('user_id')
-                )
-                db.session.add(t)
-                db.session.commit()
-                try:
-                    os.remove(temp_path)
-                except Exception:
-                    pass
-                return jsonify({'status': 'processing', 'transcript_id': transcript_id})
-            except Exception as e:
-                try:
-                    os.remove(temp_path)
-                except Exception:
-                    pass
-                app.logger.error(f"Error processing audio file: {str(e)}")
-                return jsonify({'error': str(e)}), 500
+        upload, error = _open_audio_upload()
+        if error:
+            return error
+        try:
+            transcript_id, sizes = _start_transcription(upload)
+            # persist transcript record (processing)
+            t = Transcript(
+                provider='assemblyai',
+                external_id=transcript_id,
+                status='processing',
+                user_id=session.get('user_id'),
+                next_poll_at=_first_transcript_poll_at(),
+                **sizes
+            )
+            db.session.add(t)
+            db.session.commit()
+            return jsonify({'status': 'processing', 'transcript_id': transcript_id})
+        except Exception as e:
+            app.logger.error(f"Error processing audio file: {str(e)}")
+            return jsonify({'error': str(e)}), 500
     return render_template('transcribe.html')
 
 # ---- Staff JSON APIs for transcription ----
 @app.route('/api/transcribe', methods=['POST'])
 @requires_auth
 def api_transcribe_start():
-    if 'audio_file' not in request.files:
-        return jsonify({'error': 'No file part'}), 400
-    file = request.files['audio_file']
-    if not file or file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
-    # Validate file type and size
-    if not _is_allowed_audio(file.filename, getattr(file, 'mimetype', '')):
-        return jsonify({'error': 'Unsupported audio type'}), 415
-    try:
-        clen = request.content_length or 0
-        if clen and clen > app.config.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024):
-            return jsonify({'error': 'File too large'}), 413
-    except Exception:
-        pass
-    filename = secure_filename(file.filename or f"recording_{datetime.utcnow().timestamp()}.webm")
-    temp_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(temp_path)
+    upload, error = _open_audio_upload()
+    if error:
+        return error
     try:
-        service = STTService()
-        transcript_id = service.start_transcription(temp_path)
+        transcript_id, sizes = _start_transcription(upload)
         # Persist Transcript row if not exists
         t = Transcript(
             provider='assemblyai',
             external_id=transcript_id,
             status='processing',
-            user_id=_current_user_id()
+            user_id=_current_user_id(),
+            next_poll_at=_first_transcript_poll_at(),
+            **sizes
         )
         db.session.add(t)
         db.session.commit()
@@ -3405,45 +3485,40 @@ def api_transcribe_start():
     except Exception as e:
         app.logger.error(f"api_transcribe_start error: {str(e)}")
         return jsonify({'error': 'Failed to start transcription'}), 500
-    finally:
-        try:
-            os.remove(temp_path)
-        except Exception:
-            pass
 
 @app.route('/api/transcripts/<string:external_id>', methods=['GET'])
 @requires_auth
 def api_transcript_status(external_id: str):
-    # Look up Transcript by external id
+    # Served from the DB; the webhook/poller bring rows up to date
+    t = transcript_store.track(db.session, external_id)
+    return jsonify(transcript_store.status_payload(t))
+
+@app.route('/api/webhooks/transcripts', methods=['POST'])
+def api_transcript_webhook():
+    """Provider completion callback: {"transcript_id": "...", "status": "completed"|"error"}.
+
+    The body is only a hint; the transcript's state is fetched from the provider.
+    Rejected unless STT_WEBHOOK_SECRET is configured and sent back by the caller.
+    """
+    if not STT_WEBHOOK_SECRET or not hmac.compare_digest(request.headers.get(WEBHOOK_AUTH_HEADER, ''), STT_WEBHOOK_SECRET):
+        return jsonify({'error': 'unauthorized'}), 401
+    data = request.get_json(silent=True) or {}
+    external_id = str(data.get('transcript_id') or '').strip()
+    if not external_id:
+        return jsonify({'error': 'transcript_id required'}), 400
     t = Transcript.query.filter_by(external_id=external_id).first()
-    if not t:
-        # In case row not persisted earlier, return minimal status
-        t = Transcript(provider='assemblyai', external_id=external_id, status='processing')
-        db.session.add(t)
-        db.session.commit()
-    # If not completed, try to refresh from provider
-    if t.status != 'completed':
-        try:
-            service = STTService()
-            data = service.get_transcription_status(external_id)
-            # Expect data like {'status': 'completed'|'processing'|'error', 'text': '...'}
-            new_status = data.get('status') or t.status
-            t.status = new_status
-            if new_status == 'completed' and data.get('text'):
-                t.text = data.get('text')
-            if new_status == 'error':
-                t.text = None
-            db.session.commit()
-        except Exception as e:
-            app.logger.error(f"Error fetching transcription status: {str(e)}")
-            return jsonify({'error': str(e)}), 500
-    payload = {
-        'transcript_id': external_id,
-        'status': t.status,
-        'text': getattr(t, 'text', None),
-        'error': getattr(t, 'error', None),
-    }
-    return jsonify(payload)
+    if t is None:
+        return jsonify({'error': 'unknown transcript'}), 404
+    if t.status not in transcript_store.PENDING_STATUSES:
+        return jsonify({'ok': True, 'status': t.status})
+    try:
+        transcript_store.refresh(db.session, t, _fetch_transcript_status,
+                                 TRANSCRIPT_POLL_BASE_SECONDS, TRANSCRIPT_POLL_MAX_SECONDS)
+        return jsonify({'ok': True, 'status': t.status})
+    except Exception as e:
+        # refresh() already scheduled a poll; accept so the provider stops retrying
+        app.logger.error(f"Transcript webhook fetch failed for {external_id}: {str(e)}")
+        return jsonify({'ok': True, 'status': t.status, 'deferred': True}), 202
 
 # -------- Client Portal Login/Logout -------- #
 @app.route('/portal/login', methods=['GET', 'POST'])
@@ -3491,20 +3566,19 @@ def portal_logout():
 
 # ------- Scenario Automation Helpers ------- #
 def _write_document(case_id, filename, content, uploaded_by_id):
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     safe_name = secure_filename(filename)
-    file_path = os.path.join(app.config['UPLOAD_FOLDER'], safe_name)
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    blob = document_store.store_bytes(content.encode('utf-8'))
     doc = Document(
         name=safe_name,
-        file_path=file_path,
+        file_path=blob.path,
         file_type='text/plain',
-        file_size=os.path.getsize(file_path),
+        file_size=blob.size,
+        sha256=blob.sha256,
         uploaded_by_id=uploaded_by_id,
         case_id=case_id,
         created_at=datetime.utcnow()
     )
+    _queue_extraction(doc)
     db.session.add(doc)
     return doc
 
@@ -3563,19 +3637,125 @@ def _auto_letters(category, analysis, client_name='[CLIENT]'):
         )
     return []
 
-def _analyze_text(text: str) -> dict:
-    """Analyze intake text using AssemblyAI if enabled, else rule-based. Returns normalized dict."""
-    result = None
+# ---------------- Intent rule engine (IntentRule-backed) ---------------- #
+def _intent_rules_version():
+    """Cheap stamp that changes whenever rules or intents change.
+
+    Inserts and edits bump max(updated_at); deletes change the count.
+    Runs on its own session (like _intent_rules_load) so a failed query
+    can't abort the caller's transaction or flush its pending work.
+    """
+    with Session(db.engine) as s:
+        rules = s.query(db.func.count(IntentRule.id), db.func.max(IntentRule.updated_at)).one()
+        intents = s.query(db.func.count(Intent.id), db.func.max(Intent.updated_at)).one()
+    return tuple(rules) + tuple(intents)
+
+def _intent_rules_load():
+    with Session(db.engine) as s:
+        intents = {
+            i.id: {'id': i.id, 'key': i.key, 'name': i.name, 'department': i.department, 'priority_default': i.priority_default}
+            for i in s.query(Intent).filter_by(active=True).all()
+        }
+        rules = [
+            {'intent_id': r.intent_id, 'pattern': r.pattern, 'weight': r.weight}
+            for r in s.query(IntentRule).order_by(IntentRule.id.asc()).all()
+        ]
+    return rules, intents
+
+intent_rule_engine = IntentRuleEngine(_intent_rules_version, _intent_rules_load, check_interval=INTENT_RULES_CHECK_SECONDS)
+
+@event.listens_for(Session, 'after_flush')
+def _intent_rules_changed(session, flush_context):
+    # Same-process edits reload immediately; other workers see the new stamp
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Intent, IntentRule)):
+            intent_rule_engine.mark_dirty()
+            return
+
+def _apply_intent_rules(result: dict, text: str) -> dict:
+    """Attach the best IntentRule match; fill in category when no scenario matched."""
+    try:
+        match = intent_rule_engine.best(text)
+    except Exception as e:
+        app.logger.error(f"intent rule engine failed: {str(e)}")
+        return result
+    if not match:
+        return result
+    result['intent_key'] = match['key']
+    if not result.get('category') or result.get('category') == 'other':
+        result['category'] = match['name']
+        result['department'] = match.get('department') or result.get('department')
+        result['priority'] = match.get('priority_default') or result.get('priority')
+    return result
+
+# ---------------- Analysis cache ---------------- #
+analysis_cache = AnalysisCache(db, AnalysisCacheEntry)
+
+def _log_analyzer(provider, model, started, text, succeeded=True, error=None, cache_hit=None):
+    """Record an AnalyzerLog row (committed with the caller) when LOG_ANALYZER_METRICS is on."""
+    if not LOG_ANALYZER_METRICS:
+        return
+    try:
+        latency_ms = (time.perf_counter() - started) * 1000
+        db.session.add(AnalyzerLog(
+            provider=provider,
+            model=model,
+            latency_ms=int(latency_ms),
+            latency_bucket=provider_http.bucket_label(latency_ms),
+            succeeded=succeeded,
+            error=(error or '')[:1000] or None,
+            text_chars=len(text or ''),
+            cache_hit=cache_hit,
+        ))
+    except Exception:
+        pass
+
+def _rules_analyzer_version() -> str:
+    try:
+        rules_version = intent_rule_engine.ruleset().version
+    except Exception:
+        rules_version = None
+    return f"{RULES_ANALYZER_VERSION}:{rules_version}"
+
+def _analyze_raw(text: str) -> dict:
+    """Run the configured analyzer through the analysis cache and return its raw result."""
     if USE_AAI_ANALYZER and ASSEMBLYAI_API_KEY:
+        started = time.perf_counter()
+        key = cache_key(text, 'aai', AAI_MODEL, AAI_PROMPT_VERSION)
+        cached, tier = analysis_cache.get(key)
+        if cached is not None:
+            _log_analyzer('aai', AAI_MODEL, started, text, cache_hit=tier)
+            return cached
         try:
             result = analyze_with_aai(text)
+            analysis_cache.set(key, result, 'aai', AAI_MODEL, AAI_PROMPT_VERSION)
+            _log_analyzer('aai', AAI_MODEL, started, text)
+            return result
+        except provider_http.CircuitOpen as e:
+            # Provider failing recently: straight to the rules analyzer
+            _log_analyzer('aai', AAI_MODEL, started, text, succeeded=False, error=str(e))
         except Exception as e:
-            app.logger.error(f"analyze_with_aai failed in _analyze_text: {str(e)}; falling back")
-    if result is None:
-        result = analyze_intake_text_scenarios(text)
+            _log_analyzer('aai', AAI_MODEL, started, text, succeeded=False, error=str(e))
+            app.logger.error(f"analyze_with_aai failed: {str(e)}; falling back")
+    started = time.perf_counter()
+    version = _rules_analyzer_version()
+    key = cache_key(text, 'rules', None, version)
+    cached, tier = analysis_cache.get(key)
+    if cached is not None:
+        _log_analyzer('rules', None, started, text, cache_hit=tier)
+        return cached
+    result = _apply_intent_rules(analyze_intake_text_scenarios(text), text)
+    analysis_cache.set(key, result, 'rules', None, version)
+    _log_analyzer('rules', None, started, text)
+    return result
+
+def _analyze_text(text: str) -> dict:
+    """Analyze intake text using AssemblyAI if enabled, else rule-based. Returns normalized dict."""
+    result = _analyze_raw(text)
     # Ensure keys exist
     out = {
         'category': result.get('category'),
+        'intent_key': result.get('intent_key'),
         'urgency': result.get('urgency'),
         'key_facts': result.get('key_facts', {}),
         'dates': result.get('dates', {}),
@@ -3601,604 +3781,564 @@ def _analyze_text(text: str) -> dict:
 @login_required
 def auto_intake():
     """Create case, actions, and draft documents from raw intake text using scenario analyzer."""
-    data = request.get_json()
-    text = (data or {}).get('text') or ''
-    client = (data or {}).get('client') or {}
-    case_title = (data or {}).get('title') or 'Client Intake'
-
-    if not text.strip():
+    data = request.get_json(silent=True) or {}
+    if not (data.get('text') or '').strip():
         return jsonify({'error': 'No text provided'}), 400
+    try:
+        return _intake_dispatch(data, 'full')
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error in auto_intake: {str(e)}")
+        return jsonify({'error': 'Server error'}), 500
 
+@app.route('/api/intake/auto/staff', methods=['POST'])
+@requires_auth
+def auto_intake_staff():
+    """Staff-auth version of auto_intake using Basic Auth, no session required."""
+    data = request.get_json(silent=True) or {}
+    if not (data.get('text') or '').strip():
+        return jsonify({'error': 'No text provided'}), 400
     try:
-        # Find or create client (by email, then phone)
-        db_client = None
-        if client.get('email'):
-            db_client = Client.query.filter_by(email=client['email']).first()
-        if db_client is None and client.get('phone'):
-            db_client = Client.query.filter_by(phone=client['phone']).first()
-        if db_client is None:
-            db_client = Client(
-                first_name=client.get('first_name') or 'Client',
-                last_name=client.get('last_name') or 'Unknown',
-                email=client.get('email'),
-                phone=client.get('phone'),
-                address=client.get('address')
-            )
-            db.session.add(db_client)
-            db.session.flush()
+        return _intake_dispatch(data, 'staff')
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error in auto_intake_staff: {str(e)}")
+        return jsonify({'error': 'Server error'}), 500
 
-        # Analyze (AssemblyAI if enabled, else rule-based)
-        analysis = _analyze_text(text)
+# ---------------- Intake pipeline & background jobs ---------------- #
+INTAKE_JOB_WORKERS = int(os.getenv('INTAKE_JOB_WORKERS', '2'))
+# Lease length of a running job; its worker renews it every INTAKE_JOB_HEARTBEAT_SECONDS
+INTAKE_JOB_STALE_SECONDS = int(os.getenv('INTAKE_JOB_STALE_SECONDS', '600'))
+INTAKE_JOB_HEARTBEAT_SECONDS = max(1, int(os.getenv('INTAKE_JOB_HEARTBEAT_SECONDS', str(INTAKE_JOB_STALE_SECONDS // 4))))
+
+# Pipeline stages enabled per intake mode, plus the client matching and
+# response shape each endpoint has always had: the light (staff API) intake
+# matches clients by case-insensitive email only and does not list actions.
+INTAKE_MODES = {
+    'full': {'letters': True, 'queue_letters': True, 'deadlines': True, 'email_only_match': False, 'list_actions': True},
+    'staff': {'letters': True, 'queue_letters': False, 'deadlines': True, 'email_only_match': False, 'list_actions': True},
+    'light': {'letters': False, 'queue_letters': False, 'deadlines': False, 'email_only_match': True, 'list_actions': False},
+}
+# Letters that are auto-queued for sending one hour after intake
+AUTO_QUEUE_LETTER_KEYS = (
+    'preservation', 'police_report_request', 'dot_camera_request', 'hospital_lit_hold', 'employment_lit_hold', 'medical_records_request'
+)
+
+def _extract_subject_from_letter(content):
+    """Return the 'Subject:' header line of a generated letter, if any."""
+    for line in (content or '').splitlines()[:10]:
+        if line.lower().startswith('subject:'):
+            return line.split(':', 1)[1].strip() or None
+    return None
 
-        # Create case
-        new_case = Case(
-            title=case_title,
-            description=text,
-            case_type=analysis.get('category'),
-            status='open',
+def _intake_find_or_create_client(client, email_only=False):
+    """Match an intake client by email, then phone; create if missing.
+
+    ``email_only`` matches the lower-cased email case-insensitively and never by phone.
+    """
+    if email_only:
+        email = (client.get('email') or '').strip().lower() or None
+        first_name = (client.get('first_name') or '').strip()
+        last_name = (client.get('last_name') or '').strip()
+    else:
+        email = client.get('email')
+        first_name, last_name = client.get('first_name'), client.get('last_name')
+    db_client = None
+    if email and email_only:
+        db_client = Client.query.filter(db.func.lower(Client.email) == email).first()
+    elif email:
+        db_client = Client.query.filter_by(email=email).first()
+    if db_client is None and client.get('phone') and not email_only:
+        db_client = Client.query.filter_by(phone=client['phone']).first()
+    if db_client is None:
+        db_client = Client(
+            first_name=first_name or 'Client',
+            last_name=last_name or 'Unknown',
+            email=email,
+            phone=client.get('phone'),
+            address=client.get('address')
+        )
+        db.session.add(db_client)
+        db.session.flush()
+    return db_client
+
+def _intake_create_case(text, title, db_client, analysis, user_id):
+    """Create the Case and its AI insight; returns (case, plan) with the suggested actions queued on the plan."""
+    new_case = Case(
+        title=title,
+        description=text,
+        case_type=analysis.get('category'),
+        status='open',
+        priority=(analysis.get('priority') or analysis.get('urgency') or 'Medium').lower(),
+        category=analysis.get('category'),
+        client_id=db_client.id,
+        created_by_id=user_id,
+        assigned_to_id=None,
+    )
+    db.session.add(new_case)
+    db.session.flush()
+
+    # Apply taxonomy-aware classification if case_type_key is present
+    try:
+        classification = {
+            "primary_category": analysis.get("category"),
+            "case_type_key": analysis.get("case_type_key"),
+            "urgency": analysis.get("urgency"),
+            "confidence": analysis.get("confidence"),
+        }
+        apply_ai_classification_to_case(new_case, {"classification": classification})
+    except Exception:
+        pass
+
+    db.session.add(AIInsight(
+        case_id=new_case.id,
+        insight_text=f"{analysis.get('category')} | Urgency: {analysis.get('urgency')} | Dept: {analysis.get('department')}",
+        category='scenario_analysis',
+        confidence=analysis.get('confidence'),
+    ))
+
+    plan = MaterializePlan(new_case.id)
+    for text_action in (analysis.get('suggested_actions') or [])[:10]:
+        plan.add_action(
+            title=text_action,
+            description='Auto-generated from scenario analysis',
+            action_type='automation',
+            status='pending',
             priority=(analysis.get('priority') or 'Medium').lower(),
-            client_id=db_client.id,
-            created_by_id=current_user.id,
+            due_date=datetime.utcnow() + timedelta(days=1),
             assigned_to_id=None,
+            created_by_id=user_id
         )
-        db.session.add(new_case)
-        db.session.flush()
+    return new_case, plan
 
-        # Save AI insight
-        insight = AIInsight(
-            case_id=new_case.id,
-            insight_text=f"{analysis.get('category')} | Urgency: {analysis.get('urgency')} | Dept: {analysis.get('department')}",
-            category='scenario_analysis',
-            confidence=None,
+def _add_intake_deadlines(plan, analysis):
+    """Queue the category-specific deadline set for a new intake case on ``plan``."""
+    category = analysis.get('category') or ''
+    now = datetime.utcnow()
+    base_date = now
+    # Try to extract incident date from analysis
+    dates_list = analysis.get('dates', [])
+    if isinstance(dates_list, list) and dates_list:
+        try:
+            base_date = datetime.strptime(dates_list[0], '%Y-%m-%d')
+        except Exception:
+            pass
+
+    statute_notes = 'Must file lawsuit before this date. Verify state-specific statute.'
+    # (name, due_date, source, notes)
+    if category.startswith('Personal Injury'):
+        specs = [
+            ('Security Footage Retention Deadline', base_date + timedelta(days=EVIDENCE_RETENTION_DAYS), 'slip_fall_evidence',
+             f'Security footage typically deleted after {EVIDENCE_RETENTION_DAYS} days. URGENT: Send preservation letter immediately.'),
+            ('Statute of Limitations', base_date + timedelta(days=730), 'statute_of_limitations', statute_notes),
+            ('Medical Records Collection', now + timedelta(days=14), 'medical_records', 'Obtain all medical records within 14 days.'),
+        ]
+    elif category.startswith('Car Accident'):
+        specs = [
+            ('Police Report Request', now + timedelta(days=7), 'police_report', 'Request police report and dash cam footage within 7 days.'),
+            ('Traffic Camera Footage Deadline', now + timedelta(days=30), 'traffic_camera',
+             'Traffic camera footage typically retained 30-90 days. Request immediately.'),
+            ('Medical Evaluation', now + timedelta(days=2), 'medical_evaluation', 'Schedule medical evaluation within 48 hours of accident.'),
+            ('Statute of Limitations', base_date + timedelta(days=730), 'statute_of_limitations', statute_notes),
+        ]
+    elif category.startswith('Employment Law'):
+        specs = [
+            ('EEOC Filing Deadline (Federal)', base_date + timedelta(days=180), 'eeoc_filing',
+             'Must file EEOC charge within 180 days (300 days in deferral states). CRITICAL DEADLINE.'),
+            ('Send Litigation Hold Letter', now + timedelta(days=7), 'employment_evidence',
+             'Send litigation hold to employer immediately. Emails may be deleted.'),
+            ('Personnel File Request', now + timedelta(days=14), 'personnel_file', 'Request complete personnel file within 14 days.'),
+        ]
+    elif category.startswith('Medical Malpractice'):
+        specs = [
+            ('Medical Records Request (URGENT)', now + timedelta(days=7), 'medical_records',
+             'Request all medical records immediately. Include operative reports, count sheets, imaging.'),
+            ('Retain Medical Expert Witness', now + timedelta(days=30), 'expert_witness',
+             'Retain medical expert for case review and Certificate of Merit.'),
+            ('Certificate of Merit', now + timedelta(days=60), 'certificate_of_merit',
+             'Many states require Certificate of Merit within 60-90 days of filing. Verify state requirements.'),
+            ('Statute of Limitations', base_date + timedelta(days=730), 'statute_of_limitations',
+             'Medical malpractice has SHORT statute. May be 1-2 years. Verify state law and discovery rule.'),
+            ('Discovery Rule Deadline', now + timedelta(days=365), 'discovery_rule',
+             'Alternative statute from date of discovery. Verify which date applies in your state.'),
+        ]
+    else:
+        specs = []
+    for name, due_date, source, notes in specs:
+        plan.add_deadline(name=name, due_date=due_date, source=source, notes=notes)
+
+def _intake_generate_documents(new_case, db_client, analysis, user_id, queue_letters):
+    """Write draft letters as documents with an EmailDraft each; optionally queue notices."""
+    letters = _auto_letters(analysis.get('category') or '', analysis, client_name=f"{db_client.first_name} {db_client.last_name}")
+    docs = [(fname, content, _write_document(new_case.id, fname, content, uploaded_by_id=user_id)) for fname, content in letters]
+    db.session.flush()
+    plan = MaterializePlan(new_case.id)
+    for fname, content, doc in docs:
+        subject = f"Draft: {fname.replace('_', ' ').title()}"
+        queue = None
+        if queue_letters and any(k in (fname or '').lower() for k in AUTO_QUEUE_LETTER_KEYS):
+            queue = {
+                'to': None,
+                'subject': _extract_subject_from_letter(content) or subject,
+                'body': content,
+                'send_after': datetime.utcnow() + timedelta(hours=1),
+                'status': 'pending',
+            }
+        plan.add_draft(
+            queue=queue,
+            to=None,
+            subject=subject,
+            body=f"Please review attached draft document: {fname}",
+            attachments=str(doc.id),
+            status='draft'
         )
-        db.session.add(insight)
+    created = materialize(plan)
+    return [doc.id for _, _, doc in docs], created['drafts']
 
-        # Create actions from suggested actions
-        created_actions = []
-        for text_action in (analysis.get('suggested_actions') or [])[:10]:
-            action = Action(
-                title=text_action,
-                description='Auto-generated from scenario analysis',
-                action_type='automation',
-                status='pending',
-                priority=(analysis.get('priority') or 'Medium').lower(),
-                due_date=datetime.utcnow() + timedelta(days=1),
-                assigned_to_id=None,
-                created_by_id=current_user.id
-            )
-            db.session.add(action)
-            db.session.flush()
-            link = CaseAction(
-                case_id=new_case.id,
-                action_id=action.id,
-                status='pending',
-                assigned_to_id=None
-            )
-            db.session.add(link)
-            created_actions.append(action.id)
-
-        # Create draft letters as documents (no email sent in dev)
-        letters = _auto_letters(analysis.get('category') or '', analysis, client_name=f"{db_client.first_name} {db_client.last_name}")
-        created_docs = []
-        email_drafts_created = []
-        for fname, content in letters:
-            doc = _write_document(new_case.id, fname, content, uploaded_by_id=current_user.id)
-            created_docs.append(doc.id)
-            # Create a draft email per document (dev-only)
-            try:
-                draft = EmailDraft(
-                    case_id=new_case.id,
-                    to=None,
-                    subject=f"Draft: {fname.replace('_', ' ').title()}",
-                    body=f"Please review attached draft document: {fname}",
-                    attachments=str(doc.id),
-                    status='draft'
-                )
-                db.session.add(draft)
-                db.session.flush()
-                email_drafts_created.append(draft.id)
-                # Auto-queue preservation/notice letters to send in 1 hour
-                fname_l = (fname or '').lower()
-                should_queue = any(k in fname_l for k in [
-                    'preservation', 'police_report_request', 'dot_camera_request', 'hospital_lit_hold', 'employment_lit_hold', 'medical_records_request'
-                ])
-                if should_queue:
-                    subject = _extract_subject_from_letter(content) or (draft.subject or 'Legal Notice')
-                    q = EmailQueue(
-                        case_id=new_case.id,
-                        draft_id=draft.id,
-                        to=None,
-                        subject=subject,
-                        body=content,
-                        send_after=datetime.utcnow() + timedelta(hours=1),
-                        status='pending'
-                    )
-                    db.session.add(q)
-            except Exception:
-                db.session.rollback()
+def _run_intake_pipeline(payload, user_id, job=None):
+    """Run the auto-intake pipeline for a request payload.
 
-        # Comprehensive Deadline Creation
-        category = analysis.get('category', '')
-        base_date = datetime.utcnow()
-        
-        # Try to extract incident date from analysis
-        dates_list = analysis.get('dates', [])
-        if isinstance(dates_list, list) and dates_list:
-            try:
-                # Try to parse first date
-                base_date = datetime.strptime(dates_list[0], '%Y-%m-%d')
-            except:
-                pass
-        
-        # Personal Injury / Slip and Fall Deadlines
-        if category.startswith('Personal Injury'):
-            # Evidence preservation - URGENT
-            evidence_deadline = base_date + timedelta(days=EVIDENCE_RETENTION_DAYS)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Security Footage Retention Deadline',
-                due_date=evidence_deadline,
-                source='slip_fall_evidence',
-                notes=f'Security footage typically deleted after {EVIDENCE_RETENTION_DAYS} days. URGENT: Send preservation letter immediately.'
-            ))
-            
-            # Statute of limitations (typically 2-3 years, using 2 years)
-            statute_deadline = base_date + timedelta(days=730)  # 2 years
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Statute of Limitations',
-                due_date=statute_deadline,
-                source='statute_of_limitations',
-                notes='Must file lawsuit before this date. Verify state-specific statute.'
-            ))
-            
-            # Medical records collection
-            medical_deadline = datetime.utcnow() + timedelta(days=14)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Medical Records Collection',
-                due_date=medical_deadline,
-                source='medical_records',
-                notes='Obtain all medical records within 14 days.'
-            ))
-        
-        # Car Accident Deadlines
-        elif category.startswith('Car Accident'):
-            # Police report request
-            police_deadline = datetime.utcnow() + timedelta(days=7)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Police Report Request',
-                due_date=police_deadline,
-                source='police_report',
-                notes='Request police report and dash cam footage within 7 days.'
-            ))
-            
-            # Traffic camera footage
-            camera_deadline = datetime.utcnow() + timedelta(days=30)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Traffic Camera Footage Deadline',
-                due_date=camera_deadline,
-                source='traffic_camera',
-                notes='Traffic camera footage typically retained 30-90 days. Request immediately.'
-            ))
-            
-            # Medical evaluation
-            medical_eval_deadline = datetime.utcnow() + timedelta(days=2)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Medical Evaluation',
-                due_date=medical_eval_deadline,
-                source='medical_evaluation',
-                notes='Schedule medical evaluation within 48 hours of accident.'
-            ))
-            
-            # Statute of limitations
-            statute_deadline = base_date + timedelta(days=730)  # 2 years typical
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Statute of Limitations',
-                due_date=statute_deadline,
-                source='statute_of_limitations',
-                notes='Must file lawsuit before this date. Verify state-specific statute.'
-            ))
-        
-        # Employment Law Deadlines
-        elif category.startswith('Employment Law'):
-            # EEOC filing deadline (180 days federal, 300 days in deferral states)
-            eeoc_deadline = base_date + timedelta(days=180)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='EEOC Filing Deadline (Federal)',
-                due_date=eeoc_deadline,
-                source='eeoc_filing',
-                notes='Must file EEOC charge within 180 days (300 days in deferral states). CRITICAL DEADLINE.'
-            ))
-            
-            # Evidence preservation
-            evidence_deadline = datetime.utcnow() + timedelta(days=7)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Send Litigation Hold Letter',
-                due_date=evidence_deadline,
-                source='employment_evidence',
-                notes='Send litigation hold to employer immediately. Emails may be deleted.'
-            ))
-            
-            # Personnel file request
-            personnel_deadline = datetime.utcnow() + timedelta(days=14)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Personnel File Request',
-                due_date=personnel_deadline,
-                source='personnel_file',
-                notes='Request complete personnel file within 14 days.'
-            ))
-        
-        # Medical Malpractice Deadlines
-        elif category.startswith('Medical Malpractice'):
-            # Medical records - URGENT
-            records_deadline = datetime.utcnow() + timedelta(days=7)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Medical Records Request (URGENT)',
-                due_date=records_deadline,
-                source='medical_records',
-                notes='Request all medical records immediately. Include operative reports, count sheets, imaging.'
-            ))
-            
-            # Expert witness retention
-            expert_deadline = datetime.utcnow() + timedelta(days=30)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Retain Medical Expert Witness',
-                due_date=expert_deadline,
-                source='expert_witness',
-                notes='Retain medical expert for case review and Certificate of Merit.'
-            ))
-            
-            # Certificate of Merit (typically 60-90 days after filing)
-            merit_deadline = datetime.utcnow() + timedelta(days=60)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Certificate of Merit',
-                due_date=merit_deadline,
-                source='certificate_of_merit',
-                notes='Many states require Certificate of Merit within 60-90 days of filing. Verify state requirements.'
-            ))
-            
-            # Statute of limitations (typically 1-2 years for med mal, using 2 years)
-            statute_deadline = base_date + timedelta(days=730)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Statute of Limitations',
-                due_date=statute_deadline,
-                source='statute_of_limitations',
-                notes='Medical malpractice has SHORT statute. May be 1-2 years. Verify state law and discovery rule.'
-            ))
-            
-            # Discovery rule alternative (from date sponge was discovered)
-            discovery_deadline = datetime.utcnow() + timedelta(days=365)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Discovery Rule Deadline',
-                due_date=discovery_deadline,
-                source='discovery_rule',
-                notes='Alternative statute from date of discovery. Verify which date applies in your state.'
-            ))
+    Without a job everything commits in one transaction. With a job each stage
+    commits together with the job's progress, so a retried job resumes after
+    the last completed stage instead of creating a second case.
+    """
+    mode = INTAKE_MODES.get(payload.get('mode') or 'full', INTAKE_MODES['full'])
+    text = payload.get('text') or ''
+    result = json.loads(job.result) if job is not None and job.result else {}
+
+    if job is not None and job.case_id:
+        new_case = db.session.get(Case, job.case_id)
+        db_client = new_case.client
+    else:
+        db_client = _intake_find_or_create_client(payload.get('client') or {}, email_only=mode['email_only_match'])
+        analysis = _analyze_text(text)
+        new_case, plan = _intake_create_case(text, payload.get('title') or 'Client Intake', db_client, analysis, user_id)
+        if mode['deadlines']:
+            _add_intake_deadlines(plan, analysis)
+        created = materialize(plan)
+        result = {'status': 'success', 'case_id': new_case.id, 'analysis': analysis}
+        if mode['list_actions']:
+            result['actions_created'] = created['actions']
+        if job is not None:
+            job.case_id = new_case.id
+            job.stage = 'case_created'
+            job.result = json.dumps(result, default=str)
+            db.session.commit()
 
-        db.session.commit()
+    if mode['letters'] and 'documents_created' not in result:
+        doc_ids, draft_ids = _intake_generate_documents(new_case, db_client, result['analysis'], user_id, mode['queue_letters'])
+        result['documents_created'] = doc_ids
+        result['email_drafts_created'] = draft_ids
+        if job is not None:
+            job.stage = 'documents_created'
+            job.result = json.dumps(result, default=str)
+    db.session.commit()
 
+    if mode['letters'] and user_id:
         # Link latest transcript for this user to the new case/client (best effort)
         try:
-            t = Transcript.query.filter_by(user_id=current_user.id).order_by(Transcript.created_at.desc()).first()
+            t = Transcript.query.filter_by(user_id=user_id).order_by(Transcript.created_at.desc()).first()
             if t and (t.case_id is None):
                 t.case_id = new_case.id
                 t.client_id = db_client.id
                 db.session.commit()
         except Exception:
             db.session.rollback()
+    return result
 
-        return jsonify({
-            'status': 'success',
-            'case_id': new_case.id,
-            'actions_created': created_actions,
-            'documents_created': created_docs,
-            'email_drafts_created': email_drafts_created,
-            'analysis': analysis
-        }), 201
-    except Exception as e:
-        db.session.rollback()
-        app.logger.error(f"Error in auto_intake: {str(e)}")
+_intake_executor = None
+_intake_executor_lock = threading.Lock()
+_intake_leases = {}  # job id -> lease token held by this process
+_intake_heartbeat = None
 
-@app.route('/api/intake/auto/staff', methods=['POST'])
-@requires_auth
-def auto_intake_staff():
-    """Staff-auth version of auto_intake using Basic Auth, no session required."""
-    data = request.get_json()
-    text = (data or {}).get('text') or ''
-    client = (data or {}).get('client') or {}
-    case_title = (data or {}).get('title') or 'Client Intake'
+def _intake_submit(job_id):
+    """Hand a queued job to this process's executor, recording when."""
+    global _intake_executor
+    IntakeJob.query.filter(IntakeJob.id == job_id).update({'submitted_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    with _intake_executor_lock:
+        if _intake_executor is None:
+            _intake_executor = ThreadPoolExecutor(max_workers=max(1, INTAKE_JOB_WORKERS), thread_name_prefix='intake')
+    _intake_executor.submit(_run_intake_job, job_id)
+
+def _renew_intake_leases():
+    """Heartbeat: extend the leases of jobs this process is running."""
+    while True:
+        time.sleep(INTAKE_JOB_HEARTBEAT_SECONDS)
+        with _intake_executor_lock:
+            leases = dict(_intake_leases)
+        if not leases:
+            continue
+        with app.app_context():
+            try:
+                until = datetime.utcnow() + timedelta(seconds=INTAKE_JOB_STALE_SECONDS)
+                for job_id, token in leases.items():
+                    (IntakeJob.query
+                     .filter(IntakeJob.id == job_id, IntakeJob.locked_by == token, IntakeJob.status == 'running')
+                     .update({'locked_until': until}, synchronize_session=False))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Intake lease heartbeat error: {str(e)}")
+            finally:
+                db.session.remove()
 
-    if not text.strip():
-        return jsonify({'error': 'No text provided'}), 400
+def _claim_intake_job(job_id, from_status='queued'):
+    """Atomically move a job to running under a lease; returns the lease token, or None if another worker got it first."""
+    global _intake_heartbeat
+    now = datetime.utcnow()
+    token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"[:64]
+    claimed = (IntakeJob.query
+               .filter(IntakeJob.id == job_id, IntakeJob.status == from_status)
+               .update({'status': 'running', 'started_at': now, 'updated_at': now,
+                        'locked_by': token, 'locked_until': now + timedelta(seconds=INTAKE_JOB_STALE_SECONDS),
+                        'attempts': db.func.coalesce(IntakeJob.attempts, 0) + 1},
+                       synchronize_session=False))
+    db.session.commit()
+    if claimed != 1:
+        return None
+    with _intake_executor_lock:
+        _intake_leases[job_id] = token
+        if _intake_heartbeat is None or not _intake_heartbeat.is_alive():
+            _intake_heartbeat = threading.Thread(target=_renew_intake_leases, name='intake-heartbeat', daemon=True)
+            _intake_heartbeat.start()
+    return token
+
+def _finish_intake_job(job_id, token, result=None, error=None):
+    job = db.session.get(IntakeJob, job_id)
+    with _intake_executor_lock:
+        _intake_leases.pop(job_id, None)
+    if job.locked_by != token:
+        # Lease lost (reset as stale and claimed again); the new owner records the outcome
+        app.logger.warning(f"Intake job {job_id} lost its lease; result not recorded")
+        return job
+    job.status = 'failed' if error else 'succeeded'
+    job.stage = job.stage if error else 'done'
+    job.error = error
+    if result is not None:
+        job.result = json.dumps(result, default=str)
+    job.finished_at = datetime.utcnow()
+    job.locked_by = None
+    job.locked_until = None
+    db.session.commit()
+    return job
 
+def _execute_intake_job(job_id, token):
+    """Run a claimed job's pipeline and record its outcome."""
+    job = db.session.get(IntakeJob, job_id)
     try:
-        # Resolve a user id for created_by fields
-        user_id = _current_user_id()
+        result = _run_intake_pipeline(json.loads(job.payload), job.user_id, job=job)
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Intake job {job_id} failed: {str(e)}")
+        return _finish_intake_job(job_id, token, error=str(e)[:2000])
+    return _finish_intake_job(job_id, token, result=result)
 
-        # Find or create client (by email, then phone)
-        db_client = None
-        if client.get('email'):
-            db_client = Client.query.filter_by(email=client['email']).first()
-        if db_client is None and client.get('phone'):
-            db_client = Client.query.filter_by(phone=client['phone']).first()
-        if db_client is None:
-            db_client = Client(
-                first_name=client.get('first_name') or 'Client',
-                last_name=client.get('last_name') or 'Unknown',
-                email=client.get('email'),
-                phone=client.get('phone'),
-                address=client.get('address')
-            )
-            db.session.add(db_client)
-            db.session.flush()
+def _run_intake_job(job_id):
+    with app.app_context():
+        token = None
+        try:
+            token = _claim_intake_job(job_id)
+            if token:
+                _execute_intake_job(job_id, token)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Intake worker error for job {job_id}: {str(e)}")
+        finally:
+            with _intake_executor_lock:
+                _intake_leases.pop(job_id, None)
+            db.session.remove()
+
+def _requeue_stale_intake_jobs():
+    """Reset running jobs whose lease expired and resubmit queued jobs no executor took."""
+    with app.app_context():
+        try:
+            now = datetime.utcnow()
+            stale_before = now - timedelta(seconds=INTAKE_JOB_STALE_SECONDS)
+            # Rows claimed before leases existed fall back to started_at
+            expired = db.or_(IntakeJob.locked_until < now,
+                             db.and_(IntakeJob.locked_until.is_(None), IntakeJob.started_at < stale_before))
+            stale = (IntakeJob.query
+                     .filter(IntakeJob.status == 'running', expired)
+                     .update({'status': 'queued', 'updated_at': now, 'locked_by': None, 'locked_until': None,
+                              'submitted_at': None}, synchronize_session=False))
+            db.session.commit()
+            ids = [job_id for job_id, in (db.session.query(IntakeJob.id)
+                                          .filter(IntakeJob.status == 'queued',
+                                                  IntakeJob.created_at < now - timedelta(seconds=30),
+                                                  db.or_(IntakeJob.submitted_at.is_(None),
+                                                         IntakeJob.submitted_at < stale_before))
+                                          .all())]
+            for job_id in ids:
+                _intake_submit(job_id)
+            if stale or ids:
+                app.logger.info(f"Intake jobs: reset {stale} stale, resubmitted {len(ids)}")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Intake job requeue error: {str(e)}")
+            raise
+
+def _intake_job_response(job, replayed=False):
+    """202 with a status link while pending; the stored pipeline response once finished."""
+    if job.status == 'succeeded':
+        resp = jsonify(json.loads(job.result) if job.result else {'status': 'success', 'case_id': job.case_id})
+        resp.status_code = 200 if replayed else 201
+    elif job.status == 'failed' and not replayed:
+        resp = jsonify({'error': 'Server error', 'job': job.to_dict()})
+        resp.status_code = 500
+    else:
+        resp = jsonify({'job_id': job.id, 'status': job.status, 'status_url': url_for('api_intake_job_status', job_id=job.id)})
+        resp.status_code = 202
+        resp.headers['Location'] = url_for('api_intake_job_status', job_id=job.id)
+    resp.headers['X-Intake-Job-Id'] = str(job.id)
+    if replayed:
+        resp.headers['Idempotent-Replayed'] = 'true'
+    return resp
+
+def _intake_dispatch(data, mode, force_async=False):
+    """Run an intake synchronously or as a background job, honouring idempotency keys.
+
+    Async mode is selected with ``?async=1``, ``Prefer: respond-async`` or
+    ``force_async``. An ``Idempotency-Key`` header (or ``idempotency_key`` in
+    the body) makes retries return the original job instead of a new case; keys
+    are scoped by the authenticated user and the intake mode, so one user's key
+    never replays another user's job.
+    """
+    payload = {'text': data.get('text') or '', 'title': data.get('title'), 'client': data.get('client') or {}, 'mode': mode}
+    user_id = _current_user_id()
+    want_async = force_async or request.args.get('async') in ('1', 'true') or 'respond-async' in (request.headers.get('Prefer') or '')
+    idem = (request.headers.get('Idempotency-Key') or data.get('idempotency_key') or '').strip()
+    key = f"user:{user_id or '-'}:{mode}:{idem}"[:191] if idem else None
+
+    if key:
+        existing = IntakeJob.query.filter_by(idempotency_key=key).first()
+        if existing is not None:
+            if existing.status == 'failed':
+                # A retry of a failed intake resumes the same job
+                existing.status = 'queued'
+                existing.error = None
+                db.session.commit()
+                _intake_submit(existing.id)
+            return _intake_job_response(existing, replayed=True)
+    elif not want_async:
+        return jsonify(_run_intake_pipeline(payload, user_id)), 201
 
-        # Analyze (AssemblyAI if enabled, else rule-based)
-        analysis = _analyze_text(text)
+    job = IntakeJob(idempotency_key=key, mode=mode, status='queued', payload=json.dumps(payload), user_id=user_id)
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Concurrent retry with the same key won the insert
+        db.session.rollback()
+        return _intake_job_response(IntakeJob.query.filter_by(idempotency_key=key).first(), replayed=True)
 
-        # Create case
-        new_case = Case(
-            title=case_title,
-            description=text,
-            case_type=analysis.get('category'),
-            status='open',
-            priority=(analysis.get('priority') or 'Medium').lower(),
-            client_id=db_client.id,
-            created_by_id=user_id,
-            assigned_to_id=None,
-        )
-        db.session.add(new_case)
-        db.session.flush()
+    if want_async:
+        _intake_submit(job.id)
+        return _intake_job_response(job)
+    token = _claim_intake_job(job.id)
+    try:
+        return _intake_job_response(_execute_intake_job(job.id, token) if token else db.session.get(IntakeJob, job.id))
+    finally:
+        with _intake_executor_lock:
+            _intake_leases.pop(job.id, None)
 
-        # Save AI insight
-        insight = AIInsight(
-            case_id=new_case.id,
-            insight_text=f"{analysis.get('category')} | Urgency: {analysis.get('urgency')} | Dept: {analysis.get('department')}",
-            category='scenario_analysis',
-            confidence=None,
-        )
-        db.session.add(insight)
+@app.route('/api/intake/jobs', methods=['POST'])
+@requires_auth
+def api_intake_jobs_create():
+    """Queue a full auto-intake and return 202 with the job id."""
+    data = request.get_json(silent=True) or {}
+    if not (data.get('text') or '').strip():
+        return jsonify({'error': 'No text provided'}), 400
+    mode = data.get('mode') if data.get('mode') in INTAKE_MODES else 'full'
+    try:
+        return _intake_dispatch(data, mode, force_async=True)
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error in api_intake_jobs_create: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
 
-        # Create actions from suggested actions
-        created_actions = []
-        for text_action in (analysis.get('suggested_actions') or [])[:10]:
-            action = Action(
-                title=text_action,
-                description='Auto-generated from scenario analysis',
-                action_type='automation',
-                status='pending',
-                priority=(analysis.get('priority') or 'Medium').lower(),
-                due_date=datetime.utcnow() + timedelta(days=1),
-                assigned_to_id=None,
-                created_by_id=user_id
-            )
-            db.session.add(action)
-            db.session.flush()
-            link = CaseAction(
-                case_id=new_case.id,
-                action_id=action.id,
-                status='pending',
-                assigned_to_id=None
-            )
-            db.session.add(link)
-            created_actions.append(action.id)
-
-        # Create draft letters as documents (no email sent in dev)
-        letters = _auto_letters(analysis.get('category') or '', analysis, client_name=f"{db_client.first_name} {db_client.last_name}")
-        created_docs = []
-        email_drafts_created = []
-        for fname, content in letters:
-            doc = _write_document(new_case.id, fname, content, uploaded_by_id=user_id)
-            created_docs.append(doc.id)
-            try:
-                draft = EmailDraft(
-                    case_id=new_case.id,
-                    to=None,
-                    subject=f"Draft: {fname.replace('_', ' ').title()}",
-                    body=f"Please review attached draft document: {fname}",
-                    attachments=str(doc.id),
-                    status='draft'
-                )
-                db.session.add(draft)
-                db.session.flush()
-                email_drafts_created.append(draft.id)
-            except Exception:
-                db.session.rollback()
+@app.route('/api/intake/jobs/<int:job_id>', methods=['GET'])
+@requires_auth
+def api_intake_job_status(job_id):
+    job = db.session.get(IntakeJob, job_id)
+    if job is None:
+        return jsonify({'error': 'not found'}), 404
+    return jsonify(job.to_dict())
 
-        # Deadlines (reuse same logic by calling category-specific block)
-        category = analysis.get('category', '')
-        base_date = datetime.utcnow()
-        dates_list = analysis.get('dates', [])
-        if isinstance(dates_list, list) and dates_list:
-            try:
-                base_date = datetime.strptime(dates_list[0], '%Y-%m-%d')
-            except Exception:
-                pass
+# Types safe to render in the browser; anything else is always served as an attachment
+INLINE_DOCUMENT_TYPES = {'application/pdf', 'text/plain', 'image/png', 'image/jpeg', 'image/gif', 'image/webp'}
 
-        if category.startswith('Personal Injury'):
-            evidence_deadline = base_date + timedelta(days=EVIDENCE_RETENTION_DAYS)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Security Footage Retention Deadline',
-                due_date=evidence_deadline,
-                source='slip_fall_evidence',
-                notes=f'Security footage typically deleted after {EVIDENCE_RETENTION_DAYS} days. URGENT: Send preservation letter immediately.'
-            ))
-            statute_deadline = base_date + timedelta(days=730)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Statute of Limitations',
-                due_date=statute_deadline,
-                source='statute_of_limitations',
-                notes='Must file lawsuit before this date. Verify state-specific statute.'
-            ))
-            medical_deadline = datetime.utcnow() + timedelta(days=14)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Medical Records Collection',
-                due_date=medical_deadline,
-                source='medical_records',
-                notes='Obtain all medical records within 14 days.'
-            ))
-        elif category.startswith('Car Accident'):
-            police_deadline = datetime.utcnow() + timedelta(days=7)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Police Report Request',
-                due_date=police_deadline,
-                source='police_report',
-                notes='Request police report and dash cam footage within 7 days.'
-            ))
-            camera_deadline = datetime.utcnow() + timedelta(days=30)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Traffic Camera Footage Deadline',
-                due_date=camera_deadline,
-                source='traffic_camera',
-                notes='Traffic camera footage typically retained 30-90 days. Request immediately.'
-            ))
-            medical_eval_deadline = datetime.utcnow() + timedelta(days=2)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Medical Evaluation',
-                due_date=medical_eval_deadline,
-                source='medical_evaluation',
-                notes='Schedule medical evaluation within 48 hours of accident.'
-            ))
-            statute_deadline = base_date + timedelta(days=730)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Statute of Limitations',
-                due_date=statute_deadline,
-                source='statute_of_limitations',
-                notes='Must file lawsuit before this date. Verify state-specific statute.'
-            ))
-        elif category.startswith('Employment Law'):
-            eeoc_deadline = base_date + timedelta(days=180)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='EEOC Filing Deadline (Federal)',
-                due_date=eeoc_deadline,
-                source='eeoc_filing',
-                notes='Must file EEOC charge within 180 days (300 days in deferral states). CRITICAL DEADLINE.'
-            ))
-            evidence_deadline = datetime.utcnow() + timedelta(days=7)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Send Litigation Hold Letter',
-                due_date=evidence_deadline,
-                source='employment_evidence',
-                notes='Send litigation hold to employer immediately. Emails may be deleted.'
-            ))
-            personnel_deadline = datetime.utcnow() + timedelta(days=14)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Personnel File Request',
-                due_date=personnel_deadline,
-                source='personnel_file',
-                notes='Request complete personnel file within 14 days.'
-            ))
-        elif category.startswith('Medical Malpractice'):
-            records_deadline = datetime.utcnow() + timedelta(days=7)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Medical Records Request (URGENT)',
-                due_date=records_deadline,
-                source='medical_records',
-                notes='Request all medical records immediately. Include operative reports, count sheets, imaging.'
-            ))
-            expert_deadline = datetime.utcnow() + timedelta(days=30)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Retain Medical Expert Witness',
-                due_date=expert_deadline,
-                source='expert_witness',
-                notes='Retain medical expert for case review and Certificate of Merit.'
-            ))
-            merit_deadline = datetime.utcnow() + timedelta(days=60)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Certificate of Merit',
-                due_date=merit_deadline,
-                source='certificate_of_merit',
-                notes='Many states require Certificate of Merit within 60-90 days of filing. Verify state requirements.'
-            ))
-            statute_deadline = base_date + timedelta(days=730)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Statute of Limitations',
-                due_date=statute_deadline,
-                source='statute_of_limitations',
-                notes='Medical malpractice has SHORT statute. May be 1-2 years. Verify state law and discovery rule.'
-            ))
-            discovery_deadline = datetime.utcnow() + timedelta(days=365)
-            db.session.add(Deadline(
-                case_id=new_case.id,
-                name='Discovery Rule Deadline',
-                due_date=discovery_deadline,
-                source='discovery_rule',
-                notes='Alternative statute from date of discovery. Verify which date applies in your state.'
-            ))
+def _document_mime_type(document):
+    """MIME type to serve a document with, from its sanitized name only.
 
-        db.session.commit()
+    The stored file_type may come from the uploading client's Content-Type and
+    is never trusted for serving.
+    """
+    return mimetypes.guess_type(secure_filename(document.name or ''))[0] or 'application/octet-stream'
+
+def _offload_header(path):
+    """(header, value) handing the file to the front proxy, or None to serve it from the app."""
+    if DOCUMENT_SENDFILE == 'x-sendfile':
+        return 'X-Sendfile', os.path.abspath(path)
+    if DOCUMENT_SENDFILE == 'x-accel':
+        rel = os.path.relpath(os.path.abspath(path), app.config['UPLOAD_FOLDER'])
+        if not rel.startswith('..'):
+            return 'X-Accel-Redirect', DOCUMENT_ACCEL_PREFIX.rstrip('/') + '/' + quote(rel.replace(os.sep, '/'))
+    return None
+
+def _serve_document(document, as_attachment):
+    """Document response with ETag (content hash) / Last-Modified validators and Range support.
 
-        # Best-effort link latest transcript for this user
+    Returns None when the file is missing. With an offload header the proxy
+    does the transfer (and Range), so the app never touches the file.
+    """
+    mime_type = _document_mime_type(document)
+    as_attachment = as_attachment or mime_type not in INLINE_DOCUMENT_TYPES
+    # Stored bytes never change for a document: the hash is a strong validator
+    etag = document.sha256
+    last_modified = document.created_at
+    offload = _offload_header(document.file_path)
+    if offload is None:
         try:
-            t = Transcript.query.filter_by(user_id=user_id).order_by(Transcript.created_at.desc()).first()
-            if t and (t.case_id is None):
-                t.case_id = new_case.id
-                t.client_id = db_client.id
-                db.session.commit()
-        except Exception:
-            db.session.rollback()
+            response = send_file(
+                document.file_path,
+                mimetype=mime_type,
+                as_attachment=as_attachment,
+                download_name=document.name,
+                conditional=True,
+                etag=etag or True,
+                last_modified=last_modified,
+            )
+        except FileNotFoundError:
+            return None
+        response.cache_control.private = True
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+        return response
+    response = Response(status=200, mimetype=mime_type)
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline', filename=document.name)
+    if etag:
+        response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    response.cache_control.private = True
+    if request.method in ('GET', 'HEAD') and not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response.status_code = 304
+        return response
+    response.headers[offload[0]] = offload[1]
+    return response
 
-        return jsonify({
-            'status': 'success',
-            'case_id': new_case.id,
-            'actions_created': created_actions,
-            'documents_created': created_docs,
-            'email_drafts_created': email_drafts_created,
-            'analysis': analysis
-        }), 201
-    except Exception as e:
-        db.session.rollback()
-        app.logger.error(f"Error in auto_intake_staff: {str(e)}")
-        return jsonify({'error': 'Server error'}), 500
 @app.route('/documents/<int:document_id>')
 @login_required
 def view_document(document_id):
     document = db.session.get(Document, document_id)
     if document is None:
         abort(404, description="Document not found")
-    
-    # Check if file exists
-    if not os.path.exists(document.file_path):
+    response = _serve_document(document, as_attachment=False)
+    if response is None:
         flash('File not found on server', 'error')
         return redirect(url_for('documents'))
-    
-    # Get file extension and set appropriate MIME type
-    mime_type, _ = mimetypes.guess_type(document.file_path)
-    if not mime_type:
-        mime_type = 'application/octet-stream'
-    
-    return send_file(
-        document.file_path,
-        mimetype=mime_type,
-        as_attachment=False,
-        download_name=document.name
-    )
+    return response
 
 @app.route('/documents/download/<int:document_id>')
 @login_required
@@ -4206,11 +4346,40 @@ def download_document(document_id):
     document = db.session.get(Document, document_id)
     if document is None:
         abort(404, description="Document not found")
-    return send_from_directory(
-        os.path.dirname(document.file_path),
-        os.path.basename(document.file_path),
-        as_attachment=True
-    )
+    response = _serve_document(document, as_attachment=True)
+    if response is None:
+        abort(404, description="File not found")
+    return response
+
+@app.route('/documents/<int:document_id>/thumbnail')
+@login_required
+def document_thumbnail(document_id):
+    extraction = db.session.get(DocumentExtraction, document_id)
+    if extraction is None or not extraction.thumbnail_path:
+        abort(404, description="No thumbnail")
+    try:
+        response = send_file(extraction.thumbnail_path, mimetype='image/jpeg', conditional=True,
+                             last_modified=extraction.finished_at)
+    except FileNotFoundError:
+        abort(404, description="No thumbnail")
+    response.cache_control.private = True
+    return response
+
+@app.route('/api/documents/<int:document_id>/extraction', methods=['GET'])
+@requires_auth
+def api_document_extraction(document_id):
+    """Extraction status of a document; ?text=1 includes the extracted text."""
+    try:
+        extraction = db.session.get(DocumentExtraction, document_id)
+        if extraction is None:
+            return jsonify({'error': 'not found'}), 404
+        data = extraction.to_dict()
+        if request.args.get('text') in ('1', 'true'):
+            data['text'] = extraction.text
+        return jsonify(data)
+    except Exception as e:
+        app.logger.error(f"Error in api_document_extraction: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
 
 @app.route('/documents/upload', methods=['GET', 'POST'])
 @login_required
@@ -4231,20 +4400,17 @@ def upload_document():
             
         if file and allowed_file(file.filename):
             try:
-                # Create uploads directory if it doesn't exist
-                os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-                
                 # Save the file
                 filename = secure_filename(file.filename)
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(file_path)
+                blob = document_store.store_stream(file.stream)
                 
                 # Create document record
                 document = Document(
                     name=filename,
-                    file_path=file_path,
+                    file_path=blob.path,
                     file_type=file.mimetype,
-                    file_size=os.path.getsize(file_path),
+                    file_size=blob.size,
+                    sha256=blob.sha256,
                     uploaded_by_id=current_user.id,
                     created_at=datetime.utcnow()
                 )
@@ -4254,6 +4420,7 @@ def upload_document():
                 if case_id:
                     document.case_id = case_id
                 
+                _queue_extraction(document)
                 db.session.add(document)
                 db.session.commit()
                 
@@ -4282,14 +4449,14 @@ def delete_document(document_id):
         return redirect(url_for('documents'))
     
     try:
-        # Delete the file from the filesystem
-        if os.path.exists(document.file_path):
-            os.remove(document.file_path)
-        
         # Delete the document record from the database
         db.session.delete(document)
         db.session.commit()
         
+        # Then its file, unless other documents share the same bytes
+        _release_document_file(document)
+        _release_document_thumbnail(document_id)
+        
         flash('Document deleted successfully', 'success')
     except Exception as e:
         db.session.rollback()
@@ -4398,40 +4565,26 @@ def create_case():
         app.logger.error(f"Error creating case: {str(e)}")
         return jsonify({'error': f'Failed to create case: {str(e)}'}), 500
 
-# Poll AssemblyAI for transcription status/text
+# Transcription status/text, served from the DB (see services/transcripts.py)
 @app.route('/transcribe/status/<transcript_id>', methods=['GET'])
 @login_required
 def transcription_status(transcript_id):
     try:
-        service = STTService()
-        data = service.get_transcription_status(transcript_id)
-        # Update transcript persistence
-        t = Transcript.query.filter_by(external_id=transcript_id).first()
-        if t is None:
-            t = Transcript(provider='assemblyai', external_id=transcript_id)
-            db.session.add(t)
-        t.status = data.get('status') or t.status
-        if data.get('status') == 'completed':
-            t.text = data.get('text') or ''
-        if data.get('status') == 'error':
-            # store error state
-            t.status = 'error'
-        db.session.commit()
-        # Shape response
+        t = transcript_store.track(db.session, transcript_id)
         resp = {
-            'status': data.get('status'),
-            'id': data.get('id'),
+            'status': t.status,
+            'id': t.external_id,
         }
-        if data.get('status') == 'completed':
-            resp['text'] = data.get('text', '')
-            resp['entities'] = data.get('entities')
-            resp['sentiment_analysis'] = data.get('sentiment_analysis')
-            resp['auto_highlights'] = data.get('auto_highlights')
-            resp['iab_categories'] = data.get('iab_categories')
-        elif data.get('status') == 'error':
-            resp['error'] = data.get('error')
+        if t.status == 'completed':
+            resp['text'] = t.text or ''
+            result = transcript_store.result_of(t)
+            for key in transcript_store.RESULT_KEYS:
+                resp[key] = result.get(key)
+        elif t.status == 'error':
+            resp['error'] = t.error
         return jsonify(resp)
     except Exception as e:
+        db.session.rollback()
         app.logger.error(f"Error fetching transcription status: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
@@ -4470,6 +4623,21 @@ def case_ai_insights(case_id):
                          case=case, 
                          insights=insights_data)
 
+def _record_case_analysis(case, analysis):
+    """Persist an analysis result as an AIInsight and backfill the case category."""
+    insight = AIInsight(
+        case_id=case.id,
+        insight_text=analysis.get('summary', 'No analysis available'),
+        category=analysis.get('category', 'other'),
+        confidence=analysis.get('confidence', 0.0)
+    )
+    db.session.add(insight)
+    
+    # Update the case category if not already set
+    if not case.category and analysis.get('category'):
+        case.category = analysis['category']
+    return insight
+
 @app.route('/api/cases/<int:case_id>/analyze', methods=['POST'])
 @login_required
 def analyze_case_endpoint(case_id):
@@ -4479,29 +4647,9 @@ def analyze_case_endpoint(case_id):
         return jsonify({'error': 'Case not found'}), 404
     
     try:
-        # Get the case description
-        description = case.description or ''
-        
         # Analyze the case
-        analysis = analyze_case(description)
-        
-        # Save the insight to the database
-        insight = AIInsight(
-            case_id=case.id,
-            insight_text=analysis.get('summary', 'No analysis available'),
-            category=analysis.get('category', 'other'),
-            confidence=analysis.get('confidence', 0.0),
-            metadata={
-                'risk_level': analysis.get('risk_level'),
-                'entities': analysis.get('entities', {})
-            }
-        )
-        db.session.add(insight)
-        
-        # Update the case category if not already set
-        if not case.category and analysis.get('category'):
-            case.category = analysis['category']
-        
+        analysis = analyze_many([case.description or ''])[0]
+        _record_case_analysis(case, analysis)
         db.session.commit()
         
         return jsonify({
@@ -4515,6 +4663,39 @@ def analyze_case_endpoint(case_id):
         app.logger.error(f"Error analyzing case: {str(e)}")
         return jsonify({'error': f'Failed to analyze case: {str(e)}'}), 500
 
+@app.route('/api/cases/analyze', methods=['POST'])
+@login_required
+def analyze_cases_bulk():
+    """Re-analyze many cases in one request.
+
+    Body: {"case_ids": [1, 2, ...]}. Descriptions are classified in one batch
+    and all insights are written in a single transaction.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        case_ids = [int(cid) for cid in (data.get('case_ids') or [])][:500]
+        if not case_ids:
+            return jsonify({'error': 'case_ids required'}), 400
+        cases = Case.query.filter(Case.id.in_(case_ids)).all()
+        analyses = analyze_many([c.description or '' for c in cases])
+        results = []
+        for case, analysis in zip(cases, analyses):
+            _record_case_analysis(case, analysis)
+            results.append({'case_id': case.id, 'analysis': analysis})
+        db.session.commit()
+        found = {c.id for c in cases}
+        return jsonify({
+            'status': 'success',
+            'results': results,
+            'missing': [cid for cid in case_ids if cid not in found]
+        })
+    except (TypeError, ValueError):
+        return jsonify({'error': 'case_ids must be integers'}), 400
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error in analyze_cases_bulk: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
 @app.route('/api/cases/<int:case_id>', methods=['PUT'])
 def update_case(case_id):
     """Update case details."""
@@ -4627,6 +4808,269 @@ def delete_email_draft(draft_id):
 
 # Add more API endpoints for clients, actions, and other resources...
 
+# ---------------- Background jobs ---------------- #
+def _finish_extraction(row, result=None, error=None, retry=False):
+    now = datetime.utcnow()
+    row.finished_at = now
+    row.updated_at = now
+    if result is not None:
+        row.status = 'done'
+        row.error = None
+        row.text = result['text']
+        row.text_chars = len(result['text']) if result['text'] is not None else None
+        row.page_count = result['page_count']
+        row.thumbnail_path = result['thumbnail_path']
+        row.source_bytes = result['source_bytes']
+        row.duration_ms = result['duration_ms']
+    elif retry and (row.attempts or 0) < DOCUMENT_EXTRACTION_MAX_ATTEMPTS:
+        row.status = 'pending'
+        row.error = error
+    else:
+        row.status = 'failed'
+        row.error = error
+
+def _extract_documents():
+    """Run a batch of pending document extractions in the process pool."""
+    with app.app_context():
+        try:
+            now = datetime.utcnow()
+            stale = (DocumentExtraction.query
+                     .filter(DocumentExtraction.status == 'processing',
+                             DocumentExtraction.started_at < now - timedelta(seconds=DOCUMENT_EXTRACTION_STALE_SECONDS))
+                     .update({'status': 'pending', 'updated_at': now}, synchronize_session=False))
+            rows = (DocumentExtraction.query
+                    .filter(DocumentExtraction.status == 'pending')
+                    .order_by(DocumentExtraction.created_at.asc())
+                    .limit(DOCUMENT_EXTRACTION_BATCH)
+                    .all())
+            batch = {}
+            for row in rows:
+                row.kind = row.kind or document_extract.kind_of(row.document.name)
+                if not row.kind:
+                    row.status = 'skipped'
+                    continue
+                row.status = 'processing'
+                row.started_at = now
+                row.attempts = (row.attempts or 0) + 1
+            db.session.commit()
+            for row in rows:
+                if row.status != 'processing':
+                    continue
+                thumb = document_extract.thumbnail_path(THUMBNAIL_FOLDER, row.id) if row.kind == 'image' else None
+                batch[row.id] = (row.document.file_path, row.kind, thumb)
+            by_id = {row.id: row for row in rows}
+            for row_id, result, error in document_extract.run_batch(batch):
+                if error is None:
+                    _finish_extraction(by_id[row_id], result=result)
+                elif isinstance(error, (BrokenProcessPool, TimeoutError)):
+                    # A crash may be a sibling's fault, a timeout transient load: retry (up to the attempt limit)
+                    _finish_extraction(by_id[row_id], error=f"{error.__class__.__name__}: {error}" if str(error)
+                                       else error.__class__.__name__, retry=True)
+                else:
+                    _finish_extraction(by_id[row_id], error=f"{error.__class__.__name__}: {error}")
+            db.session.commit()
+            if stale or batch:
+                app.logger.info(f"Document extraction: reset {stale} stale, processed {len(batch)}")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Document extraction error: {str(e)}")
+            raise
+
+def _run_retention_sweep(dry_run):
+    report = retention.sweep(db.session, document_store, app.config['UPLOAD_FOLDER'], EVIDENCE_RETENTION_DAYS,
+                             dry_run=dry_run, enforce=RETENTION_ENFORCE, min_age_seconds=RETENTION_MIN_AGE_SECONDS)
+    run = retention.record(db.session, report)
+    db.session.commit()
+    return run, report
+
+def _retention_sweep():
+    """Scheduled retention / orphan GC sweep."""
+    with app.app_context():
+        try:
+            run, report = _run_retention_sweep(RETENTION_DRY_RUN)
+            app.logger.info(
+                f"Retention sweep{' (dry run)' if report.dry_run else ''}: {report.scanned_files} files "
+                f"({report.files_per_second} files/s), {report.orphan_files} orphaned, "
+                f"{report.expired_documents} expired, {report.missing_files} missing, "
+                f"{report.reclaimed_bytes} bytes reclaimed"
+            )
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Retention sweep error: {str(e)}")
+            raise
+
+jobs = JobRegistry()
+jobs.register('calendar_reminders', _check_calendar_reminders, 60)
+jobs.register('email_queue_processor', _process_email_queue, 60)
+jobs.register('intake_job_requeue', _requeue_stale_intake_jobs, 60)
+jobs.register('dashboard_stats_reconcile', _reconcile_dashboard_stats, DASHBOARD_RECONCILE_MINUTES * 60)
+jobs.register('transcript_poller', _poll_transcripts, TRANSCRIPT_POLL_SECONDS)
+jobs.register('document_extraction', _extract_documents, DOCUMENT_EXTRACTION_SECONDS)
+jobs.register('retention_sweep', _retention_sweep, RETENTION_SWEEP_SECONDS)
+
+def make_worker():
+    return Worker(app, jobs, LeaderLease(ttl_seconds=SCHEDULER_LEASE_SECONDS))
+
+_worker = None
+def _start_scheduler_once():
+    global _worker
+    if _worker is None:
+        _worker = make_worker()
+        _worker.start_background()
+
+# Dev server (reloader main process) or explicit opt-in; the DB lease keeps a
+# separately running worker from scheduling the same jobs
+if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or RUN_JOBS_IN_WEB:
+    try:
+        _start_scheduler_once()
+        app.logger.info('Background job worker started in web process.')
+    except Exception as e:
+        app.logger.error(f'Failed to start job worker: {str(e)}')
+
+@app.route('/api/admin/jobs', methods=['GET'])
+@requires_auth
+def api_admin_jobs():
+    """Registered jobs with run-time metrics recorded by whichever worker ran them, and the current leader."""
+    try:
+        stats = {s.name: s.to_dict() for s in JobStat.query.all()}
+        lease = db.session.get(SchedulerLease, 'scheduler')
+        items = []
+        for job in jobs.jobs.values():
+            item = stats.pop(job.name, {'name': job.name, 'runs': 0})
+            item['interval_seconds'] = job.interval_seconds
+            items.append(item)
+        items.extend(stats.values())
+        return jsonify({
+            'jobs': items,
+            'leader': {
+                'holder': lease.holder,
+                'expires_at': lease.expires_at.isoformat(),
+                'active': lease.expires_at > datetime.utcnow(),
+            } if lease else None,
+        })
+    except Exception as e:
+        app.logger.error(f"Error in api_admin_jobs: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
+@app.route('/api/admin/analyzer/metrics', methods=['GET'])
+@requires_auth
+def api_admin_analyzer_metrics():
+    """Analyzer latency histogram from AnalyzerLog over ?hours (default 24), plus this process's
+    provider circuit breakers, per-operation HTTP latency and audio upload throughput."""
+    try:
+        hours = max(1, min(int(request.args.get('hours', 24)), 24 * 30))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'invalid hours'}), 400
+    try:
+        since = datetime.utcnow() - timedelta(hours=hours)
+        rows = (db.session.query(AnalyzerLog.provider, AnalyzerLog.latency_bucket, AnalyzerLog.succeeded,
+                                 db.func.count(AnalyzerLog.id), db.func.avg(AnalyzerLog.latency_ms))
+                .filter(AnalyzerLog.created_at >= since)
+                .group_by(AnalyzerLog.provider, AnalyzerLog.latency_bucket, AnalyzerLog.succeeded)
+                .all())
+        analyzers = {}
+        for provider, bucket, succeeded, count, avg_ms in rows:
+            item = analyzers.setdefault(provider, {'provider': provider, 'count': 0, 'errors': 0, 'buckets': {}, '_total': 0.0})
+            item['count'] += count
+            item['errors'] += 0 if succeeded else count
+            item['_total'] += float(avg_ms or 0) * count
+            label = bucket or 'unknown'
+            item['buckets'][label] = item['buckets'].get(label, 0) + count
+        for item in analyzers.values():
+            item['avg_ms'] = round(item.pop('_total') / item['count'], 2) if item['count'] else None
+        return jsonify({
+            'hours': hours,
+            'analyzers': list(analyzers.values()),
+            'provider': provider_http.metrics(),
+            'audio_uploads': audio_upload.upload_stats.snapshot(),
+        })
+    except Exception as e:
+        app.logger.error(f"Error in api_admin_analyzer_metrics: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
+@app.route('/api/admin/documents/extraction', methods=['GET'])
+@requires_auth
+def api_admin_document_extraction():
+    """Extraction backlog by status with the oldest pending age, and per-kind throughput of
+    documents finished in the last ?hours (default 24)."""
+    try:
+        hours = max(1, min(int(request.args.get('hours', 24)), 24 * 30))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'invalid hours'}), 400
+    try:
+        now = datetime.utcnow()
+        backlog = dict(db.session.query(DocumentExtraction.status, db.func.count(DocumentExtraction.id))
+                       .group_by(DocumentExtraction.status).all())
+        oldest = (db.session.query(db.func.min(DocumentExtraction.created_at))
+                  .filter(DocumentExtraction.status == 'pending').scalar())
+        rows = (db.session.query(DocumentExtraction.kind, DocumentExtraction.status,
+                                 db.func.count(DocumentExtraction.id), db.func.sum(DocumentExtraction.duration_ms),
+                                 db.func.sum(DocumentExtraction.source_bytes))
+                .filter(DocumentExtraction.finished_at >= now - timedelta(hours=hours),
+                        DocumentExtraction.status.in_(('done', 'failed')))
+                .group_by(DocumentExtraction.kind, DocumentExtraction.status)
+                .all())
+        kinds = {}
+        for kind, status, count, total_ms, total_bytes in rows:
+            item = kinds.setdefault(kind, {'kind': kind, 'done': 0, 'failed': 0, '_ms': 0.0, 'bytes': 0})
+            item[status] += count
+            if status == 'done':
+                item['_ms'] += float(total_ms or 0)
+                item['bytes'] += int(total_bytes or 0)
+        for item in kinds.values():
+            total_ms = item.pop('_ms')
+            item['avg_ms'] = round(total_ms / item['done'], 2) if item['done'] else None
+            # Per worker: bytes parsed per second of extraction time
+            item['bytes_per_second'] = round(item['bytes'] / (total_ms / 1000.0), 1) if total_ms else None
+        done = sum(item['done'] for item in kinds.values())
+        return jsonify({
+            'hours': hours,
+            'backlog': {status: backlog.get(status, 0) for status in ('pending', 'processing', 'done', 'failed', 'skipped')},
+            'oldest_pending_seconds': round((now - oldest).total_seconds(), 1) if oldest else None,
+            'finished_per_hour': round(done / hours, 2),
+            'kinds': list(kinds.values()),
+            'workers': document_extract.DOCUMENT_EXTRACT_WORKERS,
+            'batch': DOCUMENT_EXTRACTION_BATCH,
+            'interval_seconds': DOCUMENT_EXTRACTION_SECONDS,
+        })
+    except Exception as e:
+        app.logger.error(f"Error in api_admin_document_extraction: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
+@app.route('/api/admin/retention', methods=['GET'])
+@requires_auth
+def api_admin_retention():
+    """Recent retention sweeps (newest first, ?limit default 20) and the current settings."""
+    try:
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        runs = RetentionRun.query.order_by(RetentionRun.started_at.desc()).limit(limit).all()
+        return jsonify({
+            'settings': {
+                'retention_days': EVIDENCE_RETENTION_DAYS,
+                'enforce_retention': RETENTION_ENFORCE,
+                'dry_run': RETENTION_DRY_RUN,
+                'min_age_seconds': RETENTION_MIN_AGE_SECONDS,
+                'interval_seconds': RETENTION_SWEEP_SECONDS,
+            },
+            'runs': [r.to_dict() for r in runs],
+        })
+    except Exception as e:
+        app.logger.error(f"Error in api_admin_retention: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
+@app.route('/api/admin/retention/sweep', methods=['POST'])
+@requires_auth
+def api_admin_retention_sweep():
+    """Run a sweep now. Dry run unless ?dry_run=false; returns the full report."""
+    try:
+        dry_run = (request.args.get('dry_run', 'true').strip().lower() != 'false')
+        run, report = _run_retention_sweep(dry_run)
+        return jsonify({'id': run.id, **report.to_dict()})
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error in api_admin_retention_sweep: {str(e)}")
+        return jsonify({'error': 'failed'}), 500
+
 # Error handlers
 @app.errorhandler(404)
 def not_found_error(error):
@@ -0,0 +1,94 @@
+"""
+Throughput benchmark: streamed case export (services/case_export.iter_zip)
+over a synthetic case of document files, 1 GB by default.
+
+Usage: python benchmarks/bench_case_export.py [--mb 1024] [--files 64] [--mix stored deflated] [--verify]
+"""
+import argparse
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.case_export import Entry, file_chunks, iter_zip  # noqa: E402
+
+WORDS = ("plaintiff defendant hearing deposition exhibit motion settlement invoice "
+         "medical records employer insurer claim notice lease eviction").split()
+
+
+def make_case(folder, mb, files, kind, seed=7):
+    """``files`` documents totalling ``mb`` MB: random bytes (PDF-like) or text."""
+    rnd = random.Random(seed)
+    per_file = mb * 1024 * 1024 // files
+    paths = []
+    for i in range(files):
+        ext = '.pdf' if kind == 'stored' else '.txt'
+        path = os.path.join(folder, f"doc{i}{ext}")
+        with open(path, 'wb') as f:
+            left = per_file
+            while left > 0:
+                n = min(left, 1024 * 1024)
+                if kind == 'stored':
+                    f.write(os.urandom(n))
+                else:
+                    f.write((' '.join(rnd.choice(WORDS) for _ in range(n // 6 + 1))).encode()[:n])
+                left -= n
+        paths.append(path)
+    return paths
+
+
+def entries(paths):
+    for i, path in enumerate(paths):
+        yield Entry(f"documents/{i}-{os.path.basename(path)}", lambda path=path: file_chunks(path),
+                    os.path.getsize(path), compress=path.endswith('.txt'))
+
+
+def run(paths, out=None):
+    started = time.perf_counter()
+    total = biggest = 0
+    for chunk in iter_zip(entries(paths)):
+        total += len(chunk)
+        biggest = max(biggest, len(chunk))
+        if out is not None:
+            out.write(chunk)
+    return time.perf_counter() - started, total, biggest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mb', type=int, default=1024)
+    parser.add_argument('--files', type=int, default=64)
+    parser.add_argument('--mix', nargs='+', choices=('stored', 'deflated'), default=['stored', 'deflated'])
+    parser.add_argument('--verify', action='store_true', help='write the archive to disk and check every CRC')
+    args = parser.parse_args()
+
+    print(f"{'kind':>9} {'input MB':>9} {'zip MB':>8} {'seconds':>8} {'MB/s':>8} {'max chunk KB':>13} {'RSS MB':>7}")
+    for kind in args.mix:
+        folder = tempfile.mkdtemp(prefix='bench-export-')
+        try:
+            paths = make_case(folder, args.mb, args.files, kind)
+            size = sum(os.path.getsize(p) for p in paths)
+            if args.verify:
+                archive = os.path.join(folder, 'export.zip')
+                with open(archive, 'wb') as out:
+                    seconds, total, biggest = run(paths, out)
+                with zipfile.ZipFile(archive) as zf:
+                    assert zf.testzip() is None
+                    assert sum(i.file_size for i in zf.infolist()) == size
+            else:
+                seconds, total, biggest = run(paths)
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+            print(f"{kind:>9} {size / 2**20:>9.0f} {total / 2**20:>8.0f} {seconds:>8.2f} "
+                  f"{size / 2**20 / seconds:>8.1f} {biggest / 1024:>13.0f} {rss:>7.0f}")
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
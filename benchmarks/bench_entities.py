@@ -0,0 +1,97 @@
+"""
+Micro-benchmark: legacy per-pattern entity extraction vs. the single-pass
+EntityExtractor on multi-kilobyte transcript text.
+
+Usage: python benchmarks/bench_entities.py [--kb 4 16 64] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.entities import ENTITY_PATTERNS, EntityExtractor  # noqa: E402
+
+# Verbatim copy of utils.extract_entities / extract_relative_dates before the
+# single-pass extractor, kept here as the baseline.
+LEGACY_PATTERNS = {
+    'dates': r'\b(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}\b|\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',
+    'emails': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    'phone_numbers': r'\b(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b',
+    'amounts': r'\$\d+(?:\.\d{1,2})?\b|\b\d+\s*(?:dollars|USD)\b',
+    'locations': r'\b(?:\d+\s+[\w\s]+,?\s+[A-Z]{2}\s+\d{5}\b|\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:Street|St\.?|Avenue|Ave\.?|Road|Rd\.?|Boulevard|Blvd\.?|Lane|Ln\.?|Drive|Dr\.?|Court|Ct\.?|Way|Terrace|Trl\.?|Trail|Plaza|Pl\.?|Square|Sq\.?|Circle|Cir\.?|Highway|Hwy\.?|Freeway|Fwy\.?|Turnpike|Tpke\.?|Parkway|Pkwy\.?|Alley|Aly\.?|Bend|Bnd\.?|Cove|Cv\.?|Creek|Crk\.?|Grove|Grv\.?|Hollow|Hlw\.?|Island|Isl\.?|Junction|Jct\.?|Knoll|Knl\.?|Meadow|Mdw\.?|Mountain|Mtn\.?|Oval|Ovl\.?|Path|Pth\.?|Ridge|Rdg\.?|Run|Rn\.?|Spring|Spg\.?|Summit|Smt\.?|View|Vw\.?|Village|Vlg\.?|Way|Wy\.?))\b',
+}
+LEGACY_RELATIVE = [
+    r"yesterday",
+    r"last\s+(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)",
+    r"last\s+week",
+    r"last\s+month",
+    r"\b\d{1,2}\s*(?:am|pm)\b",
+]
+
+
+def legacy_extract(text):
+    entities = {}
+    for entity_type, pattern in LEGACY_PATTERNS.items():
+        matches = re.findall(pattern, text, re.IGNORECASE)
+        if matches:
+            entities[entity_type] = list(set(matches))
+    found = []
+    for pat in LEGACY_RELATIVE:
+        found.extend(re.findall(pat, text, flags=re.IGNORECASE))
+    return entities, list(set(found))
+
+
+SENTENCES = [
+    "Yesterday around 3 pm I slipped on water in the produce aisle at Walmart.",
+    "The store is at 1200 Oak Street and I was taken to St. Mary's hospital.",
+    "My email is jane.doe@example.com and my cell is (555) 123-4567.",
+    "The ER bill came to $4,250.75 and physical therapy was 1800 dollars so far.",
+    "The accident happened on March 3rd, 2024 at the intersection near Elm Avenue.",
+    "The other driver ran the red light; his insurer is Geico, claim filed 03/05/2024.",
+    "Last week my employer cut my hours after I complained about harassment.",
+    "Please mail records to 45 Maple Rd, Springfield IL 62704 before last month ends.",
+    "I don't remember much else, my back and knee still hurt every morning.",
+    "She said there was no wet floor sign and nobody came to help for a while.",
+]
+
+
+def make_transcript(kb, seed=7):
+    rnd = random.Random(seed)
+    parts, size = [], 0
+    while size < kb * 1024:
+        s = rnd.choice(SENTENCES)
+        parts.append(s)
+        size += len(s) + 1
+    return ' '.join(parts)
+
+
+def chunked(text, size):
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--kb', type=int, nargs='+', default=[4, 16, 64])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    extractor = EntityExtractor(ENTITY_PATTERNS)
+    print(f"{'size':>7} {'legacy ms':>10} {'single ms':>10} {'stream ms':>10} {'speedup':>8}")
+    for kb in args.kb:
+        text = make_transcript(kb)
+        # Streaming must agree with the one-shot scan
+        assert list(extractor.stream(chunked(text, 4096))) == list(extractor.finditer(text))
+        legacy = timeit.timeit(lambda: legacy_extract(text), number=args.repeat) / args.repeat
+        single = timeit.timeit(lambda: extractor.extract(text), number=args.repeat) / args.repeat
+        stream = timeit.timeit(lambda: sum(1 for _ in extractor.stream(chunked(text, 4096))),
+                               number=args.repeat) / args.repeat
+        print(f"{kb:>5}KB {legacy * 1e3:>10.2f} {single * 1e3:>10.2f} {stream * 1e3:>10.2f} {legacy / single:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,181 +1,180 @@
+import hashlib
 import os
-import shutil
-import uuid
+import tempfile
+import time
 from datetime import datetime
-from pathlib import Path
-from typing import Dict, List, Optional, Tuple, BinaryIO
+from typing import BinaryIO, Dict, NamedTuple, Optional
 from werkzeug.utils import secure_filename
 
+
+class StoredBlob(NamedTuple):
+    sha256: str
+    size: int
+    path: str
+
+
 class DocumentService:
-    """Handles document storage and management."""
-    
-    def __init__(self, base_upload_folder: str = None):
+    """Content-addressed document storage.
+
+    Every document body (uploads, generated letters) is stored once under the
+    SHA-256 of its bytes in a sharded tree, ``blobs/ab/cd/abcd...``, so
+    identical files shared by several cases take the space of one and no
+    directory grows beyond a few hundred entries. Writes stream through a
+    temporary file in the same tree while hashing and are renamed into place
+    atomically, so a reader never sees a partial blob.
+    """
+
+    def __init__(self, base_upload_folder: str = None, buffer_size: int = 1024 * 1024):
         """
         Initialize the document service.
-        
+
         Args:
-            base_upload_folder: Base directory for storing uploaded files. 
+            base_upload_folder: Base directory for storing uploaded files.
                               Defaults to 'uploads' in the current directory.
+            buffer_size: Read/write buffer size used when storing a stream.
         """
         self.base_upload_folder = base_upload_folder or os.path.join(
             os.path.dirname(os.path.abspath(__file__)), 'uploads'
         )
-        self._ensure_directory_exists(self.base_upload_folder)
-    
+        self.blob_folder = os.path.join(self.base_upload_folder, 'blobs')
+        self.tmp_folder = os.path.join(self.blob_folder, 'tmp')
+        self.buffer_size = buffer_size
+        self._ensure_directory_exists(self.tmp_folder)
+
     def _ensure_directory_exists(self, path: str) -> None:
         """Ensure a directory exists, create it if it doesn't."""
         os.makedirs(path, exist_ok=True)
-    
-    def _get_case_folder(self, case_id: int) -> str:
-        """Get the folder path for a specific case."""
-        return os.path.join(self.base_upload_folder, str(case_id))
-    
+
+    def blob_path(self, sha256: str) -> str:
+        """Path of the blob with the given hex digest (two levels of two-character shards)."""
+        return os.path.join(self.blob_folder, sha256[:2], sha256[2:4], sha256)
+
+    def store_stream(self, file_stream: BinaryIO) -> StoredBlob:
+        """
+        Store the contents of a stream, deduplicated by SHA-256.
+
+        Args:
+            file_stream: File-like object positioned at the start of the data
+
+        Returns:
+            The blob's digest, size and path
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_folder, prefix='upload-')
+        try:
+            with open(fd, 'wb', buffering=self.buffer_size) as out:
+                while True:
+                    chunk = file_stream.read(self.buffer_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            sha256 = digest.hexdigest()
+            path = self.blob_path(sha256)
+            if os.path.exists(path):
+                # Already stored; refresh mtime so a concurrent delete_blob leaves it alone
+                os.remove(tmp_path)
+                os.utime(path)
+            else:
+                self._ensure_directory_exists(os.path.dirname(path))
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return StoredBlob(sha256, size, path)
+
+    def store_bytes(self, data: bytes) -> StoredBlob:
+        """Store an in-memory body (e.g. a generated letter)."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(sha256)
+        if os.path.exists(path):
+            os.utime(path)
+            return StoredBlob(sha256, len(data), path)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_folder, prefix='upload-')
+        try:
+            with open(fd, 'wb') as out:
+                out.write(data)
+            self._ensure_directory_exists(os.path.dirname(path))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return StoredBlob(sha256, len(data), path)
+
     def save_document(
-        self, 
-        file_stream: BinaryIO, 
-        filename: str, 
-        case_id: int, 
+        self,
+        file_stream: BinaryIO,
+        filename: str,
+        case_id: int,
         user_id: int,
         metadata: Optional[Dict] = None
     ) -> Dict:
         """
         Save an uploaded document.
-        
+
         Args:
             file_stream: File-like object containing the file data
             filename: Original filename
             case_id: ID of the case this document belongs to
             user_id: ID of the user uploading the document
             metadata: Additional metadata to store with the document
-            
+
         Returns:
             Dict containing document metadata
         """
-        # Sanitize filename and generate a unique one
         original_filename = secure_filename(filename)
         file_ext = os.path.splitext(original_filename)[1].lower()
-        unique_filename = f"{uuid.uuid4().hex}{file_ext}"
-        
-        # Create case-specific directory if it doesn't exist
-        case_folder = self._get_case_folder(case_id)
-        self._ensure_directory_exists(case_folder)
-        
-        # Save the file
-        file_path = os.path.join(case_folder, unique_filename)
-        with open(file_path, 'wb') as f:
-            # Read the file in chunks to handle large files
-            chunk_size = 4096
-            while True:
-                chunk = file_stream.read(chunk_size)
-                if not chunk:
-                    break
-                f.write(chunk)
-        
-        # Prepare document metadata
-        file_stat = os.stat(file_path)
-        
+        blob = self.store_stream(file_stream)
         return {
             'original_filename': original_filename,
-            'stored_filename': unique_filename,
-            'file_path': file_path,
-            'file_size': file_stat.st_size,
+            'stored_filename': blob.sha256,
+            'sha256': blob.sha256,
+            'file_path': blob.path,
+            'file_size': blob.size,
             'file_type': file_ext.lstrip('.').upper(),
             'uploaded_at': datetime.utcnow(),
             'uploaded_by': user_id,
             'case_id': case_id,
             'metadata': metadata or {}
         }
-    
-    def get_document_path(self, case_id: int, filename: str) -> Optional[str]:
+
+    def get_document_path(self, sha256: str) -> Optional[str]:
         """
         Get the full path to a stored document.
-        
+
         Args:
-            case_id: ID of the case the document belongs to
-            filename: Name of the file (as stored in the system)
-            
+            sha256: Hex digest the document was stored under
+
         Returns:
             Full path to the document or None if not found
         """
-        file_path = os.path.join(self._get_case_folder(case_id), filename)
+        file_path = self.blob_path(sha256)
         return file_path if os.path.exists(file_path) else None
-    
-    def delete_document(self, case_id: int, filename: str) -> bool:
+
+    def delete_blob(self, sha256: str, min_age_seconds: float = 60) -> bool:
         """
-        Delete a document.
-        
+        Delete a blob that no document references any more.
+
+        Blobs written or re-stored within ``min_age_seconds`` are kept: an
+        upload of the same bytes may be about to reference them.
+
         Args:
-            case_id: ID of the case the document belongs to
-            filename: Name of the file to delete
-            
+            sha256: Hex digest of the blob
+
         Returns:
-            True if deletion was successful, False otherwise
+            True if the blob was deleted, False otherwise
         """
-        file_path = self.get_document_path(case_id, filename)
+        file_path = self.get_document_path(sha256)
         if not file_path:
             return False
-            
         try:
+            if time.time() - os.path.getmtime(file_path) < min_age_seconds:
+                return False
             os.remove(file_path)
             return True
         except OSError:
             return False
-    
-    def list_case_documents(self, case_id: int) -> List[Dict]:
-        """
-        List all documents for a specific case.
-        
-        Args:
-            case_id: ID of the case
-            
-        Returns:
-            List of document metadata dictionaries
-        """
-        case_folder = self._get_case_folder(case_id)
-        if not os.path.exists(case_folder):
-            return []
-            
-        documents = []
-        for filename in os.listdir(case_folder):
-            file_path = os.path.join(case_folder, filename)
-            if os.path.isfile(file_path):
-                file_stat = os.stat(file_path)
-                documents.append({
-                    'filename': filename,
-                    'original_filename': filename,  # In a real app, you'd get this from the database
-                    'file_size': file_stat.st_size,
-                    'created_at': datetime.fromtimestamp(file_stat.st_ctime),
-                    'modified_at': datetime.fromtimestamp(file_stat.st_mtime)
-                })
-                
-        return documents
-    
-    def get_document_metadata(self, case_id: int, filename: str) -> Optional[Dict]:
-        """
-        Get metadata for a specific document.
-        
-        Args:
-            case_id: ID of the case the document belongs to
-            filename: Name of the file
-            
-        Returns:
-            Document metadata or None if not found
-        """
-        file_path = self.get_document_path(case_id, filename)
-        if not file_path:
-            return None
-            
-        file_stat = os.stat(file_path)
-        
-        return {
-            'filename': filename,
-            'original_filename': filename,  # In a real app, you'd get this from the database
-            'file_path': file_path,
-            'file_size': file_stat.st_size,
-            'created_at': datetime.fromtimestamp(file_stat.st_ctime),
-            'modified_at': datetime.fromtimestamp(file_stat.st_mtime),
-            'file_type': os.path.splitext(filename)[1].lstrip('.').upper()
-        }
-
-# Create a singleton instance
-document_service = DocumentService()
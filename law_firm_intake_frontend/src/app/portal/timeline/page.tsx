@@ -12,7 +12,7 @@ export default function PortalTimelinePage() {
   const [items, setItems] = useState<TimelineItem[]>([]);
   const [error, setError] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
-  const [page, setPage] = useState(1);
+  const [cursor, setCursor] = useState<string | null>(null);
   const [hasMore, setHasMore] = useState(false);
   const [caseIdFilter, setCaseIdFilter] = useState<string>("");
   const [cases, setCases] = useState<Array<{ id:number; title:string }>>([]);
@@ -29,7 +29,7 @@ export default function PortalTimelinePage() {
     try {
       const params = new URLSearchParams();
       if (caseIdFilter) params.set('case_id', caseIdFilter);
-      params.set('page', String(reset ? 1 : page + 1));
+      if (!reset && cursor) params.set('cursor', cursor);
       params.set('per_page', '25');
       const qs = `?${params.toString()}`;
       const res = await fetch(`/api/portal/timeline${qs}`, { cache: "no-store" });
@@ -38,11 +38,10 @@ export default function PortalTimelinePage() {
       const newItems = Array.isArray(data?.items) ? data.items : [];
       if (reset) {
         setItems(newItems);
-        setPage(1);
       } else {
         setItems(prev => [...prev, ...newItems]);
-        setPage(p => p + 1);
       }
+      setCursor(data?.next_cursor ?? null);
       setHasMore(!!data?.has_more);
     } catch (e:any) {
       setError(e?.message || "Failed to load timeline");
@@ -0,0 +1,146 @@
+"""hot path indexes; analysis cache, intake job and dashboard stat tables
+
+First revision: this is where the schema starts being tracked by Alembic.
+The base schema is created by ``db.create_all()`` at app start, which also
+creates new tables and indexes on a fresh database but never alters existing
+ones, so every step here checks what already exists.
+
+It also backfills the schema added before Alembic was set up, which shipped
+without a revision of its own:
+
+- ``analyzer_log.cache_hit`` and the ``analysis_cache`` table (analysis cache)
+- the ``intake_job`` table (async intake)
+- the ``dashboard_stat`` table (dashboard counters)
+
+``create_all()`` creates the new tables on an existing database but cannot
+add ``analyzer_log.cache_hit``, so every ``AnalyzerLog`` insert fails on a
+database created before the analysis cache until ``flask db upgrade`` runs.
+Existing deployments must run it once before starting the new code.
+
+Indexes follow the route queries: portal timeline (per-client audits,
+messages, grants, invoices, payments), keyset-paginated list APIs on
+``(created_at, id)`` / ``(start_at, id)``, the email queue poller, upcoming
+deadlines and running timers.
+
+Revision ID: 3c7e1a9d4b20
+Revises:
+Create Date: 2026-10-16 23:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c7e1a9d4b20'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+PENDING = sa.text("status = 'pending'")
+
+# (name, table, columns, extra kwargs)
+INDEXES = [
+    ('ix_case_client_id_created_at', 'case', ['client_id', 'created_at'], {}),
+    ('ix_case_status_created_at', 'case', ['status', 'created_at'], {}),
+    ('ix_case_created_at_id', 'case', ['created_at', 'id'], {}),
+    ('ix_action_created_at_id', 'action', ['created_at', 'id'], {}),
+    ('ix_action_status', 'action', ['status'], {}),
+    ('ix_action_due_date', 'action', ['due_date'], {}),
+    ('ix_case_action_action_id', 'case_action', ['action_id'], {}),
+    ('ix_deadline_case_id_due_date', 'deadline', ['case_id', 'due_date'], {}),
+    ('ix_deadline_due_date', 'deadline', ['due_date'], {}),
+    ('ix_client_message_client_case_created', 'client_message', ['client_id', 'case_id', 'created_at'], {}),
+    ('ix_client_document_access_client_granted', 'client_document_access', ['client_id', 'granted_at'], {}),
+    ('ix_email_queue_created_at_id', 'email_queue', ['created_at', 'id'], {}),
+    ('ix_email_queue_status_created_at', 'email_queue', ['status', 'created_at', 'id'], {}),
+    ('ix_email_queue_pending_send_after', 'email_queue', ['send_after'],
+     {'sqlite_where': PENDING, 'postgresql_where': PENDING}),
+    ('ix_calendar_event_start_at_id', 'calendar_event', ['start_at', 'id'], {}),
+    ('ix_time_entry_user_id_end_time', 'time_entry', ['user_id', 'end_time'], {}),
+    ('ix_document_case_id_created_at', 'document', ['case_id', 'created_at'], {}),
+    ('ix_document_created_at_id', 'document', ['created_at', 'id'], {}),
+    ('ix_client_created_at_id', 'client', ['created_at', 'id'], {}),
+    ('ix_case_status_audit_case_id_created_at', 'case_status_audit', ['case_id', 'created_at'], {}),
+    ('ix_invoice_client_id_case_id', 'invoice', ['client_id', 'case_id'], {}),
+    ('ix_payment_invoice_id', 'payment', ['invoice_id'], {}),
+]
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def upgrade():
+    insp = _inspector()
+    tables = set(insp.get_table_names())
+
+    if 'analyzer_log' in tables and 'cache_hit' not in {c['name'] for c in insp.get_columns('analyzer_log')}:
+        with op.batch_alter_table('analyzer_log') as batch_op:
+            batch_op.add_column(sa.Column('cache_hit', sa.String(length=20), nullable=True))
+
+    if 'analysis_cache' not in tables:
+        op.create_table(
+            'analysis_cache',
+            sa.Column('key', sa.String(length=64), primary_key=True),
+            sa.Column('provider', sa.String(length=50), nullable=False),
+            sa.Column('model', sa.String(length=100), nullable=True),
+            sa.Column('prompt_version', sa.String(length=64), nullable=True),
+            sa.Column('result', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_analysis_cache_expires_at', 'analysis_cache', ['expires_at'])
+
+    if 'intake_job' not in tables:
+        op.create_table(
+            'intake_job',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('idempotency_key', sa.String(length=191), nullable=True, unique=True),
+            sa.Column('mode', sa.String(length=20), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('stage', sa.String(length=50), nullable=True),
+            sa.Column('payload', sa.Text(), nullable=False),
+            sa.Column('result', sa.Text(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('attempts', sa.Integer(), nullable=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=True),
+            sa.Column('case_id', sa.Integer(), sa.ForeignKey('case.id'), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_intake_job_status', 'intake_job', ['status'])
+
+    if 'dashboard_stat' not in tables:
+        op.create_table(
+            'dashboard_stat',
+            sa.Column('key', sa.String(length=50), primary_key=True),
+            sa.Column('value', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+
+    insp = _inspector()
+    tables = set(insp.get_table_names())
+    for name, table, columns, kwargs in INDEXES:
+        if table not in tables:
+            continue
+        if name in {ix['name'] for ix in insp.get_indexes(table)}:
+            continue
+        op.create_index(name, table, columns, **kwargs)
+
+
+def downgrade():
+    insp = _inspector()
+    tables = set(insp.get_table_names())
+    for name, table, _, _ in reversed(INDEXES):
+        if table in tables and name in {ix['name'] for ix in insp.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
+    for table in ('dashboard_stat', 'intake_job', 'analysis_cache'):
+        if table in tables:
+            op.drop_table(table)
+    if 'analyzer_log' in tables and 'cache_hit' in {c['name'] for c in insp.get_columns('analyzer_log')}:
+        with op.batch_alter_table('analyzer_log') as batch_op:
+            batch_op.drop_column('cache_hit')
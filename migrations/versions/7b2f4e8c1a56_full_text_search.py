@@ -0,0 +1,54 @@
+"""full-text search index
+
+SQLite: FTS5 virtual table ``search_index``. PostgreSQL: ``search_document``
+with a generated, weighted ``tsvector`` column and a GIN index. Rows are
+written by the app: ``services.search.SearchIndex.ensure`` backfills at
+start when it creates the index, and ``POST /api/admin/search/rebuild``
+re-indexes on demand. Run the rebuild after upgrading an existing database.
+
+Revision ID: 7b2f4e8c1a56
+Revises: 3c7e1a9d4b20
+Create Date: 2026-10-16 23:40:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2f4e8c1a56'
+down_revision = '3c7e1a9d4b20'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "kind UNINDEXED, ref_id UNINDEXED, case_id UNINDEXED, client_id UNINDEXED, title, body, "
+    "tokenize='porter unicode61', prefix='2 3')"
+)
+POSTGRES_DDL = (
+    "CREATE TABLE IF NOT EXISTS search_document ("
+    "doc_key BIGINT PRIMARY KEY, kind VARCHAR(20) NOT NULL, ref_id INTEGER NOT NULL, "
+    "case_id INTEGER, client_id INTEGER, title TEXT, body TEXT, "
+    "tsv tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(body, '')), 'B')) STORED)",
+    "CREATE INDEX IF NOT EXISTS ix_search_document_tsv ON search_document USING GIN (tsv)",
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(SQLITE_DDL)
+    elif dialect == 'postgresql':
+        for ddl in POSTGRES_DDL:
+            op.execute(ddl)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS search_index")
+    elif dialect == 'postgresql':
+        op.execute("DROP TABLE IF EXISTS search_document")
@@ -0,0 +1,54 @@
+"""email queue lease columns
+
+``locked_by`` / ``locked_until`` let several workers claim queue rows without
+sending any twice (services/email_queue.py).
+
+Revision ID: 9d1c3f5a7e42
+Revises: 7b2f4e8c1a56
+Create Date: 2026-10-17 00:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d1c3f5a7e42'
+down_revision = '7b2f4e8c1a56'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = [
+    ('locked_by', sa.String(length=64)),
+    ('locked_until', sa.DateTime()),
+]
+
+
+def _existing():
+    insp = sa.inspect(op.get_bind())
+    if 'email_queue' not in insp.get_table_names():
+        return None
+    return {c['name'] for c in insp.get_columns('email_queue')}
+
+
+def upgrade():
+    existing = _existing()
+    if existing is None:
+        return
+    missing = [(name, type_) for name, type_ in COLUMNS if name not in existing]
+    if missing:
+        with op.batch_alter_table('email_queue') as batch_op:
+            for name, type_ in missing:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+
+
+def downgrade():
+    existing = _existing()
+    if existing is None:
+        return
+    present = [name for name, _ in COLUMNS if name in existing]
+    if present:
+        with op.batch_alter_table('email_queue') as batch_op:
+            for name in present:
+                batch_op.drop_column(name)
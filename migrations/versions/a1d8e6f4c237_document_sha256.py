@@ -0,0 +1,45 @@
+"""document content hash
+
+``document.sha256`` names the blob a document's bytes are stored under
+(document_service.DocumentService); indexed for shared-blob checks. Files
+stored before the blob store keep their path and a NULL hash.
+
+Revision ID: a1d8e6f4c237
+Revises: f7c2d4a9e361
+Create Date: 2026-10-17 03:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1d8e6f4c237'
+down_revision = 'f7c2d4a9e361'
+branch_labels = None
+depends_on = None
+
+
+INDEX = 'ix_document_sha256'
+
+
+def upgrade():
+    insp = sa.inspect(op.get_bind())
+    if 'document' not in insp.get_table_names():
+        return
+    if 'sha256' not in {c['name'] for c in insp.get_columns('document')}:
+        with op.batch_alter_table('document') as batch_op:
+            batch_op.add_column(sa.Column('sha256', sa.String(length=64), nullable=True))
+    if INDEX not in {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('document')}:
+        op.create_index(INDEX, 'document', ['sha256'])
+
+
+def downgrade():
+    insp = sa.inspect(op.get_bind())
+    if 'document' not in insp.get_table_names():
+        return
+    if INDEX in {ix['name'] for ix in insp.get_indexes('document')}:
+        op.drop_index(INDEX, table_name='document')
+    if 'sha256' in {c['name'] for c in insp.get_columns('document')}:
+        with op.batch_alter_table('document') as batch_op:
+            batch_op.drop_column('sha256')
@@ -0,0 +1,79 @@
+"""calendar reminder schedule columns
+
+Adds ``calendar_event.remind_at`` (indexed) and ``last_notified_at`` and
+fills ``remind_at`` for upcoming events, using the client's notification
+preference lead time when there is one (see services/reminders.py).
+
+Revision ID: b4e6a2d8f013
+Revises: 9d1c3f5a7e42
+Create Date: 2026-10-17 00:55:00.000000
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e6a2d8f013'
+down_revision = '9d1c3f5a7e42'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = [
+    ('remind_at', sa.DateTime()),
+    ('last_notified_at', sa.DateTime()),
+]
+INDEX = 'ix_calendar_event_remind_at'
+
+
+def _backfill(bind):
+    event = sa.table('calendar_event', sa.column('id', sa.Integer), sa.column('start_at', sa.DateTime),
+                     sa.column('reminder_minutes_before', sa.Integer), sa.column('client_id', sa.Integer),
+                     sa.column('remind_at', sa.DateTime))
+    pref = sa.table('notification_preference', sa.column('id', sa.Integer), sa.column('client_id', sa.Integer),
+                    sa.column('minutes_before', sa.Integer))
+    lead = {}
+    for client_id, minutes in bind.execute(
+            sa.select(pref.c.client_id, pref.c.minutes_before)
+            .where(pref.c.client_id.isnot(None)).order_by(pref.c.id.desc())):
+        lead[client_id] = minutes
+    rows = bind.execute(
+        sa.select(event.c.id, event.c.start_at, event.c.reminder_minutes_before, event.c.client_id)
+        .where(event.c.reminder_minutes_before > 0, event.c.start_at >= datetime.utcnow(),
+               event.c.remind_at.is_(None))).all()
+    for id_, start_at, own, client_id in rows:
+        minutes = lead.get(client_id)
+        remind_at = start_at - timedelta(minutes=minutes if minutes is not None else own)
+        bind.execute(event.update().where(event.c.id == id_).values(remind_at=remind_at))
+
+
+def upgrade():
+    insp = sa.inspect(op.get_bind())
+    if 'calendar_event' not in insp.get_table_names():
+        return
+    existing = {c['name'] for c in insp.get_columns('calendar_event')}
+    missing = [(name, type_) for name, type_ in COLUMNS if name not in existing]
+    if missing:
+        with op.batch_alter_table('calendar_event') as batch_op:
+            for name, type_ in missing:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+    if INDEX not in {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('calendar_event')}:
+        op.create_index(INDEX, 'calendar_event', ['remind_at'])
+    _backfill(op.get_bind())
+
+
+def downgrade():
+    insp = sa.inspect(op.get_bind())
+    if 'calendar_event' not in insp.get_table_names():
+        return
+    if INDEX in {ix['name'] for ix in insp.get_indexes('calendar_event')}:
+        op.drop_index(INDEX, table_name='calendar_event')
+    existing = {c['name'] for c in insp.get_columns('calendar_event')}
+    present = [name for name, _ in COLUMNS if name in existing]
+    if present:
+        with op.batch_alter_table('calendar_event') as batch_op:
+            for name in present:
+                batch_op.drop_column(name)
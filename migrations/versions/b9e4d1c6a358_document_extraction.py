@@ -0,0 +1,61 @@
+"""document extraction side table
+
+``document_extraction`` holds text and thumbnails extracted from documents
+by the background job (services/document_extract.py), keyed by document id.
+Existing documents are queued as ``pending`` so the job backfills them.
+
+Revision ID: b9e4d1c6a358
+Revises: a1d8e6f4c237
+Create Date: 2026-10-17 04:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e4d1c6a358'
+down_revision = 'a1d8e6f4c237'
+branch_labels = None
+depends_on = None
+
+
+INDEX = 'ix_document_extraction_status_created_at'
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'document_extraction' not in tables:
+        op.create_table(
+            'document_extraction',
+            sa.Column('id', sa.Integer(), sa.ForeignKey('document.id'), primary_key=True),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('kind', sa.String(length=10), nullable=True),
+            sa.Column('text', sa.Text(), nullable=True),
+            sa.Column('text_chars', sa.Integer(), nullable=True),
+            sa.Column('page_count', sa.Integer(), nullable=True),
+            sa.Column('thumbnail_path', sa.String(length=500), nullable=True),
+            sa.Column('source_bytes', sa.Integer(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('attempts', sa.Integer(), nullable=True),
+            sa.Column('duration_ms', sa.Float(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+    if 'document' in tables:
+        # Also covers a table already made by db.create_all()
+        op.execute(
+            "INSERT INTO document_extraction (id, status, attempts, created_at, updated_at) "
+            "SELECT id, 'pending', 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP FROM document "
+            "WHERE id NOT IN (SELECT id FROM document_extraction)"
+        )
+    if INDEX not in {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('document_extraction')}:
+        op.create_index(INDEX, 'document_extraction', ['status', 'created_at'])
+
+
+def downgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'document_extraction' in tables:
+        op.drop_table('document_extraction')
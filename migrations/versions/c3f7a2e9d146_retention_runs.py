@@ -0,0 +1,51 @@
+"""retention sweep runs
+
+``retention_run`` records each retention / orphan GC sweep of the upload
+tree with its metrics (services/retention.py).
+
+Revision ID: c3f7a2e9d146
+Revises: b9e4d1c6a358
+Create Date: 2026-10-17 05:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f7a2e9d146'
+down_revision = 'b9e4d1c6a358'
+branch_labels = None
+depends_on = None
+
+
+INDEX = 'ix_retention_run_started_at'
+
+
+def upgrade():
+    if 'retention_run' not in set(sa.inspect(op.get_bind()).get_table_names()):
+        op.create_table(
+            'retention_run',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('started_at', sa.DateTime(), nullable=False),
+            sa.Column('duration_ms', sa.Float(), nullable=True),
+            sa.Column('dry_run', sa.Boolean(), nullable=False),
+            sa.Column('enforce_retention', sa.Boolean(), nullable=False),
+            sa.Column('scanned_files', sa.Integer(), nullable=False),
+            sa.Column('files_per_second', sa.Float(), nullable=True),
+            sa.Column('orphan_files', sa.Integer(), nullable=False),
+            sa.Column('orphan_bytes', sa.BigInteger(), nullable=False),
+            sa.Column('expired_documents', sa.Integer(), nullable=False),
+            sa.Column('expired_bytes', sa.BigInteger(), nullable=False),
+            sa.Column('missing_files', sa.Integer(), nullable=False),
+            sa.Column('reclaimed_bytes', sa.BigInteger(), nullable=False),
+            sa.Column('errors', sa.Integer(), nullable=False),
+            sa.Column('details', sa.Text(), nullable=True),
+        )
+    if INDEX not in {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('retention_run')}:
+        op.create_index(INDEX, 'retention_run', ['started_at'])
+
+
+def downgrade():
+    if 'retention_run' in set(sa.inspect(op.get_bind()).get_table_names()):
+        op.drop_table('retention_run')
@@ -0,0 +1,52 @@
+"""scheduler lease and job stats tables
+
+``scheduler_lease`` elects the one worker that runs scheduled jobs;
+``job_stat`` holds per-job run-time metrics (services/jobs.py).
+
+Revision ID: c8a1f7e3d925
+Revises: b4e6a2d8f013
+Create Date: 2026-10-17 01:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8a1f7e3d925'
+down_revision = 'b4e6a2d8f013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'scheduler_lease' not in tables:
+        op.create_table(
+            'scheduler_lease',
+            sa.Column('name', sa.String(length=50), primary_key=True),
+            sa.Column('holder', sa.String(length=128), nullable=False),
+            sa.Column('acquired_at', sa.DateTime(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+        )
+    if 'job_stat' not in tables:
+        op.create_table(
+            'job_stat',
+            sa.Column('name', sa.String(length=50), primary_key=True),
+            sa.Column('runs', sa.Integer(), nullable=False),
+            sa.Column('failures', sa.Integer(), nullable=False),
+            sa.Column('last_started_at', sa.DateTime(), nullable=True),
+            sa.Column('last_duration_ms', sa.Float(), nullable=True),
+            sa.Column('total_duration_ms', sa.Float(), nullable=False),
+            sa.Column('max_duration_ms', sa.Float(), nullable=True),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('worker', sa.String(length=128), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for table in ('job_stat', 'scheduler_lease'):
+        if table in tables:
+            op.drop_table(table)
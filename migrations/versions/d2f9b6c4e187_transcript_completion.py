@@ -0,0 +1,66 @@
+"""transcript completion tracking
+
+Adds error/result storage and poller scheduling columns to ``transcript``
+so status endpoints can answer from the database (services/transcripts.py).
+Outstanding rows get ``next_poll_at`` = now so the poller picks them up.
+
+Revision ID: d2f9b6c4e187
+Revises: c8a1f7e3d925
+Create Date: 2026-10-17 02:10:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f9b6c4e187'
+down_revision = 'c8a1f7e3d925'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = [
+    ('error', sa.Text()),
+    ('result', sa.Text()),
+    ('next_poll_at', sa.DateTime()),
+    ('poll_attempts', sa.Integer()),
+    ('completed_at', sa.DateTime()),
+]
+INDEX = 'ix_transcript_status_next_poll_at'
+
+
+def upgrade():
+    insp = sa.inspect(op.get_bind())
+    if 'transcript' not in insp.get_table_names():
+        return
+    existing = {c['name'] for c in insp.get_columns('transcript')}
+    missing = [(name, type_) for name, type_ in COLUMNS if name not in existing]
+    if missing:
+        with op.batch_alter_table('transcript') as batch_op:
+            for name, type_ in missing:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+    if INDEX not in {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('transcript')}:
+        op.create_index(INDEX, 'transcript', ['status', 'next_poll_at'])
+    transcript = sa.table('transcript', sa.column('status', sa.String), sa.column('next_poll_at', sa.DateTime))
+    op.get_bind().execute(
+        transcript.update()
+        .where(transcript.c.status.in_(('queued', 'processing')), transcript.c.next_poll_at.is_(None))
+        .values(next_poll_at=datetime.utcnow())
+    )
+
+
+def downgrade():
+    insp = sa.inspect(op.get_bind())
+    if 'transcript' not in insp.get_table_names():
+        return
+    if INDEX in {ix['name'] for ix in insp.get_indexes('transcript')}:
+        op.drop_index(INDEX, table_name='transcript')
+    existing = {c['name'] for c in insp.get_columns('transcript')}
+    present = [name for name, _ in COLUMNS if name in existing]
+    if present:
+        with op.batch_alter_table('transcript') as batch_op:
+            for name in present:
+                batch_op.drop_column(name)
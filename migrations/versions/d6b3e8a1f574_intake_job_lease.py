@@ -0,0 +1,57 @@
+"""intake job lease columns
+
+``submitted_at`` records when a queued job was last handed to an executor and
+``locked_by`` / ``locked_until`` hold the lease of the worker running it, so
+the requeue job only resubmits jobs nobody took and only resets running jobs
+whose worker stopped renewing its lease.
+
+Revision ID: d6b3e8a1f574
+Revises: c3f7a2e9d146
+Create Date: 2026-10-17 06:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6b3e8a1f574'
+down_revision = 'c3f7a2e9d146'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = [
+    ('submitted_at', sa.DateTime()),
+    ('locked_by', sa.String(length=64)),
+    ('locked_until', sa.DateTime()),
+]
+
+
+def _existing():
+    insp = sa.inspect(op.get_bind())
+    if 'intake_job' not in insp.get_table_names():
+        return None
+    return {c['name'] for c in insp.get_columns('intake_job')}
+
+
+def upgrade():
+    existing = _existing()
+    if existing is None:
+        return
+    missing = [(name, type_) for name, type_ in COLUMNS if name not in existing]
+    if missing:
+        with op.batch_alter_table('intake_job') as batch_op:
+            for name, type_ in missing:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+
+
+def downgrade():
+    existing = _existing()
+    if existing is None:
+        return
+    present = [name for name, _ in COLUMNS if name in existing]
+    if present:
+        with op.batch_alter_table('intake_job') as batch_op:
+            for name in present:
+                batch_op.drop_column(name)
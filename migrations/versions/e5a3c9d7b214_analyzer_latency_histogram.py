@@ -0,0 +1,45 @@
+"""analyzer latency histogram
+
+Adds ``analyzer_log.latency_bucket`` (services/provider_http.py bucket label)
+and an index on ``created_at`` so the analyzer metrics endpoint can group a
+recent window by bucket.
+
+Revision ID: e5a3c9d7b214
+Revises: d2f9b6c4e187
+Create Date: 2026-10-17 02:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a3c9d7b214'
+down_revision = 'd2f9b6c4e187'
+branch_labels = None
+depends_on = None
+
+
+INDEX = 'ix_analyzer_log_created_at'
+
+
+def upgrade():
+    insp = sa.inspect(op.get_bind())
+    if 'analyzer_log' not in insp.get_table_names():
+        return
+    if 'latency_bucket' not in {c['name'] for c in insp.get_columns('analyzer_log')}:
+        with op.batch_alter_table('analyzer_log') as batch_op:
+            batch_op.add_column(sa.Column('latency_bucket', sa.String(length=16), nullable=True))
+    if INDEX not in {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('analyzer_log')}:
+        op.create_index(INDEX, 'analyzer_log', ['created_at'])
+
+
+def downgrade():
+    insp = sa.inspect(op.get_bind())
+    if 'analyzer_log' not in insp.get_table_names():
+        return
+    if INDEX in {ix['name'] for ix in insp.get_indexes('analyzer_log')}:
+        op.drop_index(INDEX, table_name='analyzer_log')
+    if 'latency_bucket' in {c['name'] for c in insp.get_columns('analyzer_log')}:
+        with op.batch_alter_table('analyzer_log') as batch_op:
+            batch_op.drop_column('latency_bucket')
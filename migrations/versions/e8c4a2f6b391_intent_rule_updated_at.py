@@ -0,0 +1,44 @@
+"""intent rule updated_at
+
+``intent_rule.updated_at`` is bumped on every write so the intent rule
+engine's version stamp (count plus max(updated_at)) notices any edit.
+Existing rows start at their ``created_at``.
+
+Revision ID: e8c4a2f6b391
+Revises: d6b3e8a1f574
+Create Date: 2026-10-17 06:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8c4a2f6b391'
+down_revision = 'd6b3e8a1f574'
+branch_labels = None
+depends_on = None
+
+
+def _existing():
+    insp = sa.inspect(op.get_bind())
+    if 'intent_rule' not in insp.get_table_names():
+        return None
+    return {c['name'] for c in insp.get_columns('intent_rule')}
+
+
+def upgrade():
+    existing = _existing()
+    if existing is None:
+        return
+    if 'updated_at' not in existing:
+        with op.batch_alter_table('intent_rule') as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE intent_rule SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL")
+
+
+def downgrade():
+    existing = _existing()
+    if existing and 'updated_at' in existing:
+        with op.batch_alter_table('intent_rule') as batch_op:
+            batch_op.drop_column('updated_at')
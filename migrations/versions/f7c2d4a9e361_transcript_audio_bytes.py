@@ -0,0 +1,55 @@
+"""transcript audio byte counts
+
+``original_bytes`` / ``uploaded_bytes`` record the audio size as received and
+as sent to the provider after optional preprocessing
+(services/audio_preprocess.py).
+
+Revision ID: f7c2d4a9e361
+Revises: e5a3c9d7b214
+Create Date: 2026-10-17 03:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7c2d4a9e361'
+down_revision = 'e5a3c9d7b214'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = [
+    ('original_bytes', sa.Integer()),
+    ('uploaded_bytes', sa.Integer()),
+]
+
+
+def _existing():
+    insp = sa.inspect(op.get_bind())
+    if 'transcript' not in insp.get_table_names():
+        return None
+    return {c['name'] for c in insp.get_columns('transcript')}
+
+
+def upgrade():
+    existing = _existing()
+    if existing is None:
+        return
+    missing = [(name, type_) for name, type_ in COLUMNS if name not in existing]
+    if missing:
+        with op.batch_alter_table('transcript') as batch_op:
+            for name, type_ in missing:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+
+
+def downgrade():
+    existing = _existing()
+    if existing is None:
+        return
+    present = [name for name, _ in COLUMNS if name in existing]
+    if present:
+        with op.batch_alter_table('transcript') as batch_op:
+            for name in present:
+                batch_op.drop_column(name)
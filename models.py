@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+import json
 import secrets
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -48,6 +49,9 @@ class User(db.Model):
 class CaseStatusAudit(db.Model):
     """Audit trail for case status changes"""
     __tablename__ = 'case_status_audit'
+    __table_args__ = (
+        db.Index('ix_case_status_audit_case_id_created_at', 'case_id', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     case_id = db.Column(db.Integer, db.ForeignKey('case.id'), nullable=False)
@@ -146,6 +150,8 @@ class IntentRule(db.Model):
     pattern = db.Column(db.Text, nullable=False)  # free-form string or JSON describing match
     weight = db.Column(db.Float, default=1.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped on every write; the rule engine's version stamp reads max(updated_at)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     intent = db.relationship('Intent', backref=db.backref('rules', lazy=True, cascade='all, delete-orphan'))
 
@@ -181,6 +187,9 @@ class EmailTemplate(db.Model):
 class AnalyzerLog(db.Model):
     """Metrics/logs for analyzer calls (AAI or rule-based)."""
     __tablename__ = 'analyzer_log'
+    __table_args__ = (
+        db.Index('ix_analyzer_log_created_at', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     provider = db.Column(db.String(50), nullable=False)  # 'aai' | 'rules'
@@ -191,14 +200,128 @@ class AnalyzerLog(db.Model):
     succeeded = db.Column(db.Boolean, default=True)
     error = db.Column(db.Text, nullable=True)
     text_chars = db.Column(db.Integer, nullable=True)
+    cache_hit = db.Column(db.String(20), nullable=True)  # None (miss) | 'memory' | 'db'
+    latency_bucket = db.Column(db.String(16), nullable=True)  # histogram bucket, e.g. 'le_250'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     case_id = db.Column(db.Integer, db.ForeignKey('case.id'), nullable=True)
 
 
+class DashboardStat(db.Model):
+    """Maintained dashboard counter (see services/dashboard_stats.py)."""
+    __tablename__ = 'dashboard_stat'
+
+    key = db.Column(db.String(50), primary_key=True)  # e.g. 'active_cases'
+    value = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SchedulerLease(db.Model):
+    """Leader lease: the worker holding an unexpired row runs scheduled jobs (see services/jobs.py)."""
+    __tablename__ = 'scheduler_lease'
+
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(128), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class JobStat(db.Model):
+    """Run-time metrics per scheduled job, written by the worker after each run."""
+    __tablename__ = 'job_stat'
+
+    name = db.Column(db.String(50), primary_key=True)
+    runs = db.Column(db.Integer, nullable=False, default=0)
+    failures = db.Column(db.Integer, nullable=False, default=0)
+    last_started_at = db.Column(db.DateTime, nullable=True)
+    last_duration_ms = db.Column(db.Float, nullable=True)
+    total_duration_ms = db.Column(db.Float, nullable=False, default=0)
+    max_duration_ms = db.Column(db.Float, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    worker = db.Column(db.String(128), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_started_at': self.last_started_at.isoformat() if self.last_started_at else None,
+            'last_duration_ms': self.last_duration_ms,
+            'avg_duration_ms': round(self.total_duration_ms / self.runs, 2) if self.runs else None,
+            'max_duration_ms': self.max_duration_ms,
+            'last_error': self.last_error,
+            'worker': self.worker,
+        }
+
+
+class RetentionRun(db.Model):
+    """One retention / garbage-collection sweep of the upload tree (services/retention.py)."""
+    __tablename__ = 'retention_run'
+    __table_args__ = (
+        db.Index('ix_retention_run_started_at', 'started_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    duration_ms = db.Column(db.Float, nullable=True)
+    dry_run = db.Column(db.Boolean, nullable=False, default=True)
+    enforce_retention = db.Column(db.Boolean, nullable=False, default=False)
+    scanned_files = db.Column(db.Integer, nullable=False, default=0)
+    files_per_second = db.Column(db.Float, nullable=True)
+    orphan_files = db.Column(db.Integer, nullable=False, default=0)
+    orphan_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    expired_documents = db.Column(db.Integer, nullable=False, default=0)
+    expired_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    missing_files = db.Column(db.Integer, nullable=False, default=0)
+    reclaimed_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    errors = db.Column(db.Integer, nullable=False, default=0)
+    details = db.Column(db.Text, nullable=True)  # JSON: sample paths / document ids per category
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'duration_ms': self.duration_ms,
+            'dry_run': self.dry_run,
+            'enforce_retention': self.enforce_retention,
+            'scanned_files': self.scanned_files,
+            'files_per_second': self.files_per_second,
+            'orphan_files': self.orphan_files,
+            'orphan_bytes': self.orphan_bytes,
+            'expired_documents': self.expired_documents,
+            'expired_bytes': self.expired_bytes,
+            'missing_files': self.missing_files,
+            'reclaimed_bytes': self.reclaimed_bytes,
+            'errors': self.errors,
+            'details': json.loads(self.details) if self.details else None,
+        }
+
+
+class AnalysisCacheEntry(db.Model):
+    """Persistent tier of the intake analysis cache (see services/analysis_cache.py)."""
+    __tablename__ = 'analysis_cache'
+
+    key = db.Column(db.String(64), primary_key=True)  # sha256 of normalized text + analyzer identity
+    provider = db.Column(db.String(50), nullable=False)
+    model = db.Column(db.String(100), nullable=True)
+    prompt_version = db.Column(db.String(64), nullable=True)
+    result = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
+
+
 class EmailQueue(db.Model):
     """Queue for scheduled outbound emails (e.g., preservation letters)."""
     __tablename__ = 'email_queue'
+    __table_args__ = (
+        db.Index('ix_email_queue_created_at_id', 'created_at', 'id'),
+        db.Index('ix_email_queue_status_created_at', 'status', 'created_at', 'id'),
+        # Only pending rows are polled; usable where the planner sees the
+        # literal (psycopg2 inlines it), elsewhere the status index serves
+        db.Index('ix_email_queue_pending_send_after', 'send_after',
+                 sqlite_where=db.text("status = 'pending'"), postgresql_where=db.text("status = 'pending'")),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     case_id = db.Column(db.Integer, db.ForeignKey('case.id'), nullable=True)
@@ -207,9 +330,12 @@ class EmailQueue(db.Model):
     subject = db.Column(db.String(255), nullable=False)
     body = db.Column(db.Text, nullable=False)
     send_after = db.Column(db.DateTime, nullable=False)
-    status = db.Column(db.String(20), default='pending')  # pending|sent|failed
+    status = db.Column(db.String(20), default='pending')  # pending|sent|failed (dead-lettered after max attempts)
     attempts = db.Column(db.Integer, default=0)
     last_error = db.Column(db.Text, nullable=True)
+    # Lease held by the worker currently sending this item (see services/email_queue.py)
+    locked_by = db.Column(db.String(64), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -277,9 +403,54 @@ class EmailDraft(db.Model):
         }
 
 
+class IntakeJob(db.Model):
+    """Background auto-intake run; also records idempotency keys for intake retries."""
+    __tablename__ = 'intake_job'
+
+    id = db.Column(db.Integer, primary_key=True)
+    idempotency_key = db.Column(db.String(191), unique=True, nullable=True)
+    mode = db.Column(db.String(20), nullable=False, default='full')  # full|staff|light
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued|running|succeeded|failed
+    stage = db.Column(db.String(50), nullable=True)  # last completed pipeline stage
+    payload = db.Column(db.Text, nullable=False)  # JSON intake request
+    result = db.Column(db.Text, nullable=True)  # JSON pipeline result
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, default=0)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    case_id = db.Column(db.Integer, db.ForeignKey('case.id'), nullable=True)
+    # Last hand-off to an executor, and the lease of the worker running the job
+    # (renewed by its heartbeat); see the intake job section of app.py
+    submitted_at = db.Column(db.DateTime, nullable=True)
+    locked_by = db.Column(db.String(64), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'mode': self.mode,
+            'case_id': self.case_id,
+            'attempts': self.attempts,
+            'error': self.error,
+            'result': json.loads(self.result) if self.result else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
 class Deadline(db.Model):
     """Deadline tracking for cases (e.g., statutes, evidence retention, EEOC)."""
     __tablename__ = 'deadline'
+    __table_args__ = (
+        db.Index('ix_deadline_case_id_due_date', 'case_id', 'due_date'),
+        db.Index('ix_deadline_due_date', 'due_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     case_id = db.Column(db.Integer, db.ForeignKey('case.id'), nullable=False)
@@ -308,6 +479,9 @@ class Deadline(db.Model):
 class Client(db.Model):
     """Client information model"""
     __tablename__ = 'client'
+    __table_args__ = (
+        db.Index('ix_client_created_at_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(50), nullable=False)
@@ -336,6 +510,11 @@ class Client(db.Model):
 class Case(db.Model):
     """Case information model"""
     __tablename__ = 'case'
+    __table_args__ = (
+        db.Index('ix_case_client_id_created_at', 'client_id', 'created_at'),
+        db.Index('ix_case_status_created_at', 'status', 'created_at'),
+        db.Index('ix_case_created_at_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -398,6 +577,11 @@ class Case(db.Model):
 class Action(db.Model):
     """Action items model"""
     __tablename__ = 'action'
+    __table_args__ = (
+        db.Index('ix_action_created_at_id', 'created_at', 'id'),
+        db.Index('ix_action_status', 'status'),
+        db.Index('ix_action_due_date', 'due_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -445,6 +629,9 @@ class Action(db.Model):
 class CaseAction(db.Model):
     """Association object for actions assigned to cases with metadata"""
     __tablename__ = 'case_action'
+    __table_args__ = (
+        db.Index('ix_case_action_action_id', 'action_id'),
+    )
 
     case_id = db.Column(db.Integer, db.ForeignKey('case.id'), primary_key=True)
     action_id = db.Column(db.Integer, db.ForeignKey('action.id'), primary_key=True)
@@ -547,12 +734,19 @@ class AIInsight(db.Model):
 class Document(db.Model):
     """Document model for case-related files"""
     __tablename__ = 'document'
+    __table_args__ = (
+        db.Index('ix_document_case_id_created_at', 'case_id', 'created_at'),
+        db.Index('ix_document_created_at_id', 'created_at', 'id'),
+        # Blob reference lookups (shared blobs, garbage collection)
+        db.Index('ix_document_sha256', 'sha256'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
     file_type = db.Column(db.String(50), nullable=True)
     file_size = db.Column(db.Integer, nullable=True)
+    sha256 = db.Column(db.String(64), nullable=True)  # content hash; None for files stored before the blob store
     description = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -573,6 +767,7 @@ class Document(db.Model):
             'name': self.name,
             'file_type': self.file_type,
             'file_size': self.file_size,
+            'sha256': self.sha256,
             'description': self.description,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
@@ -581,6 +776,49 @@ class Document(db.Model):
         }
 
 
+class DocumentExtraction(db.Model):
+    """Text and thumbnail extracted from a document in the background (services/document_extract.py)."""
+    __tablename__ = 'document_extraction'
+    __table_args__ = (
+        # Backlog claim and report: pending rows, oldest first
+        db.Index('ix_document_extraction_status_created_at', 'status', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, db.ForeignKey('document.id'), primary_key=True)  # the document's id
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending|processing|done|failed|skipped
+    kind = db.Column(db.String(10), nullable=True)  # text|docx|pdf|image
+    text = db.Column(db.Text, nullable=True)
+    text_chars = db.Column(db.Integer, nullable=True)
+    page_count = db.Column(db.Integer, nullable=True)
+    thumbnail_path = db.Column(db.String(500), nullable=True)
+    source_bytes = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, default=0)
+    duration_ms = db.Column(db.Float, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    document = db.relationship('Document', backref=db.backref('extraction', uselist=False,
+                                                              cascade='all, delete-orphan'))
+
+    def to_dict(self):
+        return {
+            'document_id': self.id,
+            'status': self.status,
+            'kind': self.kind,
+            'text_chars': self.text_chars,
+            'page_count': self.page_count,
+            'has_thumbnail': bool(self.thumbnail_path),
+            'error': self.error,
+            'attempts': self.attempts,
+            'duration_ms': self.duration_ms,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
 class CaseNote(db.Model):
     """Notes for a case"""
     __tablename__ = 'case_note'
@@ -612,12 +850,25 @@ class CaseNote(db.Model):
 class Transcript(db.Model):
     """Stored transcripts from STT providers"""
     __tablename__ = 'transcript'
+    __table_args__ = (
+        # Poller: outstanding transcripts due for a provider check
+        db.Index('ix_transcript_status_next_poll_at', 'status', 'next_poll_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     provider = db.Column(db.String(50), nullable=False)  # e.g., 'assemblyai'
     external_id = db.Column(db.String(128), nullable=False, index=True)  # provider transcript id
     status = db.Column(db.String(50), nullable=False, default='processing')
     text = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)  # JSON: entities, sentiment, highlights, categories
+    # Audio size as received and as uploaded (smaller when preprocessed)
+    original_bytes = db.Column(db.Integer, nullable=True)
+    uploaded_bytes = db.Column(db.Integer, nullable=True)
+    # Completion tracking (see services/transcripts.py)
+    next_poll_at = db.Column(db.DateTime, nullable=True)
+    poll_attempts = db.Column(db.Integer, default=0)
+    completed_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -638,6 +889,8 @@ class Transcript(db.Model):
             'external_id': self.external_id,
             'status': self.status,
             'text': self.text,
+            'error': self.error,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'client_id': self.client_id,
@@ -722,6 +975,9 @@ class ClientUser(db.Model):
 class ClientMessage(db.Model):
     """Secure messaging between client and attorney"""
     __tablename__ = 'client_message'
+    __table_args__ = (
+        db.Index('ix_client_message_client_case_created', 'client_id', 'case_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     case_id = db.Column(db.Integer, db.ForeignKey('case.id'), nullable=False)
@@ -769,6 +1025,9 @@ class ClientMessage(db.Model):
 class ClientDocumentAccess(db.Model):
     """Track which documents clients can access"""
     __tablename__ = 'client_document_access'
+    __table_args__ = (
+        db.Index('ix_client_document_access_client_granted', 'client_id', 'granted_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     document_id = db.Column(db.Integer, db.ForeignKey('document.id'), nullable=False)
@@ -813,6 +1072,9 @@ class ClientDocumentAccess(db.Model):
 class TimeEntry(db.Model):
     """Track billable time for cases"""
     __tablename__ = 'time_entry'
+    __table_args__ = (
+        db.Index('ix_time_entry_user_id_end_time', 'user_id', 'end_time'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     case_id = db.Column(db.Integer, db.ForeignKey('case.id'), nullable=False)
@@ -912,6 +1174,9 @@ class Expense(db.Model):
 class Invoice(db.Model):
     """Client invoices"""
     __tablename__ = 'invoice'
+    __table_args__ = (
+        db.Index('ix_invoice_client_id_case_id', 'client_id', 'case_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     invoice_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -1001,6 +1266,9 @@ class Invoice(db.Model):
 class Payment(db.Model):
     """Payment records"""
     __tablename__ = 'payment'
+    __table_args__ = (
+        db.Index('ix_payment_invoice_id', 'invoice_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     invoice_id = db.Column(db.Integer, db.ForeignKey('invoice.id'), nullable=False)
@@ -1120,6 +1388,10 @@ class BillingRate(db.Model):
 class CalendarEvent(db.Model):
     """Calendar events linked to cases/clients with optional reminders"""
     __tablename__ = 'calendar_event'
+    __table_args__ = (
+        db.Index('ix_calendar_event_start_at_id', 'start_at', 'id'),
+        db.Index('ix_calendar_event_remind_at', 'remind_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -1136,6 +1408,10 @@ class CalendarEvent(db.Model):
 
     # Reminders
     reminder_minutes_before = db.Column(db.Integer, default=0)
+    # When the reminder is due (start_at minus the effective lead time, NULL for
+    # none); maintained by services/reminders.py
+    remind_at = db.Column(db.DateTime, nullable=True)
+    last_notified_at = db.Column(db.DateTime, nullable=True)
 
     status = db.Column(db.String(50), default='scheduled')  # scheduled, completed, cancelled
 
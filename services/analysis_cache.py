@@ -0,0 +1,174 @@
+"""
+Two-tier cache for intake analysis results.
+
+Entries are keyed by a SHA-256 of the normalized intake text plus the analyzer
+identity (provider, model, prompt/rules version), so a prompt or rule change
+never serves stale results. Lookups go to a bounded in-process LRU first and
+then to the ``analysis_cache`` table; both tiers honour the same TTL.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+ANALYSIS_CACHE_SIZE = int(os.getenv('ANALYSIS_CACHE_SIZE', '512'))
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv('ANALYSIS_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+# Memory entries are re-read from the DB tier after this long, which bounds how
+# long another worker can keep serving an entry invalidated elsewhere.
+ANALYSIS_CACHE_MEMORY_TTL_SECONDS = int(os.getenv('ANALYSIS_CACHE_MEMORY_TTL_SECONDS', '300'))
+
+_WS = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and Unicode forms so trivial re-saves hit the cache."""
+    return _WS.sub(' ', unicodedata.normalize('NFC', text or '')).strip()
+
+
+def cache_key(text: str, provider: str, model: Optional[str] = None, version: Optional[str] = None) -> str:
+    h = hashlib.sha256()
+    for part in (provider, model or '', version or '', normalize_text(text)):
+        h.update(part.encode('utf-8'))
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """In-process LRU in front of an optional SQLAlchemy-backed table.
+
+    ``db`` and ``model`` are the Flask-SQLAlchemy handle and the
+    ``AnalysisCacheEntry`` model; without them only the memory tier is used.
+    Database writes go through the caller's session and are committed with
+    the surrounding request.
+    """
+
+    def __init__(self, db=None, model=None, max_entries: int = ANALYSIS_CACHE_SIZE,
+                 ttl_seconds: int = ANALYSIS_CACHE_TTL_SECONDS,
+                 memory_ttl_seconds: int = ANALYSIS_CACHE_MEMORY_TTL_SECONDS):
+        self.db = db
+        self.model = model
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.memory_ttl_seconds = memory_ttl_seconds
+        self._lru: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'invalidations': 0}
+
+    def _expiry(self) -> float:
+        ttls = [t for t in (self.ttl_seconds, self.memory_ttl_seconds if self.model is not None else 0) if t]
+        return time.time() + min(ttls) if ttls else float('inf')
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += n
+
+    # ---- memory tier ----
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._lru.get(key)
+            if item is None:
+                return None
+            expires, payload = item
+            if expires < time.time():
+                del self._lru[key]
+                return None
+            self._lru.move_to_end(key)
+            return payload
+
+    def _memory_put(self, key: str, payload: str, expires: float) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._lru[key] = (expires, payload)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    # ---- public API ----
+    def get(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Return ``(result, tier)`` where tier is 'memory', 'db' or None on a miss."""
+        payload = self._memory_get(key)
+        if payload is not None:
+            self._count('memory_hits')
+            return json.loads(payload), 'memory'
+        if self.model is not None:
+            row = self.db.session.get(self.model, key)
+            if row is not None and (row.expires_at is None or row.expires_at > datetime.utcnow()):
+                expires = self._expiry()
+                if row.expires_at is not None:
+                    expires = min(expires, time.time() + (row.expires_at - datetime.utcnow()).total_seconds())
+                self._memory_put(key, row.result, expires)
+                self._count('db_hits')
+                return json.loads(row.result), 'db'
+        self._count('misses')
+        return None, None
+
+    def set(self, key: str, result: Dict[str, Any], provider: str, model: Optional[str] = None,
+            version: Optional[str] = None) -> None:
+        payload = json.dumps(result, default=str)
+        self._memory_put(key, payload, self._expiry())
+        self._count('stores')
+        if self.model is None:
+            return
+        values = {
+            'key': key, 'provider': provider, 'model': model, 'prompt_version': version, 'result': payload,
+            'created_at': datetime.utcnow(),
+            'expires_at': datetime.utcnow() + timedelta(seconds=self.ttl_seconds) if self.ttl_seconds else None,
+        }
+        dialect = self.db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            # Upsert so concurrent misses on the same text never collide
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(self.model.__table__).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['key'],
+                set_={k: stmt.excluded[k] for k in values if k != 'key'},
+            )
+            self.db.session.execute(stmt)
+        else:
+            self.db.session.merge(self.model(**values))
+
+    def invalidate(self, key: Optional[str] = None, provider: Optional[str] = None) -> int:
+        """Drop one key, every entry of a provider, or everything; returns DB rows removed."""
+        with self._lock:
+            if key is None and provider is None:
+                self._lru.clear()
+            elif key is not None:
+                self._lru.pop(key, None)
+            else:
+                # The memory tier does not record providers; clearing it is cheap
+                self._lru.clear()
+            self.stats['invalidations'] += 1
+        if self.model is None:
+            return 0
+        q = self.model.query
+        if key is not None:
+            q = q.filter(self.model.key == key)
+        if provider is not None:
+            q = q.filter(self.model.provider == provider)
+        return q.delete(synchronize_session=False)
+
+    def purge_expired(self) -> int:
+        if self.model is None:
+            return 0
+        return self.model.query.filter(self.model.expires_at < datetime.utcnow()).delete(synchronize_session=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self.stats)
+            out['memory_entries'] = len(self._lru)
+        lookups = out['memory_hits'] + out['db_hits'] + out['misses']
+        out['hit_rate'] = round((out['memory_hits'] + out['db_hits']) / lookups, 4) if lookups else None
+        out['max_entries'] = self.max_entries
+        out['ttl_seconds'] = self.ttl_seconds
+        return out
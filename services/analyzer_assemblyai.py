@@ -1,11 +1,13 @@
 import os
 import json
-import time
+import hashlib
 import requests
 from typing import Any, Dict, Optional
 
+from . import provider_http
+
 ASSEMBLYAI_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
-LEMUR_URL = "https://api.assemblyai.com/lemur/v3/generate"
+LEMUR_URL = os.getenv("ASSEMBLYAI_LEMUR_URL", "https://api.assemblyai.com/lemur/v3/generate")
 
 PROMPT = (
     "You are a legal intake classifier. Read the given client narrative and extract structured fields. "
@@ -35,21 +37,24 @@ SCHEMA_HINT = {
     "confidence": 0.7,
 }
 
+MODEL = "lemur-3-sonar-large-32k-online"
+# Changes whenever the prompt or schema changes, so cached analyses are not reused
+PROMPT_VERSION = hashlib.sha256((PROMPT + json.dumps(SCHEMA_HINT, sort_keys=True)).encode("utf-8")).hexdigest()[:16]
+
 HEADERS = {"authorization": ASSEMBLYAI_API_KEY or "", "content-type": "application/json"}
 
 class AAIAnalyzerError(Exception):
     pass
 
 
-def _post_with_retry(url: str, payload: Dict[str, Any], retries: int = 2, timeout: int = 20) -> requests.Response:
-    last = None
-    for i in range(retries + 1):
-        try:
-            return requests.post(url, headers=HEADERS, data=json.dumps(payload), timeout=timeout)
-        except Exception as e:
-            last = e
-            time.sleep(min(2 ** i, 8))
-    raise AAIAnalyzerError(str(last) if last else "request failed")
+def _post(url: str, payload: Dict[str, Any], timeout: int = 20) -> requests.Response:
+    # Pooled session; connection failures are retried by its adapter. Raises
+    # CircuitOpen without calling out while the provider is failing.
+    try:
+        return provider_http.request('assemblyai', 'lemur', 'POST', url, headers=HEADERS,
+                                     data=json.dumps(payload), timeout=timeout)
+    except requests.RequestException as e:
+        raise AAIAnalyzerError(str(e))
 
 
 def analyze_with_aai(text: str) -> Dict[str, Any]:
@@ -57,12 +62,12 @@ def analyze_with_aai(text: str) -> Dict[str, Any]:
         raise AAIAnalyzerError("ASSEMBLYAI_API_KEY not set")
     prompt = f"{PROMPT}\n\nText:\n{text}\n\nReturn JSON only."
     payload = {
-        "model": "lemur-3-sonar-large-32k-online",
+        "model": MODEL,
         "input": prompt,
         "max_output_tokens": 800,
         "format": "json",
     }
-    res = _post_with_retry(LEMUR_URL, payload)
+    res = _post(LEMUR_URL, payload)
     if res.status_code != 200:
         raise AAIAnalyzerError(f"LeMUR error: {res.status_code} {res.text[:200]}")
     try:
@@ -0,0 +1,86 @@
+"""
+Optional audio preprocessing before upload to the STT provider.
+
+Browser recordings arrive as large stereo WAV/WebM. With
+``AUDIO_PREPROCESS=true`` they are downmixed to mono, resampled to 16 kHz and
+re-encoded (Ogg/Opus by default) with pydub/ffmpeg before upload, which is
+all the recognizer needs.
+
+Transcoding runs in a process pool (spawned, so no web-process state or
+locks are inherited) to keep CPU work off request threads. Any failure, or an
+output that is not smaller than the input, falls back to uploading the
+original.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple, Optional
+
+AUDIO_PREPROCESS = (os.getenv('AUDIO_PREPROCESS', 'false').strip().lower() == 'true')
+AUDIO_PREPROCESS_WORKERS = int(os.getenv('AUDIO_PREPROCESS_WORKERS', '2'))
+AUDIO_PREPROCESS_TIMEOUT_SECONDS = float(os.getenv('AUDIO_PREPROCESS_TIMEOUT_SECONDS', '120'))
+SAMPLE_RATE = int(os.getenv('AUDIO_PREPROCESS_SAMPLE_RATE', '16000'))
+FORMAT = os.getenv('AUDIO_PREPROCESS_FORMAT', 'ogg')
+CODEC = os.getenv('AUDIO_PREPROCESS_CODEC', 'libopus')
+BITRATE = os.getenv('AUDIO_PREPROCESS_BITRATE', '24k')
+
+
+class Preprocessed(NamedTuple):
+    path: str  # file to upload: the transcoded copy, or the original on fallback
+    original_bytes: int
+    uploaded_bytes: int
+    error: Optional[str] = None
+
+
+def transcode(src: str, dst: str, sample_rate: int = SAMPLE_RATE, fmt: str = FORMAT,
+              codec: Optional[str] = CODEC, bitrate: Optional[str] = BITRATE) -> int:
+    """Mono, ``sample_rate`` Hz re-encode of ``src`` into ``dst``; returns its size. Runs in the pool."""
+    # Imported here: pydub warns at import time when ffmpeg is missing
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(src)
+    kwargs = {'format': fmt}
+    if fmt != 'wav':
+        kwargs.update(codec=codec or None, bitrate=bitrate or None)
+    audio.set_channels(1).set_frame_rate(sample_rate).export(dst, **kwargs)
+    return os.path.getsize(dst)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ProcessPoolExecutor(max_workers=max(1, AUDIO_PREPROCESS_WORKERS),
+                                            mp_context=multiprocessing.get_context('spawn'))
+                _pool_pid = pid
+    return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _lock:
+        _pool = None
+
+
+def preprocess(src: str, dst: str, timeout: float = AUDIO_PREPROCESS_TIMEOUT_SECONDS) -> Preprocessed:
+    """Transcode ``src`` to ``dst`` in the pool; the caller removes ``dst``."""
+    original = os.path.getsize(src)
+    try:
+        size = _get_pool().submit(transcode, src, dst).result(timeout=timeout)
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            # A worker died (e.g. OOM); start a fresh pool next time
+            _reset_pool()
+        return Preprocessed(src, original, original, f"{e.__class__.__name__}: {e}")
+    if size >= original:
+        return Preprocessed(src, original, original, 'not smaller than the original')
+    return Preprocessed(dst, original, size)
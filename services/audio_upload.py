@@ -0,0 +1,150 @@
+"""
+Audio uploads for transcription without staging files in ``UPLOAD_FOLDER``.
+
+The request body is read incrementally with werkzeug's multipart decoder
+instead of ``request.files``, which would buffer the whole file first.
+
+  - streaming mode hands the audio part's bytes to the provider upload as
+    they arrive (chunked transfer), so the provider upload runs while the
+    client is still sending and nothing touches the disk;
+  - spooled mode (``stream=False``) reads the part into a
+    ``SpooledTemporaryFile`` first: in memory up to ``spool_max_bytes``,
+    above that an anonymous, per-request temp file that is removed on close.
+
+:data:`upload_stats` keeps byte counts and throughput per mode.
+"""
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+from werkzeug.sansio.multipart import Data, Epilogue, File, MultipartDecoder, NEED_DATA
+
+CHUNK_SIZE = 256 * 1024
+
+
+class BadUpload(ValueError):
+    """The request body is not a readable multipart upload."""
+
+
+def _events(stream, decoder: MultipartDecoder, chunk_size: int):
+    while True:
+        event = decoder.next_event()
+        if event is NEED_DATA:
+            if decoder.complete:
+                raise BadUpload('incomplete multipart body')
+            data = stream.read(chunk_size)
+            decoder.receive_data(data or None)
+            continue
+        yield event
+        if isinstance(event, Epilogue):
+            return
+
+
+class UploadStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.modes: Dict[str, Dict[str, float]] = {}
+
+    def record(self, mode: str, nbytes: int, seconds: float, ok: bool) -> None:
+        with self._lock:
+            m = self.modes.setdefault(mode, {'uploads': 0, 'failures': 0, 'bytes': 0, 'seconds': 0.0,
+                                             'last_bytes_per_second': None})
+            m['uploads'] += 1
+            m['failures'] += not ok
+            m['bytes'] += nbytes
+            m['seconds'] += seconds
+            if ok and seconds > 0:
+                m['last_bytes_per_second'] = round(nbytes / seconds, 1)
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {
+                mode: {**m, 'seconds': round(m['seconds'], 3),
+                       'bytes_per_second': round(m['bytes'] / m['seconds'], 1) if m['seconds'] else None}
+                for mode, m in self.modes.items()
+            }
+
+
+upload_stats = UploadStats()
+
+
+class AudioUpload:
+    """One audio part of a request; :meth:`chunks` yields its bytes once."""
+
+    def __init__(self, filename: str, content_type: str, mode: str, source, spooled=None):
+        self.filename = filename
+        self.content_type = content_type
+        self.mode = mode
+        self.bytes = 0
+        self.seconds = 0.0
+        self.started = False
+        self.completed = False
+        self._source = source
+        self._spooled = spooled
+
+    def chunks(self) -> Iterator[bytes]:
+        self.started = True
+        started = time.perf_counter()
+        try:
+            for chunk in self._source:
+                self.bytes += len(chunk)
+                yield chunk
+            self.completed = True
+        finally:
+            self.seconds = time.perf_counter() - started
+
+    def close(self) -> None:
+        """Record throughput (when it was sent) and release the spool file."""
+        if self.started:
+            upload_stats.record(self.mode, self.bytes, self.seconds, self.completed)
+        if self._spooled is not None:
+            self._spooled.close()
+            self._spooled = None
+
+
+def _part_data(events) -> Iterator[bytes]:
+    for event in events:
+        if isinstance(event, Data):
+            if event.data:
+                yield event.data
+            if not event.more_data:
+                return
+    raise BadUpload('multipart body ended inside the file part')
+
+
+def _read_spooled(spooled, chunk_size: int) -> Iterator[bytes]:
+    spooled.seek(0)
+    while True:
+        data = spooled.read(chunk_size)
+        if not data:
+            return
+        yield data
+
+
+def open_part(request, field: str, stream: bool = True, chunk_size: int = CHUNK_SIZE,
+              spool_max_bytes: int = 8 * 1024 * 1024) -> Optional[AudioUpload]:
+    """The ``field`` file part of a multipart request, or None when it has none.
+
+    Parts before it are skipped. In streaming mode the part's data has not
+    been read yet when this returns, so the caller can validate the filename
+    and type before any upload starts.
+    """
+    boundary = request.mimetype_params.get('boundary') if request.mimetype == 'multipart/form-data' else None
+    if not boundary:
+        raise BadUpload('expected multipart/form-data')
+    events = _events(request.stream, MultipartDecoder(boundary.encode('latin-1')), chunk_size)
+    for event in events:
+        if isinstance(event, File) and event.name == field:
+            content_type = event.headers.get('content-type', '')
+            if stream:
+                return AudioUpload(event.filename, content_type, 'stream', _part_data(events))
+            spooled = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes, prefix='audio-')
+            try:
+                for data in _part_data(events):
+                    spooled.write(data)
+            except Exception:
+                spooled.close()
+                raise
+            return AudioUpload(event.filename, content_type, 'spool', _read_spooled(spooled, chunk_size), spooled)
+    return None
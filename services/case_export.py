@@ -0,0 +1,153 @@
+"""
+Streamed ZIP export of a case.
+
+``iter_zip`` drives ``zipfile`` against a write-only sink and yields the bytes
+as each chunk is compressed, so an archive of any size is produced with
+constant memory and no temp file: entries are written with data descriptors
+(sizes and CRC after the data) and Zip64 records where needed.
+
+``case_entries`` lists what goes into a case export: every document file under
+``documents/``, JSON dumps of notes, deadlines, actions and transcripts
+(serialized row by row), and a ``manifest.json`` describing the case and any
+document whose file was missing.
+"""
+import json
+import os
+import zipfile
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy.orm import selectinload
+
+try:
+    from ..models import Action, CaseAction, CaseNote, Deadline, Document, Transcript
+except (ImportError, ValueError):
+    from models import Action, CaseAction, CaseNote, Deadline, Document, Transcript
+
+CHUNK_SIZE = 1024 * 1024
+# Already compressed: stored as-is rather than deflated again
+STORED_EXTENSIONS = {
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.zip', '.gz', '.7z',
+    '.docx', '.xlsx', '.pptx', '.mp3', '.m4a', '.aac', '.ogg', '.opus', '.webm', '.mp4', '.mov',
+}
+
+
+class Entry(NamedTuple):
+    name: str
+    chunks: Callable[[], Iterable[bytes]]
+    size: Optional[int] = None  # when known up front; selects Zip64 for large files
+    compress: bool = True
+    modified: Optional[datetime] = None
+
+
+class _Sink:
+    """Write-only file object collecting what ``zipfile`` writes until drained."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_zip(entries: Iterable[Entry]) -> Iterator[bytes]:
+    """Yield a ZIP archive of ``entries`` incrementally."""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', allowZip64=True) as zf:
+        for entry in entries:
+            info = zipfile.ZipInfo(entry.name, (entry.modified or datetime.utcnow()).timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED if entry.compress else zipfile.ZIP_STORED
+            if entry.size is not None:
+                info.file_size = entry.size
+            with zf.open(info, 'w', force_zip64=entry.size is None) as dest:
+                for chunk in entry.chunks():
+                    dest.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def file_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                return
+            yield data
+
+
+def json_array_chunks(rows: Iterable, dump: Callable[[object], Dict]) -> Iterator[bytes]:
+    """A JSON array written one element at a time."""
+    yield b'['
+    first = True
+    for row in rows:
+        yield (b'\n' if first else b',\n') + json.dumps(dump(row), default=str).encode('utf-8')
+        first = False
+    yield b'\n]\n'
+
+
+def _document_entries(session, case, missing: List[Dict], listed: List[Dict]) -> Iterator[Entry]:
+    docs = (session.query(Document)
+            .filter(Document.case_id == case.id)
+            .order_by(Document.id.asc())
+            .yield_per(500))
+    for doc in docs:
+        base = os.path.basename(doc.name.replace('\\', '/'))
+        name = f"documents/{doc.id}-{base}"
+        try:
+            size = os.stat(doc.file_path).st_size
+        except OSError:
+            missing.append({'id': doc.id, 'name': doc.name})
+            continue
+        listed.append({'id': doc.id, 'name': doc.name, 'path': name, 'size': size, 'sha256': doc.sha256})
+        ext = os.path.splitext(doc.name)[1].lower()
+        yield Entry(name, lambda path=doc.file_path: file_chunks(path), size,
+                    compress=ext not in STORED_EXTENSIONS, modified=doc.created_at)
+
+
+def case_entries(session, case) -> Iterator[Entry]:
+    """Entries of a case export; queries run lazily as the archive is written."""
+    missing: List[Dict] = []
+    listed: List[Dict] = []
+    yield from _document_entries(session, case, missing, listed)
+    sections = (
+        ('notes.json', lambda: (session.query(CaseNote)
+                                .options(selectinload(CaseNote.created_by))
+                                .filter(CaseNote.case_id == case.id)
+                                .order_by(CaseNote.id.asc()).yield_per(500))),
+        ('deadlines.json', lambda: (session.query(Deadline)
+                                    .filter(Deadline.case_id == case.id)
+                                    .order_by(Deadline.id.asc()).yield_per(500))),
+        ('actions.json', lambda: (session.query(Action)
+                                  .join(CaseAction, CaseAction.action_id == Action.id)
+                                  .options(selectinload(Action.created_by), selectinload(Action.assigned_to),
+                                           selectinload(Action.documents))
+                                  .filter(CaseAction.case_id == case.id)
+                                  .order_by(Action.id.asc()).yield_per(500))),
+        ('transcripts.json', lambda: (session.query(Transcript)
+                                      .filter(Transcript.case_id == case.id)
+                                      .order_by(Transcript.id.asc()).yield_per(500))),
+    )
+    for name, query in sections:
+        yield Entry(name, lambda query=query: json_array_chunks(query(), lambda row: row.to_dict()))
+    manifest = {
+        'exported_at': datetime.utcnow().isoformat(),
+        'case': {'id': case.id, 'title': case.title, 'case_type': case.case_type, 'status': case.status,
+                 'client_id': case.client_id, 'created_at': case.created_at.isoformat() if case.created_at else None},
+        'documents': listed,
+        'missing_documents': missing,
+    }
+    yield Entry('manifest.json', lambda: [json.dumps(manifest, indent=2).encode('utf-8')])
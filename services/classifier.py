@@ -0,0 +1,133 @@
+"""
+Compiled keyword classifier for intake descriptions.
+
+All category and risk keywords are folded into one alternation regex that is
+built once at import, so a description is scanned a single time regardless of
+how many categories or keywords are configured.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Keyword weights per case category
+CATEGORY_KEYWORDS: Dict[str, Dict[str, int]] = {
+    'family': {
+        'divorce': 2, 'custody': 2, 'child support': 2, 'alimony': 2, 'marriage': 1,
+        'spousal support': 2, 'paternity': 2, 'adoption': 2, 'guardianship': 1
+    },
+    'criminal': {
+        'arrest': 2, 'bail': 2, 'felony': 2, 'misdemeanor': 2, 'theft': 2,
+        'assault': 2, 'dui': 2, 'battery': 2, 'robbery': 2, 'fraud': 2
+    },
+    'civil': {
+        'lawsuit': 2, 'negligence': 2, 'injury': 2, 'damages': 2, 'breach': 2,
+        'contract': 2, 'tort': 2, 'compensation': 1, 'liability': 2
+    },
+    'employment': {
+        'employer': 2, 'employee': 2, 'termination': 2, 'discrimination': 2,
+        'harassment': 2, 'wage': 2, 'overtime': 2, 'wrongful termination': 2
+    },
+    'real_estate': {
+        'property': 2, 'lease': 2, 'landlord': 2, 'tenant': 2, 'eviction': 2,
+        'mortgage': 2, 'deed': 2, 'zoning': 1, 'title': 1
+    }
+}
+
+# Risk keywords, checked in order of severity
+RISK_KEYWORDS: Dict[str, List[str]] = {
+    'high': ['emergency', 'urgent', 'immediate', 'danger', 'harm', 'violence', 'threat', 'eviction', 'injunction'],
+    'medium': ['dispute', 'conflict', 'issue', 'problem', 'concern', 'complaint'],
+    'low': ['inquiry', 'question', 'general', 'information', 'advice']
+}
+
+RISK_ORDER = ('high', 'medium', 'low')
+
+
+class KeywordClassifier:
+    """Scores categories and risk levels in one pass over the text.
+
+    Matching keeps the substring semantics of the original ``keyword in text``
+    loops: a keyword counts once if it appears anywhere, and keywords nested
+    inside a longer match (e.g. 'termination' in 'wrongful termination') are
+    credited together with it.
+    """
+
+    def __init__(self, category_keywords: Optional[Dict[str, Dict[str, int]]] = None,
+                 risk_keywords: Optional[Dict[str, List[str]]] = None):
+        self.category_keywords = category_keywords or CATEGORY_KEYWORDS
+        self.risk_keywords = risk_keywords or RISK_KEYWORDS
+
+        # keyword -> list of (category, weight); keyword -> risk levels
+        self._weights: Dict[str, List[Tuple[str, int]]] = {}
+        self._risks: Dict[str, List[str]] = {}
+        for category, keywords in self.category_keywords.items():
+            for keyword, weight in keywords.items():
+                self._weights.setdefault(keyword, []).append((category, weight))
+        for level, keywords in self.risk_keywords.items():
+            for keyword in keywords:
+                self._risks.setdefault(keyword, []).append(level)
+
+        vocabulary = sorted(set(self._weights) | set(self._risks), key=len, reverse=True)
+        # Zero-width lookahead so keywords that overlap each other are all seen;
+        # longest alternatives first so each position reports its widest match.
+        self._pattern = re.compile('(?=(' + '|'.join(re.escape(k) for k in vocabulary) + '))')
+        # Every keyword implied by a match of a (possibly longer) keyword
+        self._implied: Dict[str, Tuple[str, ...]] = {
+            k: tuple(other for other in vocabulary if other in k) for k in vocabulary
+        }
+
+    def matched_keywords(self, text: str) -> set:
+        """Return the set of configured keywords present in ``text``."""
+        found = set()
+        if not text:
+            return found
+        for m in self._pattern.finditer(text.lower()):
+            found.update(self._implied[m.group(1)])
+        return found
+
+    def scan(self, text: str) -> Dict[str, object]:
+        """Score every category and derive the risk level in a single pass."""
+        scores = {category: 0 for category in self.category_keywords}
+        levels = set()
+        for keyword in self.matched_keywords(text):
+            for category, weight in self._weights.get(keyword, ()):
+                scores[category] += weight
+            levels.update(self._risks.get(keyword, ()))
+        risk_level = 'low'
+        for level in RISK_ORDER[:-1]:
+            if level in levels:
+                risk_level = level
+                break
+        return {'scores': scores, 'risk_level': risk_level}
+
+    @staticmethod
+    def _best(scores: Dict[str, int]) -> Tuple[str, float]:
+        if not any(scores.values()):
+            return 'other', 0.5
+        best_category = max(scores, key=scores.get)
+        return best_category, min(1.0, scores[best_category] / 10.0)
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """Return ``(category, confidence)`` for a single description."""
+        if not text or not text.strip():
+            return 'other', 0.0
+        return self._best(self.scan(text)['scores'])
+
+    def classify_with_risk(self, text: str) -> Tuple[str, float, str]:
+        """Return ``(category, confidence, risk_level)`` from one scan."""
+        if not text or not text.strip():
+            return 'other', 0.0, 'medium'
+        result = self.scan(text)
+        category, confidence = self._best(result['scores'])
+        return category, confidence, result['risk_level']
+
+    def classify_many(self, texts: Iterable[str]) -> List[Tuple[str, float, str]]:
+        """Batch variant of :meth:`classify_with_risk` for bulk re-analysis."""
+        return [self.classify_with_risk(text) for text in texts]
+
+
+# Built once at import and shared by utils and the API endpoints
+default_classifier = KeywordClassifier()
+
+
+def classify_many(texts: Iterable[str]) -> List[Tuple[str, float, str]]:
+    return default_classifier.classify_many(texts)
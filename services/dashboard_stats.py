@@ -0,0 +1,156 @@
+"""
+Maintained dashboard counters.
+
+The dashboard shows four counts (open cases, clients, pending actions,
+documents). Instead of counting the tables on every page load, the counts
+live in ``dashboard_stat`` rows. Session flush hooks adjust them inside the
+same transaction as the change. Bulk writes that bypass the ORM unit of
+work either call :func:`bump` themselves (the materialize service does) or
+are corrected by :func:`reconcile`, which runs on a schedule.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import event, inspect, update
+
+try:
+    from ..models import db, Case, Client, Action, Document, DashboardStat
+except (ImportError, ValueError):
+    from models import db, Case, Client, Action, Document, DashboardStat
+
+
+def _status_is(value: str):
+    def check(state: Dict[str, object]) -> bool:
+        return state.get('status') == value
+    return check
+
+
+def _always(state: Dict[str, object]) -> bool:
+    return True
+
+
+# key -> (model, attributes the predicate reads, predicate over those attributes, live count query)
+STATS: Dict[str, Tuple[type, Tuple[str, ...], Callable[[Dict[str, object]], bool], Callable[[], int]]] = {
+    'active_cases': (Case, ('status',), _status_is('open'), lambda: Case.query.filter_by(status='open').count()),
+    'active_clients': (Client, (), _always, lambda: Client.query.count()),
+    'pending_actions': (Action, ('status',), _status_is('pending'), lambda: Action.query.filter_by(status='pending').count()),
+    'documents_count': (Document, (), _always, lambda: Document.query.count()),
+}
+
+
+def _column_default(model, attr):
+    default = model.__table__.c[attr].default
+    return default.arg if default is not None and default.is_scalar else None
+
+
+def _state(obj, attrs, old: bool) -> Dict[str, object]:
+    """Attribute values of ``obj`` before (old=True) or after the pending flush."""
+    insp = inspect(obj)
+    out = {}
+    for attr in attrs:
+        hist = insp.attrs[attr].history
+        if old and hist.deleted:
+            out[attr] = hist.deleted[0]
+        elif not old and hist.added:
+            out[attr] = hist.added[0]
+        else:
+            out[attr] = getattr(obj, attr)
+        if out[attr] is None and insp.pending:
+            # Column defaults are only applied at INSERT time
+            out[attr] = _column_default(type(obj), attr)
+    return out
+
+
+def _pending_deltas(session) -> Dict[str, int]:
+    """Counter changes implied by the objects about to be flushed."""
+    deltas: Dict[str, int] = {}
+    for key, (model, attrs, predicate, _) in STATS.items():
+        d = 0
+        for obj in session.new:
+            if isinstance(obj, model) and predicate(_state(obj, attrs, old=False)):
+                d += 1
+        for obj in session.deleted:
+            if isinstance(obj, model) and predicate(_state(obj, attrs, old=True)):
+                d -= 1
+        if attrs:
+            for obj in session.dirty:
+                if isinstance(obj, model) and session.is_modified(obj):
+                    d += int(predicate(_state(obj, attrs, old=False))) - int(predicate(_state(obj, attrs, old=True)))
+        if d:
+            deltas[key] = d
+    return deltas
+
+
+def bump(key: str, delta: int, session=None) -> None:
+    """Atomically add ``delta`` to a counter within the current transaction."""
+    if not delta:
+        return
+    session = session or db.session
+    session.connection().execute(
+        update(DashboardStat.__table__)
+        .where(DashboardStat.__table__.c.key == key)
+        .values(value=DashboardStat.__table__.c.value + delta, updated_at=datetime.utcnow())
+    )
+
+
+def _before_flush(session, flush_context, instances):
+    # Deltas are computed while deleted rows can still be loaded and applied
+    # once the flush has written the rows they describe.
+    pending = session.info.setdefault('dashboard_stat_deltas', {})
+    for key, delta in _pending_deltas(session).items():
+        pending[key] = pending.get(key, 0) + delta
+
+
+def _after_flush(session, flush_context):
+    for key, delta in session.info.pop('dashboard_stat_deltas', {}).items():
+        bump(key, delta, session)
+
+
+def _after_rollback(session):
+    session.info.pop('dashboard_stat_deltas', None)
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+def install(session_cls) -> None:
+    """Register the counter hooks on a Session class (idempotent)."""
+    for name, fn in (('before_flush', _before_flush), ('after_flush', _after_flush), ('after_rollback', _after_rollback)):
+        if not event.contains(session_cls, name, fn):
+            event.listen(session_cls, name, fn)
+    # Load the previous value when an expired attribute is assigned, otherwise
+    # the flush history cannot tell an open case from a newly closed one.
+    for model, attrs, _, _ in STATS.values():
+        for attr in attrs:
+            target = getattr(model, attr)
+            if not event.contains(target, 'set', _load_old_value):
+                event.listen(target, 'set', _load_old_value, active_history=True, retval=True)
+
+
+def reconcile(session=None) -> Dict[str, int]:
+    """Recount every stat from its table; returns the drift that was corrected."""
+    session = session or db.session
+    drift = {}
+    current = {row.key: row for row in DashboardStat.query.all()}
+    for key, (_, _, _, count) in STATS.items():
+        actual = count()
+        row = current.get(key)
+        if row is None:
+            session.add(DashboardStat(key=key, value=actual))
+            drift[key] = actual
+        elif row.value != actual:
+            drift[key] = actual - row.value
+            row.value = actual
+    session.commit()
+    return drift
+
+
+def read() -> Dict[str, int]:
+    """Return all counters in one query.
+
+    Counters not seeded yet (before the first scheduled :func:`reconcile`) are
+    counted live; reading never writes, so the caller's transaction is left alone.
+    """
+    rows = {row.key: row.value for row in DashboardStat.query.all()}
+    return {key: rows[key] if key in rows else count() for key, (_, _, _, count) in STATS.items()}
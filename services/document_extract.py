@@ -0,0 +1,208 @@
+"""
+Background text extraction and thumbnails for uploaded documents.
+
+Uploads only store bytes; each new document gets a ``document_extraction``
+row in ``pending`` state and the ``document_extraction`` job hands batches of
+them to a process pool (spawned, like services/audio_preprocess.py, so
+parsing never runs on request threads or inherits web-process state):
+
+  - PDF text via pypdf, DOCX via python-docx, plain text decoded as UTF-8;
+  - a JPEG thumbnail of the first frame/page of images via Pillow.
+
+Results land in the side table, whose text feeds the search index as the
+``document`` kind. pypdf and Pillow are imported in the worker only, so a
+missing library fails the affected documents instead of the app.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Hashable, Iterator, Optional, Tuple
+
+DOCUMENT_EXTRACT_WORKERS = int(os.getenv('DOCUMENT_EXTRACT_WORKERS', '2'))
+DOCUMENT_EXTRACT_TIMEOUT_SECONDS = float(os.getenv('DOCUMENT_EXTRACT_TIMEOUT_SECONDS', '120'))
+MAX_TEXT_CHARS = int(os.getenv('DOCUMENT_EXTRACT_MAX_CHARS', '200000'))
+THUMBNAIL_SIZE = int(os.getenv('DOCUMENT_THUMBNAIL_SIZE', '256'))
+
+KINDS = {
+    '.txt': 'text', '.md': 'text', '.csv': 'text',
+    '.docx': 'docx',
+    '.pdf': 'pdf',
+    '.jpg': 'image', '.jpeg': 'image', '.png': 'image', '.gif': 'image', '.webp': 'image',
+    '.bmp': 'image', '.tif': 'image', '.tiff': 'image',
+}
+
+
+def kind_of(filename: str) -> Optional[str]:
+    """Extraction kind for a file name, or None when nothing can be extracted."""
+    return KINDS.get(os.path.splitext(filename or '')[1].lower())
+
+
+def thumbnail_path(folder: str, document_id: int) -> str:
+    """``folder/<id // 1000>/<id>.jpg``; the shard keeps directories small."""
+    return os.path.join(folder, str(document_id // 1000), f"{document_id}.jpg")
+
+
+def _clean(text: str, max_chars: int) -> str:
+    # NUL is not allowed in PostgreSQL text
+    return text.replace('\x00', '')[:max_chars]
+
+
+def _text_file(path: str, max_chars: int) -> str:
+    with open(path, 'rb') as f:
+        data = f.read(max_chars * 4)
+    return _clean(data.decode('utf-8', errors='replace'), max_chars)
+
+
+def _docx_text(path: str, max_chars: int) -> str:
+    import docx
+
+    doc = docx.Document(path)
+    parts, size = [], 0
+    blocks = [p.text for p in doc.paragraphs]
+    for table in doc.tables:
+        for row in table.rows:
+            blocks.append(' | '.join(cell.text for cell in row.cells))
+    for block in blocks:
+        if not block:
+            continue
+        parts.append(block)
+        size += len(block) + 1
+        if size >= max_chars:
+            break
+    return _clean('\n'.join(parts), max_chars)
+
+
+def _pdf_text(path: str, max_chars: int):
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    if reader.is_encrypted:
+        reader.decrypt('')
+    parts, size = [], 0
+    for page in reader.pages:
+        text = page.extract_text() or ''
+        parts.append(text)
+        size += len(text) + 1
+        if size >= max_chars:
+            break
+    return _clean('\n'.join(parts), max_chars), len(reader.pages)
+
+
+def _thumbnail(path: str, dst: str, size: int) -> None:
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.seek(0)  # first frame / page
+        thumb = img.convert('RGB')
+        thumb.thumbnail((size, size))
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = f"{dst}.{os.getpid()}.tmp"
+        thumb.save(tmp, 'JPEG', quality=80)
+        os.replace(tmp, dst)
+
+
+def extract(path: str, kind: str, thumb_dst: Optional[str], max_chars: int = MAX_TEXT_CHARS,
+            thumb_size: int = THUMBNAIL_SIZE) -> Dict[str, object]:
+    """Extract one document; runs in the pool. Raises on unreadable files."""
+    started = time.perf_counter()
+    result: Dict[str, object] = {'text': None, 'page_count': None, 'thumbnail_path': None,
+                                 'source_bytes': os.path.getsize(path)}
+    if kind == 'text':
+        result['text'] = _text_file(path, max_chars)
+    elif kind == 'docx':
+        result['text'] = _docx_text(path, max_chars)
+    elif kind == 'pdf':
+        result['text'], result['page_count'] = _pdf_text(path, max_chars)
+    elif kind == 'image' and thumb_dst:
+        _thumbnail(path, thumb_dst, thumb_size)
+        result['thumbnail_path'] = thumb_dst
+    result['duration_ms'] = round((time.perf_counter() - started) * 1000.0, 2)
+    return result
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ProcessPoolExecutor(max_workers=max(1, DOCUMENT_EXTRACT_WORKERS),
+                                            mp_context=multiprocessing.get_context('spawn'))
+                _pool_pid = pid
+    return _pool
+
+
+def reset_pool(pool: Optional[ProcessPoolExecutor] = None) -> None:
+    """Shut down ``pool`` (default: the current one) and kill its workers; the next submit starts a new pool.
+
+    Used when a worker died (e.g. OOM on a huge file) or hangs past its
+    timeout: a running task cannot be cancelled, so its process is terminated.
+    """
+    global _pool
+    with _lock:
+        pool = pool or _pool
+        if pool is None:
+            return
+        if pool is _pool:
+            _pool = None
+    processes = list((getattr(pool, '_processes', None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(1)
+
+
+def submit(path: str, kind: str, thumb_dst: Optional[str]) -> Future:
+    return _get_pool().submit(extract, path, kind, thumb_dst)
+
+
+def run_batch(jobs: Dict[Hashable, Tuple[str, str, Optional[str]]],
+              timeout: float = DOCUMENT_EXTRACT_TIMEOUT_SECONDS,
+              poll_seconds: float = 0.5) -> Iterator[Tuple[Hashable, Optional[Dict[str, object]], Optional[BaseException]]]:
+    """Extract ``jobs`` (key -> ``submit`` arguments) in the pool; yields (key, result, error) as each ends.
+
+    Each job gets ``timeout`` seconds from when a worker starts it, so jobs
+    queued behind others are not charged for the wait. A job over its timeout
+    fails with TimeoutError and the pool is replaced; the other unfinished
+    jobs were killed with it and run again on the new pool. When a worker
+    crashes, the unfinished jobs fail with BrokenProcessPool.
+    """
+    pool = _get_pool()
+    pending = {pool.submit(extract, *args): key for key, args in jobs.items()}
+    started: Dict[Future, float] = {}
+    while pending:
+        done, _ = wait(pending, timeout=poll_seconds, return_when=FIRST_COMPLETED)
+        for future in done:
+            key = pending.pop(future)
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                reset_pool(pool)
+            yield key, (None if error else future.result()), error
+        now = time.monotonic()
+        expired = []
+        for future in pending:
+            if future.running():
+                started.setdefault(future, now)
+            if future in started and now - started[future] > timeout:
+                expired.append(future)
+        if not expired:
+            continue
+        reset_pool(pool)
+        for future in expired:
+            yield pending.pop(future), None, TimeoutError(f"extraction exceeded {timeout:g}s")
+        survivors = list(pending.values())
+        pending.clear()
+        started.clear()
+        pool = _get_pool()
+        for key in survivors:
+            pending[pool.submit(extract, *jobs[key])] = key
@@ -0,0 +1,101 @@
+"""
+Multi-worker email queue: row claiming, retry backoff and dead-lettering.
+
+Workers claim due rows by writing a lease (``locked_by`` token and
+``locked_until``) in one UPDATE and commit before sending, so no lock is held
+while talking to SMTP and no two workers send the same row. On PostgreSQL the
+candidate rows are picked with ``FOR UPDATE SKIP LOCKED`` so concurrent
+claimers skip each other instead of queueing; SQLite serializes the UPDATE.
+A worker that dies mid-batch leaves rows whose lease expires and which are
+claimed again.
+
+Failures stay ``pending`` with ``send_after`` pushed back exponentially
+(with jitter); after ``max_attempts`` the row is dead-lettered as ``failed``.
+"""
+import os
+import random
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+
+from sqlalchemy import bindparam, or_, select, update
+
+try:
+    from ..models import EmailQueue
+except (ImportError, ValueError):
+    from models import EmailQueue
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def backoff_seconds(attempts: int, base: float, cap: float) -> float:
+    """Delay before retry number ``attempts`` (1-based): base * 2^(n-1), capped, +/-20% jitter."""
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _claimable(now: datetime):
+    return (
+        EmailQueue.status == 'pending',
+        EmailQueue.send_after <= now,
+        or_(EmailQueue.locked_until.is_(None), EmailQueue.locked_until < now),
+    )
+
+
+def claim_batch(session, limit: int, lease_seconds: float, now: Optional[datetime] = None) -> List[EmailQueue]:
+    """Lease up to ``limit`` due rows to this worker and commit; returns them oldest first."""
+    now = now or datetime.utcnow()
+    token = f"{WORKER_ID}:{uuid.uuid4().hex[:12]}"[:64]
+    candidates = (select(EmailQueue.id).where(*_claimable(now))
+                  .order_by(EmailQueue.created_at.asc()).limit(limit))
+    if session.get_bind().dialect.name == 'postgresql':
+        candidates = candidates.with_for_update(skip_locked=True)
+    # The lease conditions are repeated on the UPDATE so a row another worker
+    # claimed between the subquery and the write is not taken twice
+    session.execute(
+        update(EmailQueue)
+        .where(EmailQueue.id.in_(candidates.scalar_subquery()), *_claimable(now))
+        .values(locked_by=token, locked_until=now + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return (session.query(EmailQueue).filter(EmailQueue.locked_by == token)
+            .order_by(EmailQueue.created_at.asc()).all())
+
+
+def complete_batch(session, items: Sequence[EmailQueue], errors: Sequence[Optional[str]], max_attempts: int,
+                   retry_base_seconds: float, retry_max_seconds: float,
+                   now: Optional[datetime] = None) -> dict:
+    """Record send results for claimed ``items`` in one transaction and release their leases.
+
+    Rows whose lease was lost (expired and re-claimed elsewhere) are left alone.
+    """
+    now = now or datetime.utcnow()
+    rows = []
+    outcome = {'sent': 0, 'retry': 0, 'failed': 0}
+    for item, error in zip(items, errors):
+        attempts = (item.attempts or 0) + 1
+        row = {'b_id': item.id, 'b_token': item.locked_by, 'attempts': attempts, 'last_error': error,
+               'send_after': item.send_after, 'status': 'sent'}
+        if error:
+            if attempts >= max_attempts:
+                row['status'] = 'failed'
+            else:
+                row['status'] = 'pending'
+                row['send_after'] = now + timedelta(seconds=backoff_seconds(attempts, retry_base_seconds,
+                                                                            retry_max_seconds))
+        outcome['retry' if row['status'] == 'pending' else row['status']] += 1
+        rows.append(row)
+    if rows:
+        table = EmailQueue.__table__
+        session.execute(
+            update(table)
+            .where(table.c.id == bindparam('b_id'), table.c.locked_by == bindparam('b_token'))
+            .values(status=bindparam('status'), attempts=bindparam('attempts'),
+                    last_error=bindparam('last_error'), send_after=bindparam('send_after'),
+                    locked_by=None, locked_until=None, updated_at=now),
+            rows,
+        )
+    session.commit()
+    return outcome
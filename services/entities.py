@@ -0,0 +1,120 @@
+"""
+Single-pass entity extraction for intake descriptions and transcripts.
+
+Every entity pattern becomes a named group in one alternation regex that is
+compiled at import, so a text is scanned once and each hit comes back with its
+type, value and character span. Long transcripts can be fed in chunks through
+``EntityExtractor.stream`` without holding the whole text in memory.
+"""
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+_MONTHS = r'Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?'
+_STREET_SUFFIXES = (
+    r'Street|St\.?|Avenue|Ave\.?|Road|Rd\.?|Boulevard|Blvd\.?|Lane|Ln\.?|Drive|Dr\.?|Court|Ct\.?|Way|Terrace|Trl\.?|Trail|'
+    r'Plaza|Pl\.?|Square|Sq\.?|Circle|Cir\.?|Highway|Hwy\.?|Freeway|Fwy\.?|Turnpike|Tpke\.?|Parkway|Pkwy\.?|Alley|Aly\.?|'
+    r'Bend|Bnd\.?|Cove|Cv\.?|Creek|Crk\.?|Grove|Grv\.?|Hollow|Hlw\.?|Island|Isl\.?|Junction|Jct\.?|Knoll|Knl\.?|Meadow|Mdw\.?|'
+    r'Mountain|Mtn\.?|Oval|Ovl\.?|Path|Pth\.?|Ridge|Rdg\.?|Run|Rn\.?|Spring|Spg\.?|Summit|Smt\.?|View|Vw\.?|Village|Vlg\.?|'
+    r'Way|Wy\.?'
+)
+
+# Ordered by priority: when two patterns match at the same position the
+# earlier one wins (e.g. an email is not also reported as a phone number).
+ENTITY_PATTERNS: List[Tuple[str, str]] = [
+    ('emails', r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+    ('dates', r'\b(?:' + _MONTHS + r')\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}\b|\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b'),
+    ('amounts', r'\$\d+(?:\.\d{1,2})?\b|\b\d+\s*(?:dollars|USD)\b'),
+    ('phone_numbers', r'\b(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b'),
+    ('relative_dates', r'yesterday|last\s+(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)|last\s+week|last\s+month|\b\d{1,2}\s*(?:am|pm)\b'),
+    # Proper-noun parts stay case-sensitive so a location cannot swallow a
+    # whole lower-case sentence that happens to end in "road" or "court". A
+    # street address starts with a capitalised word after the number and stays
+    # on one line within 60 characters, so it cannot run over a sentence and
+    # hide the entities in it (a single scan never reports overlaps).
+    ('locations', r'\b(?:\d+[ \t]+(?-i:[A-Z0-9])[\w \t]{0,59}?,?[ \t]+(?-i:[A-Z]{2})[ \t]+\d{5}\b|\b(?-i:[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:' + _STREET_SUFFIXES + r'))\b'),
+]
+
+# Longest entity the streaming scanner guarantees not to split across chunks
+STREAM_OVERLAP = 512
+
+
+class Entity(NamedTuple):
+    type: str
+    value: str
+    start: int
+    end: int
+
+    def to_dict(self) -> Dict[str, object]:
+        return {'type': self.type, 'value': self.value, 'start': self.start, 'end': self.end}
+
+
+class EntityExtractor:
+    """Finds emails, dates, amounts, phone numbers, relative dates and locations.
+
+    Matches are leftmost and non-overlapping across all types: the scan never
+    reports two entities covering the same characters.
+    """
+
+    def __init__(self, patterns: Optional[List[Tuple[str, str]]] = None, overlap: int = STREAM_OVERLAP):
+        self.patterns = patterns or ENTITY_PATTERNS
+        self.types = [name for name, _ in self.patterns]
+        self.overlap = overlap
+        self._pattern = re.compile(
+            '|'.join(f'(?P<{name}>{pattern})' for name, pattern in self.patterns),
+            re.IGNORECASE,
+        )
+
+    def finditer(self, text: str, offset: int = 0) -> Iterator[Entity]:
+        """Yield entities in text order; ``offset`` is added to every span."""
+        if not text:
+            return
+        for m in self._pattern.finditer(text):
+            yield Entity(m.lastgroup, m.group(), m.start() + offset, m.end() + offset)
+
+    def spans(self, text: str) -> List[Dict[str, object]]:
+        return [entity.to_dict() for entity in self.finditer(text)]
+
+    def extract(self, text: str) -> Dict[str, List[str]]:
+        """Group unique values by entity type, in order of first appearance."""
+        entities: Dict[str, Dict[str, None]] = {}
+        for entity in self.finditer(text):
+            entities.setdefault(entity.type, {})[entity.value] = None
+        return {name: list(values) for name, values in entities.items()}
+
+    def stream(self, chunks: Iterable[str], overlap: Optional[int] = None) -> Iterator[Entity]:
+        """Yield entities from an iterable of text chunks with absolute spans.
+
+        The tail of each buffer (``overlap`` characters) is held back and
+        rescanned with the next chunk, so entities shorter than ``overlap``
+        are reported exactly as a single scan of the joined text would.
+        """
+        overlap = overlap or self.overlap
+        buf = ''
+        base = 0  # absolute offset of buf[0]
+        pos = 0   # where the next scan of buf starts
+        for chunk in chunks:
+            if not chunk:
+                continue
+            buf += chunk
+            if len(buf) - pos < 2 * overlap:
+                continue
+            safe = len(buf) - overlap
+            resume = safe
+            for m in self._pattern.finditer(buf, pos):
+                if m.end() > safe:
+                    # Could still grow with the next chunk; rescan it then
+                    resume = m.start()
+                    break
+                yield Entity(m.lastgroup, m.group(), m.start() + base, m.end() + base)
+                resume = max(safe, m.end())
+            # Keep one character before the resume point so \b sees it
+            cut = max(0, resume - 1)
+            buf = buf[cut:]
+            base += cut
+            pos = resume - cut
+        for m in self._pattern.finditer(buf, pos):
+            yield Entity(m.lastgroup, m.group(), m.start() + base, m.end() + base)
+
+
+# Compiled once at import and shared by utils and the intake endpoints
+default_extractor = EntityExtractor()
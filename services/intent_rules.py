@@ -0,0 +1,168 @@
+"""
+Intent rule engine backed by ``IntentRule`` rows.
+
+All rule terms are folded into one case-insensitive alternation regex, so the
+intake text is scanned once no matter how many intents or rules exist. The
+compiled ruleset is cached and rebuilt only when the rule version stamp
+changes.
+
+Rule ``pattern`` formats:
+  - plain text, e.g. ``wrongful termination``: matches when the phrase occurs
+  - JSON ``{"any": ["slip", "slipped"]}``: matches when any phrase occurs
+  - JSON ``{"all": [["walmart"], ["slip", "slipped"], ["water", "wet floor"]]}``:
+    every group must have at least one phrase present; a bare string in
+    ``all`` is a one-phrase group
+  - either JSON form may add ``"none": [...]`` phrases that veto the rule
+
+Phrases match as case-insensitive substrings, like the hardcoded scenario
+checks in ``utils.analyze_intake_text_scenarios``.
+"""
+import json
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def parse_rule_pattern(pattern: str) -> Optional[Dict[str, List[List[str]]]]:
+    """Normalize a rule pattern into ``{'all': [[...], ...], 'none': [...]}``."""
+    raw = (pattern or '').strip()
+    if not raw:
+        return None
+    spec: Any = raw
+    if raw.startswith('{'):
+        try:
+            spec = json.loads(raw)
+        except ValueError:
+            spec = raw
+
+    def phrases(values) -> List[str]:
+        if isinstance(values, str):
+            values = [values]
+        return [str(v).strip().lower() for v in (values or []) if str(v).strip()]
+
+    if isinstance(spec, str):
+        groups = [phrases(spec)]
+        none: List[str] = []
+    elif isinstance(spec, dict):
+        if 'all' in spec:
+            groups = [phrases(g) for g in (spec.get('all') or [])]
+        else:
+            groups = [phrases(spec.get('any'))]
+        none = phrases(spec.get('none'))
+    else:
+        return None
+    groups = [g for g in groups if g]
+    if not groups:
+        return None
+    return {'all': groups, 'none': none}
+
+
+class CompiledRuleset:
+    """Immutable matcher built from a snapshot of intents and rules."""
+
+    def __init__(self, rules: Iterable[Dict[str, Any]], intents: Dict[int, Dict[str, Any]], version: Any = None):
+        self.version = version
+        self.intents = intents
+        self.rules: List[Tuple[int, float, List[List[str]], List[str]]] = []
+        vocabulary = set()
+        for rule in rules:
+            if rule['intent_id'] not in intents:
+                continue
+            spec = parse_rule_pattern(rule.get('pattern'))
+            if spec is None:
+                continue
+            weight = float(rule.get('weight') or 1.0)
+            self.rules.append((rule['intent_id'], weight, spec['all'], spec['none']))
+            for group in spec['all']:
+                vocabulary.update(group)
+            vocabulary.update(spec['none'])
+
+        self._pattern = None
+        self._implied: Dict[str, Tuple[str, ...]] = {}
+        if vocabulary:
+            ordered = sorted(vocabulary, key=len, reverse=True)
+            # Zero-width lookahead reports overlapping phrases; longest first so
+            # each position yields its widest phrase, nested ones via _implied
+            self._pattern = re.compile('(?=(' + '|'.join(re.escape(p) for p in ordered) + '))')
+            self._implied = {p: tuple(o for o in ordered if o in p) for p in ordered}
+
+    def phrases_in(self, text: str) -> set:
+        found = set()
+        if not text or self._pattern is None:
+            return found
+        for m in self._pattern.finditer(text.lower()):
+            found.update(self._implied[m.group(1)])
+        return found
+
+    def score(self, text: str) -> List[Dict[str, Any]]:
+        """Return matching intents ordered by score (highest first)."""
+        found = self.phrases_in(text)
+        if not found:
+            return []
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        for intent_id, weight, groups, none in self.rules:
+            if any(p in found for p in none):
+                continue
+            if all(any(p in found for p in group) for group in groups):
+                scores[intent_id] = scores.get(intent_id, 0.0) + weight
+                matched[intent_id] = matched.get(intent_id, 0) + 1
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            dict(self.intents[intent_id], score=score, rules_matched=matched[intent_id])
+            for intent_id, score in ranked
+        ]
+
+
+class IntentRuleEngine:
+    """Caches a CompiledRuleset and hot-reloads it when the version changes.
+
+    ``load_version`` should be a cheap query returning a value that changes
+    whenever rules or intents change; ``load_rules`` returns ``(rules,
+    intents)`` where rules are dicts with intent_id/pattern/weight and intents
+    maps intent id to a dict with at least ``key`` and ``name``. The version is
+    re-checked at most every ``check_interval`` seconds unless
+    :meth:`mark_dirty` is called.
+    """
+
+    def __init__(self, load_version: Callable[[], Any],
+                 load_rules: Callable[[], Tuple[List[Dict[str, Any]], Dict[int, Dict[str, Any]]]],
+                 check_interval: float = 5.0):
+        self._load_version = load_version
+        self._load_rules = load_rules
+        self.check_interval = check_interval
+        self._ruleset: Optional[CompiledRuleset] = None
+        self._checked_at = 0.0
+        self._dirty = True
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    def ruleset(self) -> CompiledRuleset:
+        now = time.monotonic()
+        current = self._ruleset
+        if current is not None and not self._dirty and now - self._checked_at < self.check_interval:
+            return current
+        with self._lock:
+            current = self._ruleset
+            if current is not None and not self._dirty and time.monotonic() - self._checked_at < self.check_interval:
+                return current
+            self._dirty = False
+            version = self._load_version()
+            if current is None or version != current.version:
+                rules, intents = self._load_rules()
+                current = CompiledRuleset(rules, intents, version=version)
+                self._ruleset = current
+                self.reloads += 1
+            self._checked_at = time.monotonic()
+            return current
+
+    def score(self, text: str) -> List[Dict[str, Any]]:
+        return self.ruleset().score(text)
+
+    def best(self, text: str) -> Optional[Dict[str, Any]]:
+        ranked = self.score(text)
+        return ranked[0] if ranked else None
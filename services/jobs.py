@@ -0,0 +1,201 @@
+"""
+Scheduled background jobs and the worker that runs them.
+
+Jobs are registered once on a :class:`JobRegistry` (name, callable, interval).
+:class:`Worker` runs them from a dedicated process (``python -m worker``) or,
+for local development, a thread in the web process. Only the worker holding
+the ``scheduler`` row in ``scheduler_lease`` runs jobs: the lease is renewed
+every ``ttl / 3`` seconds and taken over when it lapses, so with several
+worker instances exactly one schedules and another takes over within ``ttl``
+seconds of it dying.
+
+Each run is timed and folded into its ``job_stat`` row, so the web process
+can report per-job totals.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+try:
+    from ..models import db, JobStat, SchedulerLease
+except (ImportError, ValueError):
+    from models import db, JobStat, SchedulerLease
+
+
+class Job:
+    def __init__(self, name: str, fn: Callable[[], None], interval_seconds: float):
+        self.name = name
+        self.fn = fn
+        self.interval_seconds = interval_seconds
+        self.next_run = 0.0
+        self.last_duration_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_started_at: Optional[datetime] = None
+
+
+class JobRegistry:
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+
+    def register(self, name: str, fn: Callable[[], None], interval_seconds: float) -> Job:
+        job = Job(name, fn, interval_seconds)
+        self.jobs[name] = job
+        return job
+
+    def run(self, name: str) -> Job:
+        """Run one job now, recording its duration and any exception it raised."""
+        job = self.jobs[name]
+        job.last_started_at = datetime.utcnow()
+        started = time.perf_counter()
+        error = None
+        try:
+            job.fn()
+        except Exception as e:
+            error = f"{e.__class__.__name__}: {e}"
+        elapsed = (time.perf_counter() - started) * 1000.0
+        job.last_error = error
+        job.last_duration_ms = round(elapsed, 2)
+        return job
+
+
+class LeaderLease:
+    """Time-limited leadership recorded in one ``scheduler_lease`` row."""
+
+    def __init__(self, name: str = 'scheduler', ttl_seconds: float = 30, holder: Optional[str] = None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def acquire(self, session) -> bool:
+        """Take or renew the lease; True while this process is the leader."""
+        now = datetime.utcnow()
+        expires = now + timedelta(seconds=self.ttl_seconds)
+        try:
+            renewed = session.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name,
+                       or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now))
+                .values(holder=self.holder, expires_at=expires)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not renewed:
+                # No row yet (first start) or another live holder; the insert
+                # fails on the primary key in the second case
+                session.add(SchedulerLease(name=self.name, holder=self.holder, acquired_at=now, expires_at=expires))
+            session.commit()
+            return True
+        except IntegrityError:
+            session.rollback()
+            return False
+
+    def release(self, session) -> None:
+        session.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder)
+            .values(expires_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+
+
+def save_stats(session, job: Job, worker: str) -> None:
+    """Fold the latest run of ``job`` into its ``job_stat`` row."""
+    row = session.get(JobStat, job.name)
+    if row is None:
+        row = JobStat(name=job.name, runs=0, failures=0, total_duration_ms=0)
+        session.add(row)
+    row.runs = (row.runs or 0) + 1
+    row.failures = (row.failures or 0) + (1 if job.last_error else 0)
+    row.last_started_at = job.last_started_at
+    row.last_duration_ms = job.last_duration_ms
+    row.total_duration_ms = (row.total_duration_ms or 0) + (job.last_duration_ms or 0)
+    row.max_duration_ms = max(row.max_duration_ms or 0, job.last_duration_ms or 0)
+    row.last_error = job.last_error
+    row.worker = worker
+    session.commit()
+
+
+class Worker:
+    """Runs due jobs while holding the leader lease; each job in its own thread, never overlapping itself."""
+
+    def __init__(self, app, registry: JobRegistry, lease: Optional[LeaderLease] = None, tick_seconds: float = 1.0):
+        self.app = app
+        self.registry = registry
+        self.lease = lease or LeaderLease()
+        self.tick_seconds = tick_seconds
+        self.is_leader = False
+        self.stop_event = threading.Event()
+        self._running: Dict[str, object] = {}
+
+    def _renew(self) -> bool:
+        with self.app.app_context():
+            try:
+                leader = self.lease.acquire(db.session)
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f"Scheduler lease error: {str(e)}")
+                leader = False
+        if leader and not self.is_leader:
+            self.app.logger.info(f"Scheduler leadership acquired by {self.lease.holder}")
+            # Run everything promptly after a takeover
+            for job in self.registry.jobs.values():
+                job.next_run = 0.0
+        elif self.is_leader and not leader:
+            self.app.logger.warning(f"Scheduler leadership lost by {self.lease.holder}")
+        return leader
+
+    def _run_job(self, name: str) -> None:
+        job = self.registry.run(name)
+        if job.last_error:
+            self.app.logger.error(f"Job {name} failed after {job.last_duration_ms}ms: {job.last_error}")
+        else:
+            self.app.logger.info(f"Job {name} ran in {job.last_duration_ms}ms")
+        with self.app.app_context():
+            try:
+                save_stats(db.session, job, self.lease.holder)
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f"Saving stats for job {name} failed: {str(e)}")
+
+    def run(self) -> None:
+        jobs = list(self.registry.jobs.values())
+        pool = ThreadPoolExecutor(max_workers=max(1, len(jobs)), thread_name_prefix='job')
+        next_renew = 0.0
+        try:
+            while not self.stop_event.is_set():
+                now = time.monotonic()
+                if now >= next_renew:
+                    self.is_leader = self._renew()
+                    next_renew = now + self.lease.ttl_seconds / 3
+                if self.is_leader:
+                    for job in jobs:
+                        running = self._running.get(job.name)
+                        if now >= job.next_run and (running is None or running.done()):
+                            job.next_run = now + job.interval_seconds
+                            self._running[job.name] = pool.submit(self._run_job, job.name)
+                self.stop_event.wait(self.tick_seconds)
+        finally:
+            pool.shutdown(wait=True)
+            if self.is_leader:
+                with self.app.app_context():
+                    try:
+                        self.lease.release(db.session)
+                    except Exception:
+                        db.session.rollback()
+            self.is_leader = False
+
+    def start_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.run, name='job-worker', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        self.stop_event.set()
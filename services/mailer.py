@@ -0,0 +1,200 @@
+"""
+Pooled SMTP transport.
+
+Each :class:`SMTPConnection` keeps one authenticated SMTP session open
+(EHLO, STARTTLS, LOGIN once) and reconnects when the server has dropped it.
+:class:`MailerPool` holds up to ``concurrency`` of them between sends, so a
+queue run sends its whole batch over already-open sessions instead of
+connecting per message. Sessions idle longer than ``idle_seconds`` are
+closed rather than reused, since servers drop quiet connections.
+"""
+import smtplib
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+
+class ConnectFailed(Exception):
+    """Could not open or authenticate an SMTP session."""
+
+
+class OutgoingEmail(NamedTuple):
+    to: Optional[str]
+    subject: str
+    body: str
+
+
+def format_message(sender: str, email: OutgoingEmail) -> str:
+    return f"From: {sender}\r\nTo: {email.to}\r\nSubject: {email.subject}\r\n\r\n{email.body}"
+
+
+class SMTPConnection:
+    """One persistent, authenticated SMTP session."""
+
+    def __init__(self, host: str, port: int, user: Optional[str], password: Optional[str],
+                 sender: str, timeout: float = 10, on_connect: Optional[Callable[[], None]] = None):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.sender = sender
+        self.timeout = timeout
+        self.on_connect = on_connect
+        self._server: Optional[smtplib.SMTP] = None
+        self.last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        try:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        except Exception as e:
+            raise ConnectFailed(str(e) or e.__class__.__name__) from e
+        try:
+            server.ehlo()
+            if server.has_extn('starttls'):
+                server.starttls(context=ssl.create_default_context())
+                server.ehlo()
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception as e:
+            _quietly_close(server)
+            raise ConnectFailed(str(e) or e.__class__.__name__) from e
+        if self.on_connect:
+            self.on_connect()
+        return server
+
+    def send(self, email: OutgoingEmail) -> None:
+        """Send one message, reconnecting once if the session was dropped."""
+        recipients = [email.to] if email.to else [self.sender]
+        message = format_message(self.sender, email)
+        for attempt in (1, 2):
+            if self._server is None:
+                self._server = self._connect()
+            try:
+                self._server.sendmail(self.sender, recipients, message)
+                self.last_used = time.monotonic()
+                return
+            except smtplib.SMTPServerDisconnected:
+                self.close()
+                if attempt == 2:
+                    raise
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+                # The server rejected this message (sendmail already sent RSET);
+                # the session itself is still usable
+                self.last_used = time.monotonic()
+                raise
+            except smtplib.SMTPException:
+                # Unknown session state after a protocol error: start clean next time
+                self.close()
+                raise
+            except OSError:
+                # Socket died mid-send; retry once on a fresh connection
+                self.close()
+                if attempt == 2:
+                    raise
+
+    def close(self) -> None:
+        if self._server is not None:
+            server, self._server = self._server, None
+            try:
+                server.quit()
+            except Exception:
+                _quietly_close(server)
+
+    @property
+    def connected(self) -> bool:
+        return self._server is not None
+
+
+def describe_error(e: Exception) -> str:
+    if isinstance(e, smtplib.SMTPResponseException):
+        detail = e.smtp_error.decode('utf-8', 'replace') if isinstance(e.smtp_error, bytes) else e.smtp_error
+        return f'{e.smtp_code} {detail}'
+    return str(e) or e.__class__.__name__
+
+
+def _quietly_close(server: smtplib.SMTP) -> None:
+    try:
+        server.close()
+    except Exception:
+        pass
+
+
+class MailerPool:
+    """Sends batches of messages over a small pool of reusable SMTP sessions."""
+
+    def __init__(self, host: str, port: int, user: Optional[str], password: Optional[str], sender: str,
+                 concurrency: int = 1, idle_seconds: float = 240, timeout: float = 10):
+        self.concurrency = max(1, concurrency)
+        self.idle_seconds = idle_seconds
+        self._factory = lambda: SMTPConnection(host, port, user, password, sender, timeout, self._count_connect)
+        self._idle: List[SMTPConnection] = []
+        self._lock = threading.Lock()
+        self.connects = 0
+
+    def _count_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _checkout(self) -> SMTPConnection:
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if conn.connected and now - conn.last_used > self.idle_seconds:
+                    conn.close()
+                return conn
+        return self._factory()
+
+    def _checkin(self, conn: SMTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.concurrency:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _send_chunk(self, chunk: Sequence[OutgoingEmail]) -> List[Optional[str]]:
+        conn = self._checkout()
+        errors: List[Optional[str]] = []
+        try:
+            for email in chunk:
+                try:
+                    conn.send(email)
+                    errors.append(None)
+                except ConnectFailed as e:
+                    # Server unreachable: fail the rest now rather than time out per message
+                    errors.extend([f'connect failed: {e}'] * (len(chunk) - len(errors)))
+                    break
+                except Exception as e:
+                    errors.append(describe_error(e))
+        finally:
+            self._checkin(conn)
+        return errors
+
+    def send(self, email: OutgoingEmail) -> None:
+        """Send one message; raises on failure."""
+        error = self._send_chunk([email])[0]
+        if error:
+            raise smtplib.SMTPException(error)
+
+    def send_batch(self, emails: Sequence[OutgoingEmail]) -> List[Optional[str]]:
+        """Send ``emails``; returns one error string (or None on success) per message, in order."""
+        emails = list(emails)
+        if not emails:
+            return []
+        workers = min(self.concurrency, len(emails))
+        if workers == 1:
+            return self._send_chunk(emails)
+        # Contiguous chunks, one per session, so each connection streams its share
+        size = -(-len(emails) // workers)
+        chunks = [emails[i:i + size] for i in range(0, len(emails), size)]
+        with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+            results = list(pool.map(self._send_chunk, chunks))
+        return [err for chunk_errors in results for err in chunk_errors]
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
@@ -0,0 +1,107 @@
+"""
+Bulk "materialize plan" writer for automation output.
+
+Intake and automation endpoints describe the Actions (with their CaseAction
+links), Deadlines, EmailDrafts and queued emails they want in a
+``MaterializePlan`` and write it with one INSERT round trip per table instead
+of an ``add()``/``flush()`` per row. Ids come back via multi-row
+``INSERT .. RETURNING`` on PostgreSQL and SQLite >= 3.35; other backends fall
+back to a single ORM flush.
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+try:
+    from ..models import db, Action, CaseAction, Deadline, EmailDraft, EmailQueue
+    from . import dashboard_stats
+except (ImportError, ValueError):
+    from models import db, Action, CaseAction, Deadline, EmailDraft, EmailQueue
+    from services import dashboard_stats
+
+
+class MaterializePlan:
+    """Rows to create for one case; see :func:`materialize`."""
+
+    def __init__(self, case_id: Optional[int] = None):
+        self.case_id = case_id
+        self.actions: List[Dict[str, Any]] = []
+        self.links: List[Dict[str, Any]] = []
+        self.deadlines: List[Dict[str, Any]] = []
+        self.drafts: List[Dict[str, Any]] = []
+        self.queued: List[Optional[Dict[str, Any]]] = []
+
+    def add_action(self, link_status: Optional[str] = None, link_assigned_to_id: Optional[int] = None,
+                   **fields) -> None:
+        """Queue an Action; it is linked to the plan's case via CaseAction."""
+        self.actions.append(fields)
+        self.links.append({
+            'status': link_status or fields.get('status') or 'pending',
+            'assigned_to_id': link_assigned_to_id,
+        })
+
+    def add_deadline(self, **fields) -> None:
+        fields.setdefault('case_id', self.case_id)
+        self.deadlines.append(fields)
+
+    def add_draft(self, queue: Optional[Dict[str, Any]] = None, **fields) -> None:
+        """Queue an EmailDraft; ``queue`` adds an EmailQueue row pointing at it."""
+        fields.setdefault('case_id', self.case_id)
+        self.drafts.append(fields)
+        if queue is not None:
+            queue = dict(queue)
+            queue.setdefault('case_id', fields['case_id'])
+        self.queued.append(queue)
+
+    def __len__(self) -> int:
+        return len(self.actions) + len(self.deadlines) + len(self.drafts)
+
+
+def insert_many(model, rows: List[Dict[str, Any]], return_ids: bool = True, session=None) -> List[int]:
+    """INSERT ``rows`` into ``model``'s table in one round trip; return new ids in row order."""
+    if not rows:
+        return []
+    session = session or db.session
+    if not return_ids:
+        session.execute(insert(model), rows)
+        return []
+    dialect = session.get_bind().dialect
+    if dialect.name == 'sqlite' and getattr(dialect, 'insert_executemany_returning', False):
+        # SQLite cannot batch an *ordered* RETURNING, but a single multi-row
+        # INSERT assigns ascending rowids in VALUES order, so sorting the
+        # returned ids restores row order while keeping one round trip.
+        result = session.execute(insert(model).returning(model.id), rows)
+        return sorted(row[0] for row in result)
+    if getattr(dialect, 'insert_executemany_returning_sort_by_parameter_order', False):
+        result = session.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+        return [row[0] for row in result]
+    objs = [model(**row) for row in rows]
+    session.add_all(objs)
+    session.flush()
+    return [obj.id for obj in objs]
+
+
+def materialize(plan: MaterializePlan, session=None) -> Dict[str, Any]:
+    """Write every row in ``plan``; returns the created ids per kind."""
+    session = session or db.session
+    action_ids = insert_many(Action, plan.actions, session=session)
+    # Bulk INSERTs skip the session flush hooks that maintain dashboard counters
+    pending = sum(1 for a in plan.actions if (a.get('status') or 'pending') == 'pending')
+    dashboard_stats.bump('pending_actions', pending, session)
+    insert_many(CaseAction, [
+        dict(link, case_id=plan.case_id, action_id=action_id)
+        for link, action_id in zip(plan.links, action_ids)
+    ], return_ids=False, session=session)
+    insert_many(Deadline, plan.deadlines, return_ids=False, session=session)
+    draft_ids = insert_many(EmailDraft, plan.drafts, session=session)
+    queue_rows = [
+        dict(queue, draft_id=draft_id)
+        for queue, draft_id in zip(plan.queued, draft_ids) if queue is not None
+    ]
+    insert_many(EmailQueue, queue_rows, return_ids=False, session=session)
+    return {
+        'actions': action_ids,
+        'deadlines': len(plan.deadlines),
+        'drafts': draft_ids,
+        'queued': len(queue_rows),
+    }
@@ -0,0 +1,168 @@
+"""
+Keyset pagination and column projection for list APIs.
+
+Query args understood by :class:`Paginator` (list endpoints page only when
+one of them is given, see :func:`requested`):
+  - ``limit``: page size (default 50, max 200)
+  - ``cursor``: opaque ``next_cursor`` from the previous page
+  - ``fields``: comma-separated output fields; only their columns are loaded
+  - ``total``: ``exact`` (COUNT) or ``estimate`` (planner estimate on
+    PostgreSQL, a capped count elsewhere); omitted by default
+
+Pages are ordered by a ``(key, id)`` pair such as ``(created_at, id)`` with
+NULL keys last, so each page is an index range scan however deep it is.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import func, inspect, or_, select, text
+from sqlalchemy.orm import load_only
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+# Fallback "estimate": count at most this many rows and report a lower bound
+ESTIMATE_COUNT_CAP = 10000
+
+
+class BadPageRequest(ValueError):
+    pass
+
+
+def requested(args, names=('limit', 'cursor', 'fields', 'total')) -> bool:
+    """True when the client opted into paging; without any of ``names`` list
+    endpoints keep their original unpaged response."""
+    return any(args.get(n) for n in names)
+
+
+def encode_cursor(key: Any, id_: int) -> str:
+    value = key.isoformat() if isinstance(key, datetime) else key
+    raw = json.dumps([value, id_], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, datetime_key: bool = True):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key, id_ = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if datetime_key and key is not None:
+            key = datetime.fromisoformat(key)
+        return key, int(id_)
+    except (ValueError, TypeError):
+        raise BadPageRequest('invalid cursor')
+
+
+def estimate_count(session, query) -> Dict[str, Any]:
+    """Cheap row count for ``query``: planner estimate or a capped count."""
+    query = query.order_by(None)
+    bind = session.get_bind()
+    if bind.dialect.name == 'postgresql':
+        compiled = query.statement.compile(dialect=bind.dialect)
+        plan = session.execute(text('EXPLAIN (FORMAT JSON) ' + str(compiled)), compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return {'total': int(plan[0]['Plan']['Plan Rows']), 'total_estimated': True}
+    entity = query.column_descriptions[0]['entity']
+    capped = query.with_entities(*inspect(entity).primary_key).limit(ESTIMATE_COUNT_CAP + 1).subquery()
+    n = session.execute(select(func.count()).select_from(capped)).scalar() or 0
+    if n > ESTIMATE_COUNT_CAP:
+        return {'total': ESTIMATE_COUNT_CAP, 'total_estimated': True}
+    return {'total': n, 'total_estimated': False}
+
+
+class Paginator:
+    """Parses pagination args for one request and applies them to a query."""
+
+    def __init__(self, args, default_limit: int = DEFAULT_LIMIT, max_limit: int = MAX_LIMIT,
+                 allowed_fields: Optional[Iterable[str]] = None):
+        try:
+            limit = int(args.get('limit', default_limit))
+        except (TypeError, ValueError):
+            raise BadPageRequest('limit must be an integer')
+        self.limit = max(1, min(limit, max_limit))
+        self.cursor = args.get('cursor') or None
+        total = (args.get('total') or '').strip().lower()
+        if total and total not in ('exact', 'estimate'):
+            raise BadPageRequest('total must be exact or estimate')
+        self.total = total or None
+        raw_fields = (args.get('fields') or '').strip()
+        self.fields = None
+        if raw_fields:
+            self.fields = {f.strip() for f in raw_fields.split(',') if f.strip()}
+            if allowed_fields is not None:
+                unknown = self.fields - set(allowed_fields)
+                if unknown:
+                    raise BadPageRequest(f"unknown fields: {', '.join(sorted(unknown))}")
+
+    def wants(self, *names: str) -> bool:
+        """True when any of ``names`` is in the response (always without ``fields=``)."""
+        return self.fields is None or any(n in self.fields for n in names)
+
+    def project(self, query, columns: Dict[str, Sequence[Any]], always: Sequence[Any] = ()):
+        """``load_only`` the columns behind the requested fields.
+
+        ``columns`` maps each output field to the mapped attributes it reads;
+        ``always`` lists attributes the endpoint needs regardless (keys, FKs).
+        """
+        if self.fields is None:
+            return query
+        attrs = list(always)
+        for name in self.fields:
+            attrs.extend(columns.get(name, ()))
+        attrs = list(dict.fromkeys(attrs))
+        return query.options(load_only(*attrs)) if attrs else query
+
+    def select(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        if self.fields is None:
+            return item
+        return {k: v for k, v in item.items() if k in self.fields}
+
+    def page(self, session, query, key, id_col, serialize: Callable[[Any], Dict[str, Any]],
+             descending: bool = True) -> Dict[str, Any]:
+        """Run one keyset page of ``query`` ordered by ``(key, id_col)``."""
+        out: Dict[str, Any] = {}
+        if self.total == 'exact':
+            out['total'] = query.order_by(None).count()
+        elif self.total == 'estimate':
+            out.update(estimate_count(session, query))
+        nullable = key.property.columns[0].nullable
+        order_key = key.desc() if descending else key.asc()
+        order_id = id_col.desc() if descending else id_col.asc()
+        # Keep every step an index range scan: non-NULL keys are read with
+        # `key <= v AND (key < v OR id < last)` (mirrored when ascending), and
+        # the NULL-key tail, which sorts last, is read separately by id.
+        in_tail = False
+        main = query
+        if self.cursor:
+            value, last_id = decode_cursor(self.cursor)
+            later_id = id_col < last_id if descending else id_col > last_id
+            if value is None:
+                in_tail = True
+                main = query.filter(key.is_(None), later_id)
+            elif descending:
+                main = query.filter(key <= value, or_(key < value, later_id))
+            else:
+                main = query.filter(key >= value, or_(key > value, later_id))
+        elif nullable:
+            main = query.filter(key.isnot(None))
+        if in_tail:
+            rows: List[Any] = main.order_by(order_id).limit(self.limit + 1).all()
+        else:
+            rows = main.order_by(order_key, order_id).limit(self.limit + 1).all()
+            if nullable and len(rows) <= self.limit:
+                rows += (query.filter(key.is_(None)).order_by(order_id)
+                         .limit(self.limit + 1 - len(rows)).all())
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = encode_cursor(getattr(last, key.key), getattr(last, id_col.key))
+        out.update({
+            'items': [self.select(serialize(r)) for r in rows],
+            'limit': self.limit,
+            'has_more': has_more,
+            'next_cursor': next_cursor,
+        })
+        return out
@@ -0,0 +1,237 @@
+"""
+Shared HTTP plumbing for calls to the transcription/analysis provider.
+
+Every provider request goes through one ``requests.Session`` per process, so
+uploads, transcript requests, status polls and LeMUR calls reuse pooled
+keep-alive connections instead of paying a TCP+TLS handshake each. The
+session's adapter retries with backoff on connection errors (any method) and
+on 429/5xx replies to GETs; POSTs are not re-sent after the request went out,
+since uploads stream a file and transcript creation is not idempotent.
+
+Each provider has a :class:`CircuitBreaker`: after ``failure_threshold``
+consecutive failures (connection errors, timeouts, 429/5xx) calls fail fast
+with :class:`CircuitOpen` for ``reset_seconds``, then one trial call decides
+whether to close it again. Latencies are kept per operation in
+:class:`LatencyHistogram` buckets.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+POOL_SIZE = int(os.getenv('PROVIDER_HTTP_POOL_SIZE', '10'))
+RETRIES = int(os.getenv('PROVIDER_HTTP_RETRIES', '3'))
+BACKOFF_SECONDS = float(os.getenv('PROVIDER_HTTP_BACKOFF_SECONDS', '0.5'))
+BREAKER_FAILURES = int(os.getenv('PROVIDER_BREAKER_FAILURES', '5'))
+BREAKER_RESET_SECONDS = float(os.getenv('PROVIDER_BREAKER_RESET_SECONDS', '60'))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Upper bounds (ms) of the latency histogram buckets
+BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+def build_session(pool_size: int = POOL_SIZE, retries: int = RETRIES,
+                  backoff_seconds: float = BACKOFF_SECONDS) -> requests.Session:
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_seconds,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(('GET', 'HEAD')),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """The process-wide session; rebuilt in a forked child so pools are not shared across processes."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            if _session is None or _session_pid != pid:
+                _session = build_session()
+                _session_pid = pid
+    return _session
+
+
+def bucket_label(latency_ms: float) -> str:
+    for bound in BUCKETS_MS:
+        if latency_ms <= bound:
+            return f"le_{bound}"
+    return f"gt_{BUCKETS_MS[-1]}"
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, latency_ms: float, ok: bool = True) -> None:
+        label = bucket_label(latency_ms)
+        with self._lock:
+            self.counts[label] = self.counts.get(label, 0) + 1
+            self.count += 1
+            self.errors += not ok
+            self.total_ms += latency_ms
+            self.max_ms = max(self.max_ms, latency_ms)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            labels = [f"le_{b}" for b in BUCKETS_MS] + [f"gt_{BUCKETS_MS[-1]}"]
+            return {
+                'count': self.count,
+                'errors': self.errors,
+                'avg_ms': round(self.total_ms / self.count, 2) if self.count else None,
+                'max_ms': round(self.max_ms, 2) if self.count else None,
+                'buckets': {label: self.counts.get(label, 0) for label in labels},
+            }
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half_open (one trial) -> closed/open."""
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURES,
+                 reset_seconds: float = BREAKER_RESET_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.opens = 0
+        self.short_circuits = 0
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_seconds:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """True when a call may go out; in half_open only one trial at a time."""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial:
+                self._trial = True
+                return True
+            self.short_circuits += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial:
+                    self.opens += 1
+                self.opened_at = self.clock()
+            self._trial = False
+
+    def release(self) -> None:
+        """End a call that failed for reasons of our own (not counted); a pending trial is given back."""
+        with self._lock:
+            self._trial = False
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            'name': self.name,
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'opens': self.opens,
+            'short_circuits': self.short_circuits,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+
+
+def breaker(provider: str) -> CircuitBreaker:
+    with _lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
+
+
+def histogram(provider: str, operation: str) -> LatencyHistogram:
+    with _lock:
+        key = (provider, operation)
+        if key not in _histograms:
+            _histograms[key] = LatencyHistogram()
+        return _histograms[key]
+
+
+def request(provider: str, operation: str, method: str, url: str, **kwargs) -> requests.Response:
+    """Send one provider request through the shared session, breaker and latency histogram.
+
+    Raises :class:`CircuitOpen` without calling out while the provider's
+    circuit is open. 429/5xx replies are returned but count as failures.
+    """
+    circuit = breaker(provider)
+    if not circuit.allow():
+        raise CircuitOpen(f"{provider} circuit open")
+    started = time.perf_counter()
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except requests.RequestException:
+        histogram(provider, operation).observe((time.perf_counter() - started) * 1000.0, ok=False)
+        circuit.record_failure()
+        raise
+    except BaseException:
+        # e.g. a streamed upload body raising mid-request; must not hold the half-open trial forever
+        circuit.release()
+        raise
+    failed = response.status_code in RETRY_STATUSES
+    histogram(provider, operation).observe((time.perf_counter() - started) * 1000.0, ok=not failed)
+    if failed:
+        circuit.record_failure()
+    else:
+        circuit.record_success()
+    return response
+
+
+def metrics() -> Dict[str, object]:
+    """Process-local breaker states and latency histograms."""
+    with _lock:
+        breakers = list(_breakers.values())
+        histograms = list(_histograms.items())
+    return {
+        'breakers': [b.snapshot() for b in breakers],
+        'latency': [{'provider': p, 'operation': op, **h.snapshot()} for (p, op), h in histograms],
+    }
@@ -0,0 +1,147 @@
+"""
+Calendar reminder scheduling.
+
+``CalendarEvent.remind_at`` stores when an event's reminder is due: its
+``start_at`` minus the client's ``NotificationPreference.minutes_before`` (or
+the event's own ``reminder_minutes_before``). A ``before_flush`` hook keeps it
+current when events or client preferences change, so the per-minute job is one
+indexed range query over ``remind_at`` instead of a scan of every event.
+
+Due reminders are queued as ``EmailQueue`` rows in the same transaction that
+marks the event notified; the queue worker does the sending.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, inspect, or_, update
+from sqlalchemy.orm import joinedload
+
+try:
+    from ..models import CalendarEvent, EmailQueue, NotificationPreference
+except (ImportError, ValueError):
+    from models import CalendarEvent, EmailQueue, NotificationPreference
+
+_EVENT_INPUTS = ('start_at', 'reminder_minutes_before', 'client_id')
+_PREF_INPUTS = ('client_id', 'minutes_before')
+
+
+def compute_remind_at(start_at: Optional[datetime], reminder_minutes_before: Optional[int],
+                      pref: Optional[NotificationPreference]) -> Optional[datetime]:
+    """Due time for an event's reminder; None when it has none.
+
+    Only events with their own reminder get one; a client preference then
+    overrides the lead time.
+    """
+    if start_at is None or not reminder_minutes_before or reminder_minutes_before <= 0:
+        return None
+    minutes = pref.minutes_before if pref is not None and pref.minutes_before is not None else reminder_minutes_before
+    return start_at - timedelta(minutes=minutes)
+
+
+def _changed(obj, attrs: Iterable[str]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+def _prefs_for(session, client_ids) -> Dict[int, NotificationPreference]:
+    prefs: Dict[int, NotificationPreference] = {}
+    if client_ids:
+        # Lowest id wins when a client has several rows
+        rows = (session.query(NotificationPreference)
+                .filter(NotificationPreference.client_id.in_(client_ids))
+                .order_by(NotificationPreference.id.desc()))
+        for p in rows:
+            prefs[p.client_id] = p
+    return prefs
+
+
+def _before_flush(session, flush_context, instances):
+    events = {}
+    pref_clients = set()
+    overrides: Dict[int, Optional[NotificationPreference]] = {}
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, CalendarEvent) and (obj in session.new or _changed(obj, _EVENT_INPUTS)):
+            events[id(obj)] = obj
+        elif isinstance(obj, NotificationPreference) and (obj in session.new or _changed(obj, _PREF_INPUTS)):
+            history = inspect(obj).attrs.client_id.history
+            pref_clients.update(c for c in list(history.deleted or ()) + [obj.client_id] if c)
+            if obj.client_id:
+                overrides[obj.client_id] = obj
+    for obj in session.deleted:
+        if isinstance(obj, NotificationPreference) and obj.client_id:
+            pref_clients.add(obj.client_id)
+            overrides.setdefault(obj.client_id, None)
+    if not events and not pref_clients:
+        return
+    with session.no_autoflush:
+        if pref_clients:
+            # Upcoming events of clients whose preference changed
+            upcoming = (session.query(CalendarEvent)
+                        .filter(CalendarEvent.client_id.in_(pref_clients),
+                                CalendarEvent.start_at >= datetime.utcnow()))
+            for ev in upcoming:
+                events.setdefault(id(ev), ev)
+        client_ids = {ev.client_id for ev in events.values() if ev.client_id}
+        prefs = _prefs_for(session, client_ids - set(overrides))
+        prefs.update(overrides)
+        for ev in events.values():
+            remind_at = compute_remind_at(ev.start_at, ev.reminder_minutes_before, prefs.get(ev.client_id))
+            if ev.remind_at != remind_at:
+                ev.remind_at = remind_at
+
+
+def install(session_cls) -> None:
+    if not event.contains(session_cls, 'before_flush', _before_flush):
+        event.listen(session_cls, 'before_flush', _before_flush)
+
+
+def enqueue_due(session, now: Optional[datetime] = None, lookahead: timedelta = timedelta(minutes=1),
+                grace: timedelta = timedelta(minutes=10)) -> int:
+    """Queue emails for reminders due up to ``lookahead`` from now; returns how many.
+
+    Reminders missed by up to ``grace`` (scheduler downtime) still go out.
+    Each event is marked notified with a conditional UPDATE, so concurrent
+    schedulers queue a reminder once. ``last_notified_at`` is set to at least
+    the claimed ``remind_at``, so one picked up early by the lookahead is not
+    queued again on the next run.
+    """
+    now = now or datetime.utcnow()
+    rows = (session.query(CalendarEvent, NotificationPreference)
+            .outerjoin(NotificationPreference, NotificationPreference.client_id == CalendarEvent.client_id)
+            .options(joinedload(CalendarEvent.client), joinedload(CalendarEvent.case))
+            .filter(CalendarEvent.remind_at >= now - grace, CalendarEvent.remind_at <= now + lookahead)
+            .filter(or_(CalendarEvent.last_notified_at.is_(None),
+                        CalendarEvent.last_notified_at < CalendarEvent.remind_at))
+            .filter(or_(CalendarEvent.status.is_(None), CalendarEvent.status != 'cancelled'))
+            .order_by(CalendarEvent.remind_at.asc(), NotificationPreference.id.asc())
+            .all())
+    queued = 0
+    seen = set()
+    for ev, pref in rows:
+        if ev.id in seen:
+            continue
+        seen.add(ev.id)
+        if pref is not None and pref.email_enabled is False:
+            continue
+        claimed = session.execute(
+            update(CalendarEvent)
+            .where(CalendarEvent.id == ev.id,
+                   CalendarEvent.remind_at == ev.remind_at,
+                   or_(CalendarEvent.last_notified_at.is_(None),
+                       CalendarEvent.last_notified_at < CalendarEvent.remind_at))
+            .values(last_notified_at=max(now, ev.remind_at))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            continue
+        session.add(EmailQueue(
+            case_id=ev.case_id,
+            to=ev.client.email if ev.client and ev.client.email else None,
+            subject=f"Reminder: {ev.title} at {ev.start_at.strftime('%Y-%m-%d %H:%M')}",
+            body=f"Event: {ev.title}\nCase: {ev.case.title if ev.case else '-'}\nLocation: {ev.location or '-'}",
+            send_after=now,
+            status='pending',
+        ))
+        queued += 1
+    session.commit()
+    return queued
@@ -0,0 +1,278 @@
+"""
+Short-TTL response cache for read-heavy JSON endpoints.
+
+Cached views declare the tables they read (``@response_cache.cached('client')``).
+Entries are keyed by route, query args, principal and the current generation
+of each of those tables; a commit that touched a table bumps its generation,
+so later requests miss without any scan-and-delete. Every entry also expires
+after a short TTL, which bounds staleness for writes that bypass the ORM.
+
+Backends:
+  - ``memory`` (default): per-process LRU; generations are per process, so
+    with several gunicorn workers another worker's commit is only seen once
+    the TTL runs out.
+  - ``sqlite``: one local SQLite file shared by every worker on the host,
+    holding both entries and generations.
+  - ``off``: disable caching (ETags are still sent).
+
+Responses carry an ``ETag`` and honour ``If-None-Match`` with a 304.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import Response, make_response, request, session
+from sqlalchemy import event
+
+RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory').strip().lower()
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '15'))
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '256'))
+RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'themiscore_response_cache.sqlite'))
+
+
+class MemoryBackend:
+    """Bounded LRU of ``key -> (expires, etag, body)`` plus table generations."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max(0, max_entries)
+        self._entries: 'OrderedDict[str, Tuple[float, str, bytes]]' = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item[1], item[2]
+
+    def set(self, key: str, etag: str, body: bytes, ttl: float) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generations(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._generations.get(t, 0) for t in tags)
+
+    def bump(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for t in tags:
+                self._generations[t] = self._generations.get(t, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Entries and generations in a local SQLite file shared across workers."""
+
+    PURGE_EVERY = 200
+
+    def __init__(self, path: str = RESPONSE_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._sets = 0
+        with self._conn() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS entry (key TEXT PRIMARY KEY, expires REAL, etag TEXT, body BLOB)')
+            conn.execute('CREATE TABLE IF NOT EXISTS generation (tag TEXT PRIMARY KEY, gen INTEGER NOT NULL)')
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        row = self._conn().execute(
+            'SELECT etag, body FROM entry WHERE key = ? AND expires >= ?', (key, time.time())
+        ).fetchone()
+        return (row[0], bytes(row[1])) if row else None
+
+    def set(self, key: str, etag: str, body: bytes, ttl: float) -> None:
+        conn = self._conn()
+        conn.execute('INSERT OR REPLACE INTO entry (key, expires, etag, body) VALUES (?, ?, ?, ?)',
+                     (key, time.time() + ttl, etag, body))
+        self._sets += 1
+        if self._sets % self.PURGE_EVERY == 0:
+            conn.execute('DELETE FROM entry WHERE expires < ?', (time.time(),))
+
+    def generations(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        tags = list(tags)
+        if not tags:
+            return ()
+        rows = dict(self._conn().execute(
+            f"SELECT tag, gen FROM generation WHERE tag IN ({','.join('?' * len(tags))})", tags
+        ).fetchall())
+        return tuple(rows.get(t, 0) for t in tags)
+
+    def bump(self, tags: Iterable[str]) -> None:
+        self._conn().executemany(
+            'INSERT INTO generation (tag, gen) VALUES (?, 1) ON CONFLICT(tag) DO UPDATE SET gen = gen + 1',
+            [(t,) for t in tags],
+        )
+
+    def clear(self) -> None:
+        self._conn().execute('DELETE FROM entry')
+
+    def size(self) -> int:
+        return self._conn().execute('SELECT COUNT(*) FROM entry').fetchone()[0]
+
+
+def make_backend(name: str = RESPONSE_CACHE_BACKEND):
+    if name == 'off':
+        return None
+    if name == 'sqlite':
+        return SQLiteBackend()
+    return MemoryBackend()
+
+
+def _changed_table(obj) -> Optional[str]:
+    table = getattr(obj, '__table__', None)
+    return table.name if table is not None else None
+
+
+class ResponseCache:
+    """Decorator-based response cache; see the module docstring."""
+
+    def __init__(self, backend=None, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _principal() -> str:
+        auth = request.authorization
+        try:
+            uid = session.get('user_id')
+        except Exception:
+            uid = None
+        return f"{auth.username if auth else ''}:{uid or ''}"
+
+    def _key(self, tags: Tuple[str, ...]) -> str:
+        args = '&'.join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+        gens = '.'.join(str(g) for g in self.backend.generations(tags))
+        raw = f"{request.path}?{args}|{self._principal()}|{gens}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _respond(etag: str, body: Optional[bytes], cache_status: str) -> Response:
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304)
+        else:
+            resp = Response(body, mimetype='application/json')
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = 'private, no-cache'
+        resp.headers['Vary'] = 'Authorization, Cookie'
+        resp.headers['X-Cache'] = cache_status
+        return resp
+
+    def cached(self, *tags: str):
+        """Cache a GET view's 200 JSON response; ``tags`` are the table names it reads."""
+        tags = tuple(sorted(tags))
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = self._key(tags) if self.backend is not None else None
+                if key is not None:
+                    hit = self.backend.get(key)
+                    if hit is not None:
+                        self._count('hits')
+                        resp = self._respond(hit[0], hit[1], 'HIT')
+                        if resp.status_code == 304:
+                            self._count('not_modified')
+                        return resp
+                    self._count('misses')
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200 or resp.mimetype != 'application/json':
+                    return resp
+                body = resp.get_data()
+                etag = hashlib.sha1(body).hexdigest()
+                if key is not None:
+                    self.backend.set(key, etag, body, self.ttl_seconds)
+                out = self._respond(etag, body, 'MISS' if key is not None else 'BYPASS')
+                if out.status_code == 304:
+                    self._count('not_modified')
+                return out
+            return wrapper
+        return decorator
+
+    def invalidate(self, tags: Optional[Iterable[str]] = None) -> None:
+        """Bump the given tables' generations, or drop every entry when ``tags`` is None."""
+        if self.backend is None:
+            return
+        if tags is None:
+            self.backend.clear()
+        else:
+            tags = sorted(set(tags))
+            if not tags:
+                return
+            self.backend.bump(tags)
+        self._count('invalidations')
+
+    # ---- session hooks ----
+    def _after_flush(self, session, flush_context):
+        changed = session.info.setdefault('response_cache_tables', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            name = _changed_table(obj)
+            if name:
+                changed.add(name)
+
+    def _do_orm_execute(self, state):
+        # Bulk INSERT/UPDATE/DELETE statements skip the flush
+        if state.is_insert or state.is_update or state.is_delete:
+            table = getattr(state.statement, 'table', None)
+            if table is not None:
+                state.session.info.setdefault('response_cache_tables', set()).add(table.name)
+
+    def _after_commit(self, session):
+        changed = session.info.pop('response_cache_tables', None)
+        if changed:
+            self.invalidate(changed)
+
+    def _after_rollback(self, session):
+        session.info.pop('response_cache_tables', None)
+
+    def install(self, session_cls) -> None:
+        """Invalidate on commit for every table a Session class wrote to."""
+        for name, fn in (('after_flush', self._after_flush), ('do_orm_execute', self._do_orm_execute),
+                         ('after_commit', self._after_commit), ('after_rollback', self._after_rollback)):
+            if not event.contains(session_cls, name, fn):
+                event.listen(session_cls, name, fn)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            out = dict(self.stats)
+        lookups = out['hits'] + out['misses']
+        out['hit_rate'] = round(out['hits'] / lookups, 4) if lookups else None
+        out['backend'] = type(self.backend).__name__ if self.backend is not None else None
+        out['entries'] = self.backend.size() if self.backend is not None else 0
+        out['ttl_seconds'] = self.ttl_seconds
+        return out
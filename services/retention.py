@@ -0,0 +1,261 @@
+"""
+Retention and garbage collection for files under ``UPLOAD_FOLDER``.
+
+A sweep:
+
+  1. finds expired evidence: documents of cases closed more than
+     ``retention_days`` ago (the latest status change to ``closed``, else the
+     case's ``updated_at``). They are always reported and only deleted with
+     ``enforce=True``;
+  2. reconciles ``document`` rows with the filesystem: the file references
+     are loaded in id batches (columns only) and the upload tree is walked
+     once with ``os.scandir``, so rows are matched against directory entries
+     instead of an ``os.stat`` per row. Rows whose file was not seen are
+     reported as missing;
+  3. deletes orphans: blobs, legacy top-level uploads and thumbnails that no
+     row references, plus abandoned ``blobs/tmp`` files. Only files older
+     than ``min_age_seconds`` are touched, because uploads are written before
+     their row commits.
+
+With ``dry_run`` nothing is deleted and the report lists what would be.
+Every sweep is recorded as a ``retention_run`` row.
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import func
+
+try:
+    from ..models import Case, CaseStatusAudit, Document, DocumentExtraction, RetentionRun
+except (ImportError, ValueError):
+    from models import Case, CaseStatusAudit, Document, DocumentExtraction, RetentionRun
+
+SAMPLE_SIZE = 50
+
+
+class SweepReport:
+    def __init__(self, dry_run: bool, enforce: bool, retention_days: int, min_age_seconds: float):
+        self.started_at = datetime.utcnow()
+        self.dry_run = dry_run
+        self.enforce = enforce
+        self.retention_days = retention_days
+        self.min_age_seconds = min_age_seconds
+        self.scanned_files = 0
+        self.scan_seconds = 0.0
+        self.orphan_files = 0
+        self.orphan_bytes = 0
+        self.expired_documents = 0
+        self.expired_bytes = 0
+        self.missing_files = 0
+        self.deleted_files = 0
+        self.reclaimed_bytes = 0
+        self.errors = 0
+        self.duration_ms: Optional[float] = None
+        self.samples: Dict[str, List] = {'orphans': [], 'expired': [], 'missing': [], 'errors': []}
+
+    def sample(self, key: str, item) -> None:
+        if len(self.samples[key]) < SAMPLE_SIZE:
+            self.samples[key].append(item)
+
+    @property
+    def files_per_second(self) -> Optional[float]:
+        return round(self.scanned_files / self.scan_seconds, 1) if self.scan_seconds else None
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': self.duration_ms,
+            'dry_run': self.dry_run,
+            'enforce_retention': self.enforce,
+            'retention_days': self.retention_days,
+            'min_age_seconds': self.min_age_seconds,
+            'scanned_files': self.scanned_files,
+            'files_per_second': self.files_per_second,
+            'orphan_files': self.orphan_files,
+            'orphan_bytes': self.orphan_bytes,
+            'expired_documents': self.expired_documents,
+            'expired_bytes': self.expired_bytes,
+            'missing_files': self.missing_files,
+            'deleted_files': self.deleted_files,
+            'reclaimed_bytes': self.reclaimed_bytes,
+            'errors': self.errors,
+            'samples': self.samples,
+        }
+
+
+def _walk(root: str) -> Iterator[os.DirEntry]:
+    """Regular files under ``root``; symlinks are neither followed nor returned."""
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def _batches(session, query, key, batch_size: int) -> Iterator[list]:
+    """Keyset batches of a column query ordered by ``key``."""
+    last = None
+    while True:
+        q = query.filter(key > last) if last is not None else query
+        rows = q.order_by(key.asc()).limit(batch_size).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def _expired_query(session, cutoff: datetime):
+    closed = (session.query(CaseStatusAudit.case_id.label('case_id'),
+                            func.max(CaseStatusAudit.created_at).label('closed_at'))
+              .filter(CaseStatusAudit.to_status == 'closed')
+              .group_by(CaseStatusAudit.case_id)
+              .subquery())
+    return (session.query(Document.id, Document.file_size, Document.name, Document.case_id)
+            .join(Case, Case.id == Document.case_id)
+            .outerjoin(closed, closed.c.case_id == Case.id)
+            .filter(Case.status == 'closed',
+                    func.coalesce(closed.c.closed_at, Case.updated_at) < cutoff))
+
+
+def _expire(session, store, report: SweepReport, cutoff: datetime, batch_size: int) -> None:
+    for rows in _batches(session, _expired_query(session, cutoff), Document.id, batch_size):
+        report.expired_documents += len(rows)
+        report.expired_bytes += sum(r.file_size or 0 for r in rows)
+        for r in rows:
+            report.sample('expired', {'id': r.id, 'case_id': r.case_id, 'name': r.name})
+        if report.dry_run or not report.enforce:
+            continue
+        docs = session.query(Document).filter(Document.id.in_([r.id for r in rows])).all()
+        released = [(d.id, d.file_path, d.sha256) for d in docs]
+        for doc in docs:
+            session.delete(doc)
+        session.commit()
+        for doc_id, path, sha256 in released:
+            # Shared blobs stay; unshared ones too young for delete_blob are left to the orphan pass
+            if sha256:
+                blob = store.get_document_path(sha256)
+                shared = session.query(Document.id).filter(Document.sha256 == sha256).first()
+                if blob and shared is None:
+                    size = os.path.getsize(blob)
+                    if store.delete_blob(sha256):
+                        report.deleted_files += 1
+                        report.reclaimed_bytes += size
+            elif path and os.path.exists(path):
+                try:
+                    size = os.path.getsize(path)
+                    os.remove(path)
+                    report.deleted_files += 1
+                    report.reclaimed_bytes += size
+                except OSError as e:
+                    report.errors += 1
+                    report.sample('errors', f"{path}: {e}")
+
+
+def _references(session, batch_size: int):
+    paths: Dict[str, int] = {}  # realpath -> document id
+    shas: Set[str] = set()
+    query = session.query(Document.id, Document.file_path, Document.sha256)
+    for rows in _batches(session, query, Document.id, batch_size):
+        for doc_id, path, sha256 in rows:
+            if path:
+                paths[os.path.realpath(path)] = doc_id
+            if sha256:
+                shas.add(sha256)
+    thumbs: Set[str] = set()
+    query = session.query(DocumentExtraction.id, DocumentExtraction.thumbnail_path).filter(
+        DocumentExtraction.thumbnail_path.isnot(None))
+    for rows in _batches(session, query, DocumentExtraction.id, batch_size):
+        thumbs.update(os.path.realpath(path) for _, path in rows)
+    return paths, shas, thumbs
+
+
+def sweep(session, store, upload_folder: str, retention_days: int, dry_run: bool = True,
+          enforce: bool = False, min_age_seconds: float = 3600, batch_size: int = 1000) -> SweepReport:
+    """Run one sweep (see the module docstring); ``store`` is the app's DocumentService."""
+    started = time.perf_counter()
+    report = SweepReport(dry_run, enforce, retention_days, min_age_seconds)
+    _expire(session, store, report, datetime.utcnow() - timedelta(days=retention_days), batch_size)
+
+    paths, shas, thumbs = _references(session, batch_size)
+    root = os.path.realpath(upload_folder)
+    tmp_root = os.path.join(os.path.realpath(store.tmp_folder), '')
+    blob_root = os.path.join(os.path.realpath(store.blob_folder), '')
+    seen_shas: Set[str] = set()
+    now = time.time()
+    scan_started = time.perf_counter()
+    for entry in _walk(root):
+        report.scanned_files += 1
+        if entry.name.startswith('.'):
+            continue
+        path = os.path.realpath(entry.path)
+        is_tmp = path.startswith(tmp_root)
+        if not is_tmp:
+            if paths.pop(path, None) is not None or path in thumbs:
+                continue
+            if path.startswith(blob_root) and entry.name in shas:
+                seen_shas.add(entry.name)
+                continue
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        if now - st.st_mtime < min_age_seconds:
+            continue
+        report.orphan_files += 1
+        report.orphan_bytes += st.st_size
+        report.sample('orphans', os.path.relpath(path, root))
+        if dry_run:
+            continue
+        try:
+            os.remove(path)
+            report.deleted_files += 1
+            report.reclaimed_bytes += st.st_size
+        except OSError as e:
+            report.errors += 1
+            report.sample('errors', f"{path}: {e}")
+    report.scan_seconds = time.perf_counter() - scan_started
+
+    # References left over were not found on disk (files outside the tree are not checked)
+    root_prefix = os.path.join(root, '')
+    for path, doc_id in paths.items():
+        if not path.startswith(root_prefix):
+            continue
+        if path.startswith(blob_root) and os.path.basename(path) in seen_shas:
+            continue
+        report.missing_files += 1
+        report.sample('missing', {'id': doc_id, 'path': os.path.relpath(path, root)})
+
+    report.duration_ms = round((time.perf_counter() - started) * 1000.0, 2)
+    return report
+
+
+def record(session, report: SweepReport) -> RetentionRun:
+    """Persist a sweep's metrics as a ``retention_run`` row (caller commits)."""
+    run = RetentionRun(
+        started_at=report.started_at,
+        duration_ms=report.duration_ms,
+        dry_run=report.dry_run,
+        enforce_retention=report.enforce,
+        scanned_files=report.scanned_files,
+        files_per_second=report.files_per_second,
+        orphan_files=report.orphan_files,
+        orphan_bytes=report.orphan_bytes,
+        expired_documents=report.expired_documents,
+        expired_bytes=report.expired_bytes,
+        missing_files=report.missing_files,
+        reclaimed_bytes=report.reclaimed_bytes,
+        errors=report.errors,
+        details=json.dumps(report.samples, default=str),
+    )
+    session.add(run)
+    return run
@@ -0,0 +1,261 @@
+"""
+Full-text search over cases, clients, case notes, transcripts, client
+messages and document text (extracted in the background, see
+services/document_extract.py; documents are indexed by name until then).
+
+SQLite uses one FTS5 table (``search_index``, porter stemming, prefix
+indexes); PostgreSQL uses a ``search_document`` table with a generated,
+weighted ``tsvector`` column and a GIN index. Both are kept in sync from
+session flush hooks in the same transaction as the change, ranked by
+BM25 / ``ts_rank_cd`` with titles weighted above bodies, and return
+highlighted snippets.
+
+Each indexed row gets a deterministic key (``ref_id * 8 + kind code``) so
+updates and deletes never scan the index.
+"""
+import html
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, event, inspect, text
+
+try:
+    from ..models import db, Case, Client, CaseNote, Transcript, ClientMessage, DocumentExtraction
+except (ImportError, ValueError):
+    from models import db, Case, Client, CaseNote, Transcript, ClientMessage, DocumentExtraction
+
+MAX_TERMS = 8
+_HL_START, _HL_END = '\ue000', '\ue001'
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def _join(*parts) -> str:
+    return ' '.join(str(p) for p in parts if p)
+
+
+# kind -> (code, model, attributes that feed the document, builder -> (case_id, client_id, title, body))
+KINDS: Dict[str, Tuple[int, type, Tuple[str, ...], Callable[[Any], Tuple[Optional[int], Optional[int], str, str]]]] = {
+    'case': (1, Case, ('title', 'description', 'category', 'client_id'),
+             lambda c: (c.id, c.client_id, c.title or '', _join(c.description, c.category))),
+    'client': (2, Client, ('first_name', 'last_name', 'email', 'phone', 'address'),
+               lambda c: (None, c.id, _join(c.first_name, c.last_name), _join(c.email, c.phone, c.address))),
+    'note': (3, CaseNote, ('content', 'case_id'),
+             lambda n: (n.case_id, None, '', n.content or '')),
+    'transcript': (4, Transcript, ('text', 'case_id', 'client_id'),
+                   lambda t: (t.case_id, t.client_id, '', t.text or '')),
+    'message': (5, ClientMessage, ('subject', 'message', 'case_id', 'client_id'),
+                lambda m: (m.case_id, m.client_id, m.subject or '', m.message or '')),
+    # ref_id is the document id (the extraction row shares it)
+    'document': (6, DocumentExtraction, ('text',),
+                 lambda e: (e.document.case_id, None, e.document.name or '', e.text or '')),
+}
+_BY_MODEL = {model: kind for kind, (_, model, _, _) in KINDS.items()}
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "kind UNINDEXED, ref_id UNINDEXED, case_id UNINDEXED, client_id UNINDEXED, title, body, "
+    "tokenize='porter unicode61', prefix='2 3')"
+)
+POSTGRES_DDL = (
+    "CREATE TABLE IF NOT EXISTS search_document ("
+    "doc_key BIGINT PRIMARY KEY, kind VARCHAR(20) NOT NULL, ref_id INTEGER NOT NULL, "
+    "case_id INTEGER, client_id INTEGER, title TEXT, body TEXT, "
+    "tsv tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(body, '')), 'B')) STORED)",
+    "CREATE INDEX IF NOT EXISTS ix_search_document_tsv ON search_document USING GIN (tsv)",
+)
+
+
+def doc_key(kind: str, ref_id: int) -> int:
+    return ref_id * 8 + KINDS[kind][0]
+
+
+def highlight(snippet: Optional[str]) -> str:
+    """HTML-escape a snippet and turn the match sentinels into <mark> tags."""
+    return html.escape(snippet or '').replace(_HL_START, '<mark>').replace(_HL_END, '</mark>')
+
+
+class SearchIndex:
+    """Dialect-specific search index; ``available`` is False when unsupported."""
+
+    def __init__(self):
+        self.dialect: Optional[str] = None
+        self.available = False
+
+    # ---- schema ----
+    def ensure(self, session=None) -> bool:
+        """Create the index if missing and backfill it; returns availability."""
+        session = session or db.session
+        self.dialect = session.get_bind().dialect.name
+        try:
+            if self.dialect == 'sqlite':
+                exists = session.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'search_index'")).first() is not None
+                session.execute(text(SQLITE_DDL))
+            elif self.dialect == 'postgresql':
+                exists = session.execute(text("SELECT to_regclass('search_document')")).scalar() is not None
+                for ddl in POSTGRES_DDL:
+                    session.execute(text(ddl))
+            else:
+                return False
+            self.available = True
+            if not exists:
+                self.rebuild(session)
+            session.commit()
+        except Exception:
+            session.rollback()
+            self.available = False
+        return self.available
+
+    def rebuild(self, session=None) -> int:
+        """Re-index every row; returns the number of documents written."""
+        session = session or db.session
+        conn = session.connection()
+        conn.execute(text('DELETE FROM ' + self._table()))
+        written = 0
+        for kind, (_, model, _, _) in KINDS.items():
+            batch = []
+            for obj in session.query(model).yield_per(500):
+                batch.append(self._row(kind, obj))
+                if len(batch) >= 500:
+                    self._insert(conn, batch)
+                    written += len(batch)
+                    batch = []
+            if batch:
+                self._insert(conn, batch)
+                written += len(batch)
+        return written
+
+    def _table(self) -> str:
+        return 'search_index' if self.dialect == 'sqlite' else 'search_document'
+
+    def _row(self, kind: str, obj) -> Dict[str, Any]:
+        case_id, client_id, title, body = KINDS[kind][3](obj)
+        return {'key': doc_key(kind, obj.id), 'kind': kind, 'ref_id': obj.id,
+                'case_id': case_id, 'client_id': client_id, 'title': title, 'body': body}
+
+    def _insert(self, conn, rows: List[Dict[str, Any]]) -> None:
+        if self.dialect == 'sqlite':
+            stmt = text("INSERT INTO search_index (rowid, kind, ref_id, case_id, client_id, title, body) "
+                        "VALUES (:key, :kind, :ref_id, :case_id, :client_id, :title, :body)")
+        else:
+            stmt = text("INSERT INTO search_document (doc_key, kind, ref_id, case_id, client_id, title, body) "
+                        "VALUES (:key, :kind, :ref_id, :case_id, :client_id, :title, :body) "
+                        "ON CONFLICT (doc_key) DO UPDATE SET case_id = EXCLUDED.case_id, "
+                        "client_id = EXCLUDED.client_id, title = EXCLUDED.title, body = EXCLUDED.body")
+        conn.execute(stmt, rows)
+
+    def _delete(self, conn, keys: Sequence[int]) -> None:
+        column = 'rowid' if self.dialect == 'sqlite' else 'doc_key'
+        conn.execute(text(f"DELETE FROM {self._table()} WHERE {column} = :key"), [{'key': k} for k in keys])
+
+    # ---- sync ----
+    def _before_flush(self, session, flush_context, instances):
+        if not self.available:
+            return
+        # Capture keys of deleted rows while they can still be loaded
+        gone = session.info.setdefault('search_deleted', [])
+        for obj in session.deleted:
+            kind = _BY_MODEL.get(type(obj))
+            if kind:
+                gone.append(doc_key(kind, obj.id))
+
+    def _after_flush(self, session, flush_context):
+        if not self.available:
+            return
+        conn = session.connection()
+        gone = session.info.pop('search_deleted', [])
+        rows = []
+        for obj in list(session.new) + list(session.dirty):
+            kind = _BY_MODEL.get(type(obj))
+            if not kind or obj in session.deleted:
+                continue
+            if obj not in session.new:
+                state = inspect(obj)
+                if not any(state.attrs[a].history.has_changes() for a in KINDS[kind][2]):
+                    continue
+            rows.append(self._row(kind, obj))
+        if self.dialect == 'sqlite':
+            # FTS5 has no upsert; replace by rowid
+            gone.extend(r['key'] for r in rows)
+        if gone:
+            self._delete(conn, gone)
+        if rows:
+            self._insert(conn, rows)
+
+    def _after_rollback(self, session):
+        session.info.pop('search_deleted', None)
+
+    def install(self, session_cls) -> None:
+        for name, fn in (('before_flush', self._before_flush), ('after_flush', self._after_flush),
+                         ('after_rollback', self._after_rollback)):
+            if not event.contains(session_cls, name, fn):
+                event.listen(session_cls, name, fn)
+
+    # ---- queries ----
+    @staticmethod
+    def terms(q: str) -> List[str]:
+        return _TERM.findall(q or '')[:MAX_TERMS]
+
+    def _match(self, terms: List[str]) -> str:
+        # Every term must match; each is a prefix so partial words still hit
+        if self.dialect == 'sqlite':
+            return ' '.join(f'"{t}"*' for t in terms)
+        return ' & '.join(f'{t}:*' for t in terms)
+
+    def search(self, q: str, kinds: Optional[Sequence[str]] = None, limit: int = 20,
+               offset: int = 0, session=None) -> List[Dict[str, Any]]:
+        """Ranked matches, best first, each with a highlighted ``snippet``."""
+        session = session or db.session
+        terms = self.terms(q)
+        if not terms or not self.available:
+            return []
+        params: Dict[str, Any] = {'q': self._match(terms), 'limit': limit, 'offset': offset}
+        kind_filter = ''
+        if kinds:
+            names = [k for k in kinds if k in KINDS]
+            kind_filter = 'AND kind IN (' + ', '.join(f':k{i}' for i in range(len(names))) + ')'
+            params.update({f'k{i}': k for i, k in enumerate(names)})
+        if self.dialect == 'sqlite':
+            sql = (
+                "SELECT kind, ref_id, case_id, client_id, title, "
+                f"snippet(search_index, -1, '{_HL_START}', '{_HL_END}', '…', 16) AS snippet, "
+                "bm25(search_index, 0, 0, 0, 0, 4.0, 1.0) AS rank "
+                f"FROM search_index WHERE search_index MATCH :q {kind_filter} "
+                "ORDER BY rank LIMIT :limit OFFSET :offset"
+            )
+        else:
+            sql = (
+                "SELECT kind, ref_id, case_id, client_id, title, "
+                "ts_headline('english', concat_ws(' ', title, body), query, "
+                f"'StartSel={_HL_START}, StopSel={_HL_END}, MaxWords=24, MinWords=8, MaxFragments=1') AS snippet, "
+                "-ts_rank_cd(tsv, query) AS rank "
+                "FROM search_document, to_tsquery('english', :q) AS query "
+                f"WHERE tsv @@ query {kind_filter} "
+                "ORDER BY rank LIMIT :limit OFFSET :offset"
+            )
+        rows = session.execute(text(sql), params).mappings().all()
+        return [{
+            'type': r['kind'],
+            'id': int(r['ref_id']),
+            'case_id': int(r['case_id']) if r['case_id'] is not None else None,
+            'client_id': int(r['client_id']) if r['client_id'] is not None else None,
+            'title': r['title'] or None,
+            'snippet': highlight(r['snippet']),
+            'score': round(-float(r['rank']), 6),
+        } for r in rows]
+
+    def ids(self, kind: str, q: str):
+        """Selectable of matching ids of one kind for ``Model.id.in_(...)``; None if unusable."""
+        terms = self.terms(q)
+        if not terms or not self.available:
+            return None
+        if self.dialect == 'sqlite':
+            sql = "SELECT ref_id FROM search_index WHERE search_index MATCH :sq AND kind = :sk"
+        else:
+            sql = "SELECT ref_id FROM search_document WHERE tsv @@ to_tsquery('english', :sq) AND kind = :sk"
+        return text(sql).bindparams(sq=self._match(terms), sk=kind).columns(ref_id=Integer)
+
+
+search_index = SearchIndex()
@@ -1,16 +1,32 @@
 import os
-import requests
-from typing import Dict, Any, Optional, Generator
+import tempfile
+import threading
+from typing import Dict, Any, Optional, Generator, Iterable
+
+from . import audio_preprocess, provider_http
 
 ASSEMBLYAI_API_KEY = os.getenv('ASSEMBLYAI_API_KEY')
-ASSEMBLYAI_UPLOAD_URL = "https://api.assemblyai.com/v2/upload"
-ASSEMBLYAI_TRANSCRIPTION_URL = "https://api.assemblyai.com/v2/transcript"
+# Overridable so tests can point at a local stub
+ASSEMBLYAI_BASE_URL = os.getenv('ASSEMBLYAI_BASE_URL', 'https://api.assemblyai.com/v2').rstrip('/')
+ASSEMBLYAI_UPLOAD_URL = f"{ASSEMBLYAI_BASE_URL}/upload"
+ASSEMBLYAI_TRANSCRIPTION_URL = f"{ASSEMBLYAI_BASE_URL}/transcript"
+# Completion callback: the provider POSTs here when a transcript finishes
+STT_WEBHOOK_URL = os.getenv('STT_WEBHOOK_URL')
+STT_WEBHOOK_SECRET = os.getenv('STT_WEBHOOK_SECRET')
+WEBHOOK_AUTH_HEADER = 'X-Webhook-Secret'
+# The endpoint rejects unauthenticated callbacks, so without a secret the
+# webhook is not registered and transcripts are only polled
+STT_WEBHOOK_ENABLED = bool(STT_WEBHOOK_URL and STT_WEBHOOK_SECRET)
 
 class STTProvider:
     """Interface for STT providers"""
     def upload_and_transcribe(self, file_path: str) -> str:
         raise NotImplementedError
 
+    def transcribe_stream(self, chunks: Iterable[bytes]) -> str:
+        """Upload audio given as an iterable of byte chunks and start a transcript."""
+        raise NotImplementedError
+
     def get_status(self, external_id: str) -> Dict[str, Any]:
         raise NotImplementedError
 
@@ -36,19 +52,16 @@ class AssemblyAIProvider(STTProvider):
                 yield data
 
     def upload_and_transcribe(self, file_path: str) -> str:
-        # upload with retries
-        last_err = None
-        for attempt in range(3):
-            try:
-                up = requests.post(ASSEMBLYAI_UPLOAD_URL, headers=self.headers_upload, data=self._read_file(file_path), timeout=30)
-                up.raise_for_status()
-                upload_url = up.json()['upload_url']
-                break
-            except Exception as e:
-                last_err = e
-                if attempt == 2:
-                    raise
-        # request transcript with retries
+        return self.transcribe_stream(self._read_file(file_path))
+
+    def transcribe_stream(self, chunks: Iterable[bytes]) -> str:
+        # Sent with chunked transfer encoding as the chunks are produced.
+        # Connection failures are retried by the shared session's adapter;
+        # a rejected upload is not re-sent
+        up = provider_http.request('assemblyai', 'upload', 'POST', ASSEMBLYAI_UPLOAD_URL,
+                                   headers=self.headers_upload, data=iter(chunks), timeout=30)
+        up.raise_for_status()
+        upload_url = up.json()['upload_url']
         payload = {
             'audio_url': upload_url,
             'speaker_labels': True,
@@ -57,28 +70,21 @@ class AssemblyAIProvider(STTProvider):
             'iab_categories': True,
             'auto_highlights': True
         }
-        for attempt in range(3):
-            try:
-                tr = requests.post(ASSEMBLYAI_TRANSCRIPTION_URL, json=payload, headers=self.headers_json, timeout=30)
-                tr.raise_for_status()
-                return tr.json()['id']
-            except Exception as e:
-                last_err = e
-                if attempt == 2:
-                    raise
+        if STT_WEBHOOK_ENABLED:
+            payload['webhook_url'] = STT_WEBHOOK_URL
+            payload['webhook_auth_header_name'] = WEBHOOK_AUTH_HEADER
+            payload['webhook_auth_header_value'] = STT_WEBHOOK_SECRET
+        tr = provider_http.request('assemblyai', 'transcript', 'POST', ASSEMBLYAI_TRANSCRIPTION_URL,
+                                   json=payload, headers=self.headers_json, timeout=30)
+        tr.raise_for_status()
+        return tr.json()['id']
 
     def get_status(self, external_id: str) -> Dict[str, Any]:
-        # status polling with retries
-        for attempt in range(3):
-            try:
-                r = requests.get(f"{ASSEMBLYAI_TRANSCRIPTION_URL}/{external_id}", headers=self.headers_json, timeout=15)
-                r.raise_for_status()
-                data = r.json()
-                break
-            except Exception as e:
-                if attempt == 2:
-                    raise
-                continue
+        # GETs are retried with backoff (429/5xx, connection errors) by the session
+        r = provider_http.request('assemblyai', 'status', 'GET', f"{ASSEMBLYAI_TRANSCRIPTION_URL}/{external_id}",
+                                  headers=self.headers_json, timeout=15)
+        r.raise_for_status()
+        data = r.json()
         resp = {
             'status': data.get('status'),
             'id': data.get('id'),
@@ -92,17 +98,73 @@ class AssemblyAIProvider(STTProvider):
             resp['error'] = data.get('error')
         return resp
 
+_PROVIDERS = {'assemblyai': AssemblyAIProvider}
+_provider_cache: Dict[str, STTProvider] = {}
+_provider_lock = threading.Lock()
+
+def get_provider(name: str) -> STTProvider:
+    """Provider instance for ``name``, created once per process."""
+    provider = _provider_cache.get(name)
+    if provider is None:
+        if name not in _PROVIDERS:
+            raise ValueError(f"Unsupported STT provider: {name}")
+        with _provider_lock:
+            provider = _provider_cache.get(name)
+            if provider is None:
+                provider = _provider_cache[name] = _PROVIDERS[name]()
+    return provider
+
 class STTService:
-    """Factory to get the configured STT provider"""
-    def __init__(self, provider_name: Optional[str] = None):
+    """Factory to get the configured STT provider.
+
+    After a transcription is started, ``original_bytes`` / ``uploaded_bytes``
+    hold the audio size as received and as sent (smaller when preprocessed),
+    and ``preprocess_error`` why preprocessing fell back to the original.
+    """
+    def __init__(self, provider_name: Optional[str] = None, preprocess: Optional[bool] = None):
         name = (provider_name or os.getenv('STT_PROVIDER') or 'assemblyai').lower()
-        if name == 'assemblyai':
-            self.provider = AssemblyAIProvider()
-        else:
-            raise ValueError(f"Unsupported STT provider: {name}")
+        self.provider = get_provider(name)
+        self.preprocess = audio_preprocess.AUDIO_PREPROCESS if preprocess is None else preprocess
+        self.original_bytes: Optional[int] = None
+        self.uploaded_bytes: Optional[int] = None
+        self.preprocess_error: Optional[str] = None
 
     def start_transcription(self, file_path: str) -> str:
-        return self.provider.upload_and_transcribe(file_path)
+        if not self.preprocess:
+            self.original_bytes = self.uploaded_bytes = os.path.getsize(file_path)
+            return self.provider.upload_and_transcribe(file_path)
+        fd, dst = tempfile.mkstemp(prefix='stt-', suffix=f".{audio_preprocess.FORMAT}")
+        os.close(fd)
+        try:
+            result = audio_preprocess.preprocess(file_path, dst)
+            self.original_bytes, self.uploaded_bytes = result.original_bytes, result.uploaded_bytes
+            self.preprocess_error = result.error
+            return self.provider.upload_and_transcribe(result.path)
+        finally:
+            os.remove(dst)
+
+    def start_transcription_stream(self, chunks: Iterable[bytes], filename: Optional[str] = None) -> str:
+        if self.preprocess:
+            # Transcoding needs the whole recording in a file; keep the
+            # extension so the decoder can tell the container
+            fd, src = tempfile.mkstemp(prefix='stt-', suffix=os.path.splitext(filename or '')[1][:10])
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+                return self.start_transcription(src)
+            finally:
+                os.remove(src)
+        self.original_bytes = 0
+
+        def counted():
+            for chunk in chunks:
+                self.original_bytes += len(chunk)
+                yield chunk
+
+        transcript_id = self.provider.transcribe_stream(counted())
+        self.uploaded_bytes = self.original_bytes
+        return transcript_id
 
     def get_transcription_status(self, external_id: str) -> Dict[str, Any]:
         return self.provider.get_status(external_id)
@@ -0,0 +1,175 @@
+"""
+Client portal timeline built in the database.
+
+Status audits, messages, document grants, invoices and payments are merged
+with one ``UNION ALL`` of ``(type, id, at)`` rows that the database orders and
+limits, then only the rows on the requested page are loaded for display.
+Pages are addressed by an opaque keyset cursor over ``(at, type, id)``
+descending, so page N costs the same as page 1.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, String, and_, cast, func, literal, or_, select, type_coerce, union_all
+
+try:
+    from ..models import db, Case, CaseStatusAudit, ClientMessage, ClientDocumentAccess, Document, Invoice, Payment
+except (ImportError, ValueError):
+    from models import db, Case, CaseStatusAudit, ClientMessage, ClientDocumentAccess, Document, Invoice, Payment
+
+# Rows without a timestamp sort last, as they did with the old string sort
+_EPOCH = datetime(1970, 1, 1)
+
+
+def encode_cursor(at: datetime, type_: str, id_: int) -> str:
+    raw = json.dumps([at.isoformat(), type_, id_], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, str, int]]:
+    """Parse a cursor from :func:`encode_cursor`; None when it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        at, type_, id_ = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(at), str(type_), int(id_)
+    except (ValueError, TypeError):
+        return None
+
+
+def _as_datetime(col, dialect: str):
+    if dialect != 'sqlite':
+        return cast(col, DateTime) if isinstance(col.type, Date) else col
+    # SQLite keeps DATE/DATETIME as ISO strings (CAST would make them numbers);
+    # pad dates to the DATETIME storage format so all rows compare as equals.
+    return type_coerce(col, String).concat(' 00:00:00.000000') if isinstance(col.type, Date) else col
+
+
+def timeline_union(client_id: int, case_id: Optional[int] = None):
+    """``(type, id, at)`` rows for every timeline event of a client, as a subquery."""
+    dialect = db.session.get_bind().dialect.name
+
+    def at(col):
+        return func.coalesce(_as_datetime(col, dialect), _EPOCH)
+
+    status = (select(literal('status_change').label('type'), CaseStatusAudit.id.label('id'),
+                     at(CaseStatusAudit.created_at).label('at'))
+              .join(Case, CaseStatusAudit.case_id == Case.id)
+              .where(Case.client_id == client_id))
+    messages = (select(literal('message'), ClientMessage.id, at(ClientMessage.created_at))
+                .where(ClientMessage.client_id == client_id))
+    documents = (select(literal('document'), ClientDocumentAccess.id, at(ClientDocumentAccess.granted_at))
+                 .join(Document, ClientDocumentAccess.document_id == Document.id)
+                 .where(ClientDocumentAccess.client_id == client_id))
+    invoices = (select(literal('invoice'), Invoice.id, at(Invoice.created_at))
+                .where(Invoice.client_id == client_id))
+    payments = (select(literal('payment'), Payment.id, at(Payment.payment_date))
+                .join(Invoice, Payment.invoice_id == Invoice.id)
+                .where(Invoice.client_id == client_id))
+    if case_id:
+        status = status.where(CaseStatusAudit.case_id == case_id)
+        messages = messages.where(ClientMessage.case_id == case_id)
+        documents = documents.where(Document.case_id == case_id)
+        invoices = invoices.where(Invoice.case_id == case_id)
+        payments = payments.where(Invoice.case_id == case_id)
+    return union_all(status, messages, documents, invoices, payments).subquery('timeline')
+
+
+def _hydrate(keys: List[Tuple[str, int]]) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    """Build display dicts for the page's rows with one IN query per event type."""
+    ids: Dict[str, List[int]] = {}
+    for type_, id_ in keys:
+        ids.setdefault(type_, []).append(id_)
+    out: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    if ids.get('status_change'):
+        for a in CaseStatusAudit.query.filter(CaseStatusAudit.id.in_(ids['status_change'])):
+            out[('status_change', a.id)] = {
+                'type': 'status_change',
+                'case_id': a.case_id,
+                'at': a.created_at.isoformat() if a.created_at else None,
+                'data': {'from': a.from_status, 'to': a.to_status},
+            }
+    if ids.get('message'):
+        for m in ClientMessage.query.filter(ClientMessage.id.in_(ids['message'])):
+            out[('message', m.id)] = {
+                'type': 'message',
+                'case_id': m.case_id,
+                'at': m.created_at.isoformat() if m.created_at else None,
+                'data': {'from_client': m.from_client, 'subject': m.subject, 'message': m.message},
+            }
+    if ids.get('document'):
+        rows = (db.session.query(ClientDocumentAccess, Document)
+                .join(Document, ClientDocumentAccess.document_id == Document.id)
+                .filter(ClientDocumentAccess.id.in_(ids['document'])))
+        for acc, doc in rows:
+            out[('document', acc.id)] = {
+                'type': 'document',
+                'case_id': doc.case_id,
+                'at': acc.granted_at.isoformat() if acc.granted_at else None,
+                'data': {'name': doc.name},
+            }
+    if ids.get('invoice'):
+        for inv in Invoice.query.filter(Invoice.id.in_(ids['invoice'])):
+            out[('invoice', inv.id)] = {
+                'type': 'invoice',
+                'case_id': inv.case_id,
+                'at': inv.created_at.isoformat() if getattr(inv, 'created_at', None) else None,
+                'data': {
+                    'invoice_number': getattr(inv, 'invoice_number', None),
+                    'status': getattr(inv, 'status', None),
+                    'total_amount': float(getattr(inv, 'total_amount', 0) or 0),
+                },
+            }
+    if ids.get('payment'):
+        rows = (db.session.query(Payment, Invoice.case_id)
+                .join(Invoice, Payment.invoice_id == Invoice.id)
+                .filter(Payment.id.in_(ids['payment'])))
+        for p, inv_case_id in rows:
+            out[('payment', p.id)] = {
+                'type': 'payment',
+                'case_id': inv_case_id,
+                'at': p.payment_date.isoformat() if getattr(p, 'payment_date', None) else None,
+                'data': {'amount': float(getattr(p, 'amount', 0) or 0), 'status': getattr(p, 'status', None)},
+            }
+    return out
+
+
+def timeline_page(client_id: int, case_id: Optional[int] = None, limit: int = 25,
+                  cursor: Optional[Tuple[datetime, str, int]] = None,
+                  offset: Optional[int] = None) -> Dict[str, Any]:
+    """One page of events, newest first.
+
+    Pass the decoded ``next_cursor`` of the previous page as ``cursor``.
+    ``offset`` supports legacy ``page=`` callers; it still runs in the
+    database but degrades with depth, so prefer cursors.
+    """
+    t = timeline_union(client_id, case_id)
+    q = select(t.c.type, t.c.id, t.c.at)
+    if cursor is not None:
+        at, type_, id_ = cursor
+        q = q.where(or_(
+            t.c.at < at,
+            and_(t.c.at == at, t.c.type < type_),
+            and_(t.c.at == at, t.c.type == type_, t.c.id < id_),
+        ))
+    q = q.order_by(t.c.at.desc(), t.c.type.desc(), t.c.id.desc()).limit(limit + 1)
+    if offset:
+        q = q.offset(offset)
+    rows = db.session.execute(q).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    details = _hydrate([(r.type, r.id) for r in rows])
+    items = [details[(r.type, r.id)] for r in rows if (r.type, r.id) in details]
+    last = rows[-1] if rows else None
+    return {
+        'items': items,
+        'has_more': has_more,
+        'next_cursor': encode_cursor(last.at, last.type, last.id) if has_more and last else None,
+    }
+
+
+def timeline_count(client_id: int, case_id: Optional[int] = None) -> int:
+    t = timeline_union(client_id, case_id)
+    return db.session.execute(select(func.count()).select_from(t)).scalar() or 0
+
@@ -0,0 +1,134 @@
+"""
+Transcript completion tracking.
+
+Status endpoints answer from the ``transcript`` table only. Rows move to a
+final state in one of two ways:
+
+  - the provider's completion webhook (``POST /api/webhooks/transcripts``)
+    triggers one status fetch for that transcript, or
+  - the background poller, the fallback when webhooks are not configured or
+    get lost, checks outstanding rows whose ``next_poll_at`` is due, with
+    exponential backoff per transcript, and gives up after ``max_age``.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+try:
+    from ..models import Transcript
+except (ImportError, ValueError):
+    from models import Transcript
+
+PENDING_STATUSES = ('queued', 'processing')
+RESULT_KEYS = ('entities', 'sentiment_analysis', 'auto_highlights', 'iab_categories')
+
+
+def poll_delay(attempts: int, base_seconds: float, max_seconds: float) -> timedelta:
+    return timedelta(seconds=min(max_seconds, base_seconds * (2 ** max(0, attempts))))
+
+
+def apply_status(t: Transcript, data: Dict[str, Any], now: Optional[datetime] = None) -> bool:
+    """Copy a provider status payload onto ``t``; True when it reached a final state."""
+    now = now or datetime.utcnow()
+    status = data.get('status') or t.status
+    t.status = status
+    if status == 'completed':
+        t.text = data.get('text') or ''
+        t.error = None
+        extras = {k: data.get(k) for k in RESULT_KEYS if data.get(k) is not None}
+        t.result = json.dumps(extras) if extras else None
+    elif status == 'error':
+        t.text = None
+        t.error = data.get('error') or 'transcription failed'
+    if status in PENDING_STATUSES:
+        return False
+    t.completed_at = now
+    t.next_poll_at = None
+    return True
+
+
+def status_payload(t: Transcript) -> Dict[str, Any]:
+    return {
+        'transcript_id': t.external_id,
+        'status': t.status,
+        'text': t.text,
+        'error': t.error,
+    }
+
+
+def result_of(t: Transcript) -> Dict[str, Any]:
+    try:
+        return json.loads(t.result) if t.result else {}
+    except ValueError:
+        return {}
+
+
+def track(session, external_id: str, **fields) -> Transcript:
+    """Row for ``external_id``, created as processing (due for a poll now) when unknown."""
+    t = session.query(Transcript).filter_by(external_id=external_id).first()
+    if t is None:
+        t = Transcript(provider=fields.pop('provider', 'assemblyai'), external_id=external_id,
+                       status='processing', next_poll_at=datetime.utcnow(), poll_attempts=0, **fields)
+        session.add(t)
+        session.commit()
+    return t
+
+
+def refresh(session, t: Transcript, fetch_status, base_seconds: float, max_seconds: float) -> bool:
+    """Fetch and apply one transcript's provider status; on failure schedule a retry. Commits."""
+    now = datetime.utcnow()
+    try:
+        done = apply_status(t, fetch_status(t.external_id), now)
+    except Exception:
+        t.next_poll_at = now + poll_delay(t.poll_attempts or 0, base_seconds, max_seconds)
+        t.poll_attempts = (t.poll_attempts or 0) + 1
+        session.commit()
+        raise
+    if not done:
+        t.next_poll_at = now + poll_delay(t.poll_attempts or 0, base_seconds, max_seconds)
+        t.poll_attempts = (t.poll_attempts or 0) + 1
+    session.commit()
+    return done
+
+
+def poll_due(session, fetch_status, limit: int = 50, concurrency: int = 4, base_seconds: float = 5,
+             max_seconds: float = 300, max_age: timedelta = timedelta(hours=24)) -> Dict[str, int]:
+    """Check outstanding transcripts that are due; returns counts by outcome.
+
+    Provider calls for the batch run concurrently; all row updates are
+    applied and committed together afterwards.
+    """
+    now = datetime.utcnow()
+    due = (session.query(Transcript)
+           .filter(Transcript.status.in_(PENDING_STATUSES))
+           .filter((Transcript.next_poll_at.is_(None)) | (Transcript.next_poll_at <= now))
+           .order_by(Transcript.next_poll_at.asc())
+           .limit(limit)
+           .all())
+    counts = {'checked': len(due), 'completed': 0, 'pending': 0, 'errors': 0, 'expired': 0}
+    if not due:
+        return counts
+    expired = [t for t in due if t.created_at and t.created_at < now - max_age]
+    for t in expired:
+        apply_status(t, {'status': 'error', 'error': 'timed out waiting for provider'}, now)
+    counts['expired'] = len(expired)
+    live = [t for t in due if t not in expired]
+
+    def fetch(external_id):
+        try:
+            return fetch_status(external_id), None
+        except Exception as e:
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(live) or 1))) as pool:
+        results = list(pool.map(fetch, [t.external_id for t in live]))
+    for t, (data, error) in zip(live, results):
+        if data is not None and apply_status(t, data, now):
+            counts['completed'] += 1
+            continue
+        counts['errors' if error is not None else 'pending'] += 1
+        t.next_poll_at = now + poll_delay(t.poll_attempts or 0, base_seconds, max_seconds)
+        t.poll_attempts = (t.poll_attempts or 0) + 1
+    session.commit()
+    return counts
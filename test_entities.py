@@ -0,0 +1,64 @@
+"""
+Regression check: the single-pass extractor (services/entities.py) against
+the per-type extraction it replaced (kept in benchmarks/bench_entities.py).
+
+A single scan never reports overlapping entities, so locations may come out
+tighter than before; every other type must match the old per-type results.
+
+Run with pytest, or directly: python test_entities.py
+"""
+from benchmarks.bench_entities import SENTENCES, chunked, legacy_extract
+from services.entities import default_extractor
+
+MIXED_TEXTS = SENTENCES + [
+    ' '.join(SENTENCES),
+    "I moved here in 2019 and lived near the store until last week when I went to 12 Main Street Springfield IL 62704",
+    "Since 2019 until last week he paid 300 dollars at Springfield IL 62704, call 555 123 4567 yesterday.",
+    "Send the letter to 350 5th Avenue New York NY 10118\nby 03/05/2024 or last month at the latest.",
+]
+
+
+def differences(text):
+    old, old_relative = legacy_extract(text)
+    old['relative_dates'] = old_relative
+    new = default_extractor.extract(text)
+    found = []
+    for kind in set(old) | set(new):
+        before, after = set(old.get(kind, ())), set(new.get(kind, ()))
+        if kind == 'locations':
+            # Allowed to shrink to a part of an old match, never to appear from nowhere
+            extra = {value for value in after if not any(value in o for o in before)}
+            if extra:
+                found.append(f"locations not found before: {sorted(extra)}")
+        elif before != after:
+            found.append(f"{kind}: before {sorted(before)}, now {sorted(after)}")
+    return found
+
+
+def test_matches_per_type_extraction_on_mixed_text():
+    failures = []
+    for text in MIXED_TEXTS:
+        found = differences(text)
+        if found:
+            failures.append(f"{text[:60]!r}: {'; '.join(found)}")
+    assert not failures, '\n'.join(failures)
+
+
+def test_address_does_not_hide_relative_dates():
+    text = MIXED_TEXTS[len(SENTENCES) + 1]
+    assert default_extractor.extract(text) == {
+        'relative_dates': ['last week'],
+        'locations': ['12 Main Street Springfield IL 62704'],
+    }
+
+
+def test_stream_matches_single_scan():
+    text = ' '.join(MIXED_TEXTS) * 20
+    assert list(default_extractor.stream(chunked(text, 700))) == list(default_extractor.finditer(text))
+
+
+if __name__ == '__main__':
+    test_matches_per_type_extraction_on_mixed_text()
+    test_address_does_not_hide_relative_dates()
+    test_stream_matches_single_scan()
+    print('ok')
@@ -0,0 +1,210 @@
+"""
+Pooled SMTP transport checks for services/mailer.py.
+
+Runs MailerPool against a local SMTP stand-in (a threaded socket server
+speaking just enough SMTP) and, for the queue path, against an in-memory
+SQLite database built from models.py.
+
+Run with pytest, or directly: python test_mailer.py
+"""
+import socket
+import socketserver
+import threading
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import event
+
+from models import db, EmailQueue
+from services.email_queue import claim_batch, complete_batch
+from services.mailer import MailerPool, OutgoingEmail
+
+SENDER = 'firm@example.com'
+
+
+class _Session(socketserver.StreamRequestHandler):
+    """One SMTP session: no STARTTLS/AUTH, refuses recipients starting with 'refused'."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        stub = self.server.stub
+        with stub.lock:
+            stub.connects += 1
+        self.reply('220 stand-in ESMTP')
+        rcpt = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('MAIL', 'RCPT', 'DATA') and stub.drop_next.is_set():
+                # Server side idle timeout: hang up without a reply
+                stub.drop_next.clear()
+                return
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 stand-in')
+            elif verb == 'MAIL':
+                rcpt = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip().strip('<>')
+                if address.startswith('refused'):
+                    self.reply('550 mailbox unavailable')
+                else:
+                    rcpt.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 go ahead')
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if data in (b'.\r\n', b''):
+                        break
+                    lines.append(data.decode('utf-8', 'replace'))
+                with stub.lock:
+                    stub.delivered.extend((to, ''.join(lines)) for to in rcpt)
+                self.reply('250 queued')
+            elif verb == 'RSET':
+                rcpt = []
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Session)
+        self.stub = self
+        self.lock = threading.Lock()
+        self.connects = 0
+        self.delivered = []
+        self.drop_next = threading.Event()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def email(to, n=0):
+    return OutgoingEmail(to, f'Subject {n}', f'Body {n}')
+
+
+def test_reconnects_after_server_disconnect():
+    server = SMTPStub()
+    pool = MailerPool('127.0.0.1', server.port, None, None, SENDER)
+    try:
+        pool.send(email('a@example.com', 1))
+        server.drop_next.set()
+        pool.send(email('b@example.com', 2))
+        assert [to for to, _ in server.delivered] == ['a@example.com', 'b@example.com']
+        assert pool.connects == 2
+    finally:
+        pool.close()
+        server.stop()
+
+
+def test_refused_recipient_keeps_the_session():
+    server = SMTPStub()
+    pool = MailerPool('127.0.0.1', server.port, None, None, SENDER)
+    try:
+        errors = pool.send_batch([email('a@example.com'), email('refused@example.com'), email('c@example.com')])
+        assert errors[0] is None and errors[2] is None
+        assert errors[1] and 'refused@example.com' in errors[1]
+        assert [to for to, _ in server.delivered] == ['a@example.com', 'c@example.com']
+        assert pool.connects == server.connects == 1
+    finally:
+        pool.close()
+        server.stop()
+
+
+def test_connect_failure_fails_the_rest_of_the_chunk():
+    probe = socket.socket()
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()  # nothing listens here now
+    pool = MailerPool('127.0.0.1', port, None, None, SENDER, timeout=2)
+    errors = pool.send_batch([email(f'{n}@example.com', n) for n in range(3)])
+    assert len(errors) == 3
+    assert all(e and e.startswith('connect failed') for e in errors)
+    assert pool.connects == 0
+
+
+def test_results_stay_in_order_across_concurrent_chunks():
+    server = SMTPStub()
+    pool = MailerPool('127.0.0.1', server.port, None, None, SENDER, concurrency=3)
+    try:
+        recipients = [f'refused{n}@example.com' if n % 3 == 1 else f'ok{n}@example.com' for n in range(10)]
+        errors = pool.send_batch([email(to, n) for n, to in enumerate(recipients)])
+        assert len(errors) == len(recipients)
+        for to, error in zip(recipients, errors):
+            assert (error is None) == to.startswith('ok'), (to, error)
+            if error:
+                assert to in error
+        assert sorted(to for to, _ in server.delivered) == sorted(r for r in recipients if r.startswith('ok'))
+        assert pool.connects <= 3
+    finally:
+        pool.close()
+        server.stop()
+
+
+def test_queue_batch_is_completed_in_one_commit():
+    server = SMTPStub()
+    pool = MailerPool('127.0.0.1', server.port, None, None, SENDER, concurrency=2)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    try:
+        with app.app_context():
+            db.create_all()
+            due = datetime.utcnow() - timedelta(minutes=1)
+            for n, to in enumerate(['a@example.com', 'refused@example.com', 'c@example.com', 'd@example.com']):
+                db.session.add(EmailQueue(to=to, subject=f'S{n}', body=f'B{n}', send_after=due, status='pending'))
+            db.session.commit()
+
+            items = claim_batch(db.session, 10, 60)
+            errors = pool.send_batch([OutgoingEmail(i.to, i.subject, i.body) for i in items])
+            commits = []
+
+            def listener(session):
+                commits.append(session)
+
+            event.listen(db.session, 'after_commit', listener)
+            try:
+                outcome = complete_batch(db.session, items, errors, max_attempts=3,
+                                         retry_base_seconds=60, retry_max_seconds=3600)
+            finally:
+                event.remove(db.session, 'after_commit', listener)
+
+            assert len(commits) == 1
+            assert outcome == {'sent': 3, 'retry': 1, 'failed': 0}
+            rows = {row.to: row for row in EmailQueue.query.all()}
+            assert rows['refused@example.com'].status == 'pending'
+            assert rows['refused@example.com'].last_error
+            assert all(rows[to].status == 'sent' for to in ('a@example.com', 'c@example.com', 'd@example.com'))
+            assert all(row.locked_by is None for row in rows.values())
+    finally:
+        pool.close()
+        server.stop()
+
+
+if __name__ == '__main__':
+    test_reconnects_after_server_disconnect()
+    test_refused_recipient_keeps_the_session()
+    test_connect_failure_fails_the_rest_of_the_chunk()
+    test_results_stay_in_order_across_concurrent_chunks()
+    test_queue_batch_is_completed_in_one_commit()
+    print('ok')
@@ -0,0 +1,197 @@
+"""
+Query-plan regression check for hot route queries.
+
+Builds the schema from models.py in an in-memory SQLite database, runs
+EXPLAIN QUERY PLAN for each query the routes issue on hot paths and fails
+when any of them scans a whole table (or sorts a keyset page in a temp
+B-tree instead of reading it in index order).
+
+Run with pytest, or directly: python test_query_plans.py
+"""
+import glob
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import event, func, select
+
+from models import (db, Action, AnalyzerLog, CalendarEvent, Case, CaseAction, CaseStatusAudit, Client, Deadline,
+                    Document, DocumentExtraction, EmailQueue, IntakeJob, RetentionRun, TimeEntry, Transcript)
+from services.pagination import Paginator, encode_cursor
+from services.timeline import timeline_page
+
+# Indexes that predate the first migration (created by db.create_all())
+BASE_SCHEMA_INDEXES = {'ix_transcript_external_id'}
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+CURSOR_AT = datetime(2024, 5, 1)
+
+
+def statements_of(run):
+    """(sql, parameters) of every statement ``run()`` executes, captured as the code issues them."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        run()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    return captured
+
+
+def paginator_statements(model, key, descending=True):
+    """(page, SQL) that Paginator.page issues for a first and a cursor page."""
+    statements = []
+    for page, args in (('first page', {}), ('cursor page', {'cursor': encode_cursor(CURSOR_AT, 100)})):
+        run = lambda: Paginator(args).page(db.session, model.query, key, model.id, lambda row: {}, descending)
+        # A nullable key is read in two steps: non-NULL keys, then the NULL tail by id
+        statements.extend(zip((page, f'{page} NULL-key tail'), statements_of(run)))
+    return statements
+
+
+def hot_queries():
+    """(name, statement, must read in index order) for each hot query."""
+    queries = [
+        ('dashboard recent cases', select(Case.id).order_by(Case.created_at.desc()).limit(5), True),
+        ('dashboard upcoming actions',
+         select(Action.id).where(Action.due_date >= NOW).order_by(Action.due_date.asc()).limit(5), True),
+        ('dashboard upcoming deadlines',
+         select(Deadline.id).where(Deadline.due_date >= NOW, Deadline.due_date <= NOW + timedelta(days=30))
+         .order_by(Deadline.due_date.asc()).limit(5), True),
+        ('dashboard reconcile open cases', select(func.count()).select_from(Case).where(Case.status == 'open'), False),
+        ('dashboard reconcile pending actions',
+         select(func.count()).select_from(Action).where(Action.status == 'pending'), False),
+        ('portal cases', select(Case.id).where(Case.client_id == 1).order_by(Case.created_at.desc()), True),
+        ('case deadlines', select(Deadline.id).where(Deadline.case_id == 1).order_by(Deadline.due_date.asc()), True),
+        ('shared document blob',
+         select(Document.id).where(Document.sha256 == 'ab' * 32, Document.id != 1).limit(1), False),
+        ('document extraction backlog',
+         select(DocumentExtraction.id).where(DocumentExtraction.status == 'pending')
+         .order_by(DocumentExtraction.created_at.asc()).limit(16), True),
+        ('recent retention runs', select(RetentionRun.id).order_by(RetentionRun.started_at.desc()).limit(20), True),
+        ('case documents', select(Document.id).where(Document.case_id == 1).order_by(Document.created_at.desc()), True),
+        ('case status audit',
+         select(CaseStatusAudit.id).where(CaseStatusAudit.case_id == 1).order_by(CaseStatusAudit.created_at.desc()),
+         True),
+        ('actions by client', select(Action.id).where(Action.id.in_(
+            select(CaseAction.action_id).join(Case, Case.id == CaseAction.case_id).where(Case.client_id == 1)
+        )).order_by(Action.created_at.desc(), Action.id.desc()).limit(51), False),
+        ('action case links', select(CaseAction.case_id).where(CaseAction.action_id.in_([1, 2, 3])), False),
+        ('email queue by status',
+         select(EmailQueue.id).where(EmailQueue.status == 'failed')
+         .order_by(EmailQueue.created_at.desc(), EmailQueue.id.desc()).limit(51), True),
+        ('email queue claim',
+         select(EmailQueue.id).where(EmailQueue.status == 'pending', EmailQueue.send_after <= NOW,
+                                     (EmailQueue.locked_until.is_(None)) | (EmailQueue.locked_until < NOW))
+         .order_by(EmailQueue.created_at.asc()).limit(25), False),
+        ('calendar reminders due',
+         select(CalendarEvent.id).where(CalendarEvent.remind_at >= NOW - timedelta(minutes=10),
+                                        CalendarEvent.remind_at <= NOW + timedelta(minutes=1)), False),
+        ('transcript poller',
+         select(Transcript.id).where(Transcript.status.in_(('queued', 'processing')),
+                                     Transcript.next_poll_at.is_(None) | (Transcript.next_poll_at <= NOW))
+         .order_by(Transcript.next_poll_at.asc()).limit(50), False),
+        ('analyzer latency histogram',
+         select(AnalyzerLog.provider, AnalyzerLog.latency_bucket, func.count())
+         .where(AnalyzerLog.created_at >= NOW - timedelta(hours=24))
+         .group_by(AnalyzerLog.provider, AnalyzerLog.latency_bucket), False),
+        ('running timer', select(TimeEntry.id).where(TimeEntry.user_id == 1, TimeEntry.end_time.is_(None)), False),
+        ('stale intake jobs',
+         select(IntakeJob.id).where(IntakeJob.status == 'running', IntakeJob.started_at < NOW), False),
+    ]
+    for name, model, key, descending in (
+        ('cases list', Case, Case.created_at, True),
+        ('clients list', Client, Client.created_at, True),
+        ('actions list', Action, Action.created_at, True),
+        ('documents list', Document, Document.created_at, True),
+        ('email queue list', EmailQueue, EmailQueue.created_at, True),
+        ('calendar list', CalendarEvent, CalendarEvent.start_at, False),
+    ):
+        for page, statement in paginator_statements(model, key, descending):
+            queries.append((f'{name} {page}', statement, True))
+    # The union is sorted per page; each branch must still be an index search
+    for name, case_id, cursor in (
+        ('portal timeline', None, None),
+        ('portal timeline for case', 1, None),
+        ('portal timeline cursor page', None, (CURSOR_AT, 'message', 100)),
+    ):
+        for statement in statements_of(lambda: timeline_page(1, case_id=case_id, cursor=cursor)):
+            queries.append((name, statement, False))
+    return queries
+
+
+def _prefix_explain(conn, cursor, statement, parameters, context, executemany):
+    return 'EXPLAIN QUERY PLAN ' + statement, parameters
+
+
+def explain(stmt):
+    # Prefix at the cursor so parameters are bound exactly as the routes bind
+    # them (partial indexes are only usable when the planner sees the value).
+    event.listen(db.engine, 'before_cursor_execute', _prefix_explain, retval=True)
+    try:
+        if isinstance(stmt, tuple):  # (sql, parameters) captured from a run
+            result = db.session.connection().exec_driver_sql(*stmt)
+        else:
+            result = db.session.connection().execute(stmt)
+        rows = result.cursor.fetchall()
+        result.close()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _prefix_explain)
+    return [row[3] for row in rows]
+
+
+def problems(plan, ordered):
+    found = []
+    for detail in plan:
+        words = detail.split()
+        # "SCAN t" is a full table scan; "SCAN t USING [COVERING] INDEX i" walks
+        # an index in order and stops at the LIMIT.
+        if words[:1] == ['SCAN'] and 'USING' not in words and 'CONSTANT' not in words \
+                and not detail.startswith('SCAN timeline'):
+            found.append(f'full scan: {detail}')
+        if ordered and detail.startswith('USE TEMP B-TREE FOR ORDER BY'):
+            found.append(f'sort: {detail}')
+    return found
+
+
+def check_plans():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    report = []
+    with app.app_context():
+        db.create_all()
+        for name, stmt, ordered in hot_queries():
+            plan = explain(stmt)
+            report.append((name, plan, problems(plan, ordered)))
+    return report
+
+
+def test_hot_queries_use_indexes():
+    failures = [f"{name}: {'; '.join(found)}" for name, _, found in check_plans() if found]
+    assert not failures, '\n'.join(failures)
+
+
+def test_migrations_create_model_indexes():
+    migrated = set()
+    for path in glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations', 'versions', '*.py')):
+        with open(path) as fh:
+            migrated.update(re.findall(r"'(ix_\w+)'", fh.read()))
+    declared = {ix.name for table in db.metadata.tables.values() for ix in table.indexes}
+    missing = declared - migrated - BASE_SCHEMA_INDEXES
+    assert not missing, f"indexes without a migration: {sorted(missing)}"
+
+
+if __name__ == '__main__':
+    bad = 0
+    for name, plan, found in check_plans():
+        status = 'FAIL' if found else 'ok'
+        bad += bool(found)
+        print(f"{status:4} {name}")
+        for detail in plan:
+            print(f"       {detail}")
+    sys.exit(1 if bad else 0)
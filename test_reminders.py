@@ -0,0 +1,46 @@
+"""
+Reminder scheduling checks for services/reminders.py.
+
+Builds the schema from models.py in an in-memory SQLite database and runs
+``enqueue_due`` the way the per-minute job does.
+
+Run with pytest, or directly: python test_reminders.py
+"""
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from models import db, CalendarEvent, Client, EmailQueue
+from services import reminders
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+
+def test_reminder_picked_up_early_is_queued_once():
+    app = make_app()
+    with app.app_context():
+        reminders.install(type(db.session()))
+        db.create_all()
+        client = Client(first_name='Ada', last_name='Lovelace', email='ada@example.com')
+        db.session.add(client)
+        db.session.flush()
+        # Due 30s after the first run, so only the lookahead catches it
+        db.session.add(CalendarEvent(title='Hearing', client_id=client.id, reminder_minutes_before=30,
+                                     start_at=NOW + timedelta(minutes=30, seconds=30)))
+        db.session.commit()
+
+        assert reminders.enqueue_due(db.session, now=NOW) == 1
+        assert reminders.enqueue_due(db.session, now=NOW + timedelta(minutes=1)) == 0
+        assert db.session.query(EmailQueue).count() == 1
+
+
+if __name__ == '__main__':
+    test_reminder_picked_up_early_is_queued_once()
+    print('ok')
@@ -1,9 +1,15 @@
 from datetime import datetime, timedelta
 import os
-import re
 from sqlalchemy import or_
 from dotenv import load_dotenv
 
+try:
+    from .services.classifier import default_classifier
+    from .services.entities import default_extractor
+except ImportError:
+    from services.classifier import default_classifier
+    from services.entities import default_extractor
+
 # Load environment variables
 load_dotenv()
 
@@ -35,7 +41,17 @@ def apply_case_filters(query, args):
     
     # Search by title or description
     search = args.get('search')
+    matches = None
     if search:
+        try:
+            from .services.search import search_index
+        except ImportError:
+            from services.search import search_index
+        # Full-text index when available; the LIKE scan below is the fallback
+        matches = search_index.ids('case', search)
+    if matches is not None:
+        query = query.filter(Case.id.in_(matches))
+    elif search:
         search = f"%{search}%"
         query = query.filter(
             or_(
@@ -80,72 +96,68 @@ def extract_entities(text):
     """Extract entities using regex patterns."""
     if not text:
         return {}
-    
-    patterns = {
-        'dates': r'\b(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}\b|\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',
-        'emails': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-        'phone_numbers': r'\b(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b',
-        'amounts': r'\$\d+(?:\.\d{1,2})?\b|\b\d+\s*(?:dollars|USD)\b',
-        'locations': r'\b(?:\d+\s+[\w\s]+,?\s+[A-Z]{2}\s+\d{5}\b|\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:Street|St\.?|Avenue|Ave\.?|Road|Rd\.?|Boulevard|Blvd\.?|Lane|Ln\.?|Drive|Dr\.?|Court|Ct\.?|Way|Terrace|Trl\.?|Trail|Plaza|Pl\.?|Square|Sq\.?|Circle|Cir\.?|Highway|Hwy\.?|Freeway|Fwy\.?|Turnpike|Tpke\.?|Parkway|Pkwy\.?|Alley|Aly\.?|Bend|Bnd\.?|Cove|Cv\.?|Creek|Crk\.?|Grove|Grv\.?|Hollow|Hlw\.?|Island|Isl\.?|Junction|Jct\.?|Knoll|Knl\.?|Meadow|Mdw\.?|Mountain|Mtn\.?|Oval|Ovl\.?|Path|Pth\.?|Ridge|Rdg\.?|Run|Rn\.?|Spring|Spg\.?|Summit|Smt\.?|View|Vw\.?|Village|Vlg\.?|Way|Wy\.?))\b',
-    }
-    
-    entities = {}
-    for entity_type, pattern in patterns.items():
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        if matches:
-            entities[entity_type] = list(set(matches))  # Remove duplicates
-    
+    entities = default_extractor.extract(text)
+    entities.pop('relative_dates', None)
     return entities
 
+# Suggested actions per case category
+SUGGESTED_ACTIONS = {
+    'family': [
+        'Schedule initial consultation with family law attorney',
+        'Gather financial documents',
+        'Prepare list of assets and debts',
+        'Document child custody preferences',
+        'Review state-specific family law requirements'
+    ],
+    'criminal': [
+        'Document all events and evidence',
+        'Gather witness statements',
+        'Review police reports',
+        'Prepare for arraignment',
+        'Discuss possible defense strategies'
+    ],
+    'civil': [
+        'Document all relevant communications',
+        'Gather supporting evidence',
+        'Calculate potential damages',
+        'Review applicable statutes of limitations',
+        'Prepare demand letter if applicable'
+    ],
+    'employment': [
+        'Document all incidents with dates and details',
+        'Gather employment contracts and policies',
+        'Review company handbook',
+        'Document any witnesses',
+        'Review state employment laws'
+    ],
+    'real_estate': [
+        'Review all property documents',
+        'Check property title and liens',
+        'Document all communications',
+        'Review lease/contract terms',
+        'Schedule property inspection if needed'
+    ]
+}
+
+# Default actions if category not found
+DEFAULT_ACTIONS = [
+    'Review case details',
+    'Schedule client meeting',
+    'Gather additional information',
+    'Research applicable laws',
+    'Prepare case strategy'
+]
+
 def classify_case(description):
     """Classify case using keyword matching and rules."""
-    if not description or not description.strip():
-        return 'other', 0.0
-    
-    description_lower = description.lower()
-    
-    # Define keywords and their weights for each category
-    category_keywords = {
-        'family': {
-            'divorce': 2, 'custody': 2, 'child support': 2, 'alimony': 2, 'marriage': 1,
-            'spousal support': 2, 'paternity': 2, 'adoption': 2, 'guardianship': 1
-        },
-        'criminal': {
-            'arrest': 2, 'bail': 2, 'felony': 2, 'misdemeanor': 2, 'theft': 2,
-            'assault': 2, 'dui': 2, 'battery': 2, 'robbery': 2, 'fraud': 2
-        },
-        'civil': {
-            'lawsuit': 2, 'negligence': 2, 'injury': 2, 'damages': 2, 'breach': 2,
-            'contract': 2, 'tort': 2, 'compensation': 1, 'liability': 2
-        },
-        'employment': {
-            'employer': 2, 'employee': 2, 'termination': 2, 'discrimination': 2,
-            'harassment': 2, 'wage': 2, 'overtime': 2, 'wrongful termination': 2
-        },
-        'real_estate': {
-            'property': 2, 'lease': 2, 'landlord': 2, 'tenant': 2, 'eviction': 2,
-            'mortgage': 2, 'deed': 2, 'zoning': 1, 'title': 1
-        }
-    }
-    
-    # Calculate scores for each category
-    scores = {category: 0 for category in category_keywords}
-    for category, keywords in category_keywords.items():
-        for keyword, weight in keywords.items():
-            if keyword in description_lower:
-                scores[category] += weight
-    
-    # Get the category with the highest score
-    if not any(scores.values()):
-        return 'other', 0.5
-    
-    best_category = max(scores, key=scores.get)
-    confidence = min(1.0, scores[best_category] / 10.0)  # Normalize to 0-1 range
-    
-    return best_category, confidence
+    return default_classifier.classify(description)
 
-def analyze_case(description):
-    """Analyze case description and provide structured insights."""
+def analyze_case(description, classification=None):
+    """Analyze case description and provide structured insights.
+
+    ``classification`` may carry a precomputed ``(category, confidence,
+    risk_level)`` tuple, as produced in bulk by ``analyze_many``.
+    """
     if not description or not description.strip():
         return {
             'category': 'other',
@@ -160,74 +172,14 @@ def analyze_case(description):
             'summary': 'No description provided.'
         }
     
-    # Classify the case
-    category, confidence = classify_case(description)
+    # Classify the case and grade its risk from a single keyword scan
+    if classification is None:
+        classification = default_classifier.classify_with_risk(description)
+    category, confidence, risk_level = classification
     
     # Extract entities
     entities = extract_entities(description)
     
-    # Define suggested actions based on category
-    suggested_actions = {
-        'family': [
-            'Schedule initial consultation with family law attorney',
-            'Gather financial documents',
-            'Prepare list of assets and debts',
-            'Document child custody preferences',
-            'Review state-specific family law requirements'
-        ],
-        'criminal': [
-            'Document all events and evidence',
-            'Gather witness statements',
-            'Review police reports',
-            'Prepare for arraignment',
-            'Discuss possible defense strategies'
-        ],
-        'civil': [
-            'Document all relevant communications',
-            'Gather supporting evidence',
-            'Calculate potential damages',
-            'Review applicable statutes of limitations',
-            'Prepare demand letter if applicable'
-        ],
-        'employment': [
-            'Document all incidents with dates and details',
-            'Gather employment contracts and policies',
-            'Review company handbook',
-            'Document any witnesses',
-            'Review state employment laws'
-        ],
-        'real_estate': [
-            'Review all property documents',
-            'Check property title and liens',
-            'Document all communications',
-            'Review lease/contract terms',
-            'Schedule property inspection if needed'
-        ]
-    }
-    
-    # Default actions if category not found
-    default_actions = [
-        'Review case details',
-        'Schedule client meeting',
-        'Gather additional information',
-        'Research applicable laws',
-        'Prepare case strategy'
-    ]
-    
-    # Determine risk level based on keywords
-    risk_keywords = {
-        'high': ['emergency', 'urgent', 'immediate', 'danger', 'harm', 'violence', 'threat', 'eviction', 'injunction'],
-        'medium': ['dispute', 'conflict', 'issue', 'problem', 'concern', 'complaint'],
-        'low': ['inquiry', 'question', 'general', 'information', 'advice']
-    }
-    
-    risk_level = 'low'
-    description_lower = description.lower()
-    if any(word in description_lower for word in risk_keywords['high']):
-        risk_level = 'high'
-    elif any(word in description_lower for word in risk_keywords['medium']):
-        risk_level = 'medium'
-    
     # Generate summary based on category and key entities
     summary_parts = [f"Case classified as '{category.replace('_', ' ')}' with {int(confidence * 100)}% confidence."]
     
@@ -242,29 +194,22 @@ def analyze_case(description):
         'category': category,
         'confidence': confidence,
         'entities': entities,
-        'suggested_actions': suggested_actions.get(category, default_actions)[:5],
+        'suggested_actions': SUGGESTED_ACTIONS.get(category, DEFAULT_ACTIONS)[:5],
         'risk_level': risk_level,
         'summary': summary
     }
 
-# ---------------- Scenario-focused Analyzer ---------------- #
-RELATIVE_DATE_PATTERNS = [
-    r"yesterday",
-    r"last\s+(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)",
-    r"last\s+week",
-    r"last\s+month",
-    r"\b\d{1,2}\s*(?:am|pm)\b",
-]
+def analyze_many(descriptions):
+    """Analyze a batch of descriptions, e.g. when re-analyzing many cases."""
+    descriptions = list(descriptions)
+    classifications = default_classifier.classify_many(descriptions)
+    return [analyze_case(d, c) for d, c in zip(descriptions, classifications)]
 
+# ---------------- Scenario-focused Analyzer ---------------- #
 def extract_relative_dates(text):
     if not text:
         return []
-    found = []
-    for pat in RELATIVE_DATE_PATTERNS:
-        matches = re.findall(pat, text, flags=re.IGNORECASE)
-        if matches:
-            found.extend(matches)
-    return list(set(found))
+    return default_extractor.extract(text).get('relative_dates', [])
 
 def analyze_intake_text_scenarios(text):
     """Scenario analyzer for four core intake scenarios.
@@ -283,9 +228,9 @@ def analyze_intake_text_scenarios(text):
         }
 
     t = text.lower()
-    ents = extract_entities(text)
-    rel_dates = extract_relative_dates(text)
-    dates = list(set(ents.get('dates', []) + rel_dates))
+    # One entity scan covers both calendar and relative dates
+    ents = default_extractor.extract(text)
+    dates = list(dict.fromkeys(ents.get('dates', []) + ents.get('relative_dates', [])))
 
     def result(category, department, priority, urgency, key_facts, suggested_actions, checklists, case_type_key=None):
         return {
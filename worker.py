@@ -0,0 +1,34 @@
+"""
+Background job worker.
+
+Runs the jobs registered in app.py (see the ``jobs.register(...)`` calls
+near the end of the file) outside the web processes:
+
+    python -m worker
+
+Any number of instances may run; the one holding the scheduler lease in the
+database runs the jobs and the others stand by to take over.
+"""
+import logging
+import signal
+
+from app import app, make_worker
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    app.logger.setLevel(logging.INFO)
+    worker = make_worker()
+
+    def _stop(signum, frame):
+        app.logger.info(f"Worker stopping (signal {signum})")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    app.logger.info(f"Worker {worker.lease.holder} started with jobs: {', '.join(worker.registry.jobs)}")
+    worker.run()
+
+
+if __name__ == '__main__':
+    main()